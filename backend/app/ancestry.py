@@ -0,0 +1,107 @@
+"""
+Skip links: besides prev_event_hash, each event signs back-links to the
+ancestors at height - 2^k for every k >= 1 with 2^k dividing its height
+(about two links per event on average). Like a Fenwick tree, any ancestor is
+then reachable in O(log n) hops, so an ancestry proof between two events in a
+chain carries O(log n) signed envelopes instead of the whole history.
+Events created before skip links carry none and are walked by prev_event_hash.
+"""
+import json
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import Event
+from app.crypto import hash_canonical
+
+def skip_heights(height: int) -> List[int]:
+    """Heights an event at this height links back to, nearest first (excluding height - 1)."""
+    heights = []
+    step = 2
+    while height % step == 0 and height - step >= 0:
+        heights.append(height - step)
+        step *= 2
+    return heights
+
+def skip_links_for(db: Session, object_id: str, height: int) -> List[str]:
+    """Hashes of the skip-link ancestors for a new event at height."""
+    heights = skip_heights(height)
+    if not heights:
+        return []
+    rows = dict(db.query(Event.chain_height, Event.event_hash).filter(
+        Event.object_id == object_id, Event.chain_height.in_(heights)
+    ))
+    return [rows[h] for h in heights if h in rows]
+
+def event_links(event: Event) -> Dict[int, str]:
+    """Signed back-links of an event, by ancestor height."""
+    links = {}
+    if event.prev_event_hash and event.chain_height:
+        links[event.chain_height - 1] = event.prev_event_hash
+    if event.skip_links_json:
+        for height, event_hash in zip(skip_heights(event.chain_height), json.loads(event.skip_links_json)):
+            links[height] = event_hash
+    return links
+
+def ancestry_path(db: Session, descendant: Event, ancestor: Event) -> Optional[List[Event]]:
+    """
+    Events from descendant back to ancestor (both included), taking the longest
+    signed link that does not overshoot. None if ancestor is not in its history.
+    """
+    if descendant.object_id != ancestor.object_id or descendant.chain_height < ancestor.chain_height:
+        return None
+    path = [descendant]
+    current = descendant
+    while current.chain_height > ancestor.chain_height:
+        links = event_links(current)
+        target = min((h for h in links if h >= ancestor.chain_height), default=None)
+        if target is None:
+            return None
+        current = db.query(Event).filter(Event.event_hash == links[target]).first()
+        if current is None or current.chain_height != target:
+            return None
+        path.append(current)
+    return path if current.event_hash == ancestor.event_hash else None
+
+def verify_ancestry_proof(descendant_hash: str, ancestor_hash: str, steps: List[Dict]) -> bool:
+    """
+    Check a proof without the database: every envelope hashes to its event hash,
+    and each step's event is a prev or skip link signed in the previous envelope.
+    Signatures are checked separately against the actors' keys.
+    """
+    if not steps or steps[0]["event_hash"] != descendant_hash or steps[-1]["event_hash"] != ancestor_hash:
+        return False
+    for i, step in enumerate(steps):
+        if hash_canonical(step["envelope"].encode("utf-8")) != step["event_hash"]:
+            return False
+        if i + 1 < len(steps):
+            signed = json.loads(step["envelope"])
+            linked = [signed.get("prev_event_hash"), *signed.get("skip_links", [])]
+            if steps[i + 1]["event_hash"] not in linked:
+                return False
+    return True
+
+def backfill_chain_heights(batch_size: int = 5000):
+    """Number existing chains (genesis = 0, in timestamp order) for events stored before heights."""
+    db = SessionLocal()
+    try:
+        while True:
+            object_ids = [row[0] for row in db.query(Event.object_id).filter(
+                Event.chain_height.is_(None)
+            ).distinct().limit(batch_size)]
+            if not object_ids:
+                break
+            updates = []
+            for object_id in object_ids:
+                # Continue after events that already have a height
+                height = db.query(func.max(Event.chain_height)).filter(Event.object_id == object_id).scalar()
+                height = -1 if height is None else height
+                for (event_hash,) in db.query(Event.event_hash).filter(
+                    Event.object_id == object_id, Event.chain_height.is_(None)
+                ).order_by(Event.timestamp, Event.event_hash):
+                    height += 1
+                    updates.append({"event_hash": event_hash, "chain_height": height})
+            db.bulk_update_mappings(Event, updates)
+            db.commit()
+    finally:
+        db.close()
@@ -1,15 +1,45 @@
 """
-Mock anchoring: store Merkle roots in JSON file.
+Anchoring: seal unanchored events into per-namespace Merkle trees, combine the
+namespace roots into an epoch root, and log each batch in a JSON file.
+The epoch root is what the anchoring backend publishes (see anchor_submitter).
 """
 import json
+import logging
+import multiprocessing
+import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import groupby
 from pathlib import Path
-from typing import List, Dict, Any
-from app.merkle import merkle_root
+import threading
+from typing import Iterator, List, Dict, Any, Optional
+from sqlalchemy import case, func, inspect, select, text
+from sqlalchemy.orm import Session
+from app.db import engine, SessionLocal
+from app.models import Event, Object, AnchorWatermark, AnchorEpoch, AnchorBatch, AnchorProof
+from app.anchor_trees import write_tree, open_tree
+
+logger = logging.getLogger(__name__)
 
 ANCHOR_FILE = Path(__file__).parent.parent / "data" / "anchors.json"
 
+# Events are sealed per namespace: 'owner' (the object's owner) or 'actor' (the signing institution)
+ANCHOR_NAMESPACE_BY = os.getenv("ANCHOR_NAMESPACE_BY", "owner")
+# Namespace for objects without an owner, and for batches anchored before namespaces existed
+DEFAULT_NAMESPACE = "archive"
+ANCHOR_TREE_WORKERS = int(os.getenv("ANCHOR_TREE_WORKERS", str(os.cpu_count() or 4)))
+# Below this many events every tree is built in-process; worker start-up would cost more
+ANCHOR_PARALLEL_MIN_EVENTS = int(os.getenv("ANCHOR_PARALLEL_MIN_EVENTS", "50000"))
+# Pending events are read in chunks of this many rows; a namespace contributes at most
+# ANCHOR_MAX_BATCH_EVENTS per run so one large backlog doesn't hold up the epoch
+ANCHOR_READ_CHUNK = int(os.getenv("ANCHOR_READ_CHUNK", "10000"))
+ANCHOR_MAX_BATCH_EVENTS = int(os.getenv("ANCHOR_MAX_BATCH_EVENTS", "1000000"))
+
+# One anchoring run at a time per process; runs in other processes are fenced off
+# by the watermark claim in anchor_pending_events
+_anchor_lock = threading.Lock()
+
 def load_anchors() -> List[Dict[str, Any]]:
     """Load anchors from JSON file."""
     if not ANCHOR_FILE.exists():
@@ -23,31 +53,213 @@ def save_anchors(anchors: List[Dict[str, Any]]):
     with open(ANCHOR_FILE, 'w') as f:
         json.dump(anchors, f, indent=2, default=str)
 
-def anchor_batch(event_hashes: List[str]) -> Dict[str, Any]:
+def append_anchors(records: List[Dict[str, Any]]):
+    """
+    Add records to the end of the JSON array in place, so an anchoring run
+    writes only its own batches instead of re-serialising the whole history.
     """
-    Anchor a batch of events by computing Merkle root and storing it.
-    Returns anchor record with batch_id, merkle_root, anchored_at, event_count.
+    if not ANCHOR_FILE.exists() or ANCHOR_FILE.stat().st_size == 0:
+        save_anchors(records)
+        return
+    body = json.dumps(records, indent=2, default=str)  # "[\n  {...}\n]"
+    with open(ANCHOR_FILE, 'r+b') as f:
+        # Walk back over the closing bracket and any whitespace before it
+        position = f.seek(0, os.SEEK_END)
+        closing_seen = False
+        while position > 0:
+            f.seek(position - 1)
+            char = f.read(1)
+            if char.isspace() or (char == b"]" and not closing_seen):
+                closing_seen = closing_seen or char == b"]"
+                position -= 1
+                continue
+            break
+        f.seek(position)
+        f.truncate()
+        # An empty array continues right after "[", otherwise after the last record
+        f.write((body[1:] if char == b"[" else ",\n" + body[2:]).encode("utf-8"))
+
+def namespace_expression():
+    """SQL expression for an event's namespace (needs Event joined to Object); used for backfills."""
+    if ANCHOR_NAMESPACE_BY == "actor":
+        return "actor:" + Event.actor_id
+    # 'owner:' || NULL is NULL, so ownerless objects fall through to the default
+    return func.coalesce("owner:" + Object.owner_id, DEFAULT_NAMESPACE)
+
+def _build_trees(batches: List[tuple]) -> List[str]:
+    """Write one tree per (batch_id, leaves); large runs use a process per namespace."""
+    total = sum(len(leaves) for _, leaves in batches)
+    if len(batches) < 2 or ANCHOR_TREE_WORKERS <= 1 or total < ANCHOR_PARALLEL_MIN_EVENTS:
+        return [write_tree(batch_id, leaves) for batch_id, leaves in batches]
+    # spawn: the API process has threads, which fork does not copy safely
+    context = multiprocessing.get_context("spawn")
+    workers = min(ANCHOR_TREE_WORKERS, len(batches))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(write_tree, *zip(*batches)))
+
+def anchor_epoch(groups: Dict[str, List[str]]) -> Dict[str, Any]:
     """
-    if not event_hashes:
+    Seal event hashes grouped by namespace: one batch tree per namespace, plus
+    an epoch tree over the batch roots (in namespace order). Every batch is
+    appended to the anchor log. Returns the epoch with its batches.
+    """
+    groups = {namespace: hashes for namespace, hashes in groups.items() if hashes}
+    if not groups:
         raise ValueError("Cannot anchor empty batch")
     
-    merkle_root_hash = merkle_root(event_hashes)
-    batch_id = str(uuid.uuid4())
+    epoch_id = str(uuid.uuid4())
     anchored_at = datetime.utcnow()
+    namespaces = sorted(groups)
+    batch_ids = [str(uuid.uuid4()) for _ in namespaces]
+    roots = _build_trees([(batch_id, groups[namespace]) for batch_id, namespace in zip(batch_ids, namespaces)])
+    epoch_root = write_tree(epoch_id, roots)
     
-    anchor_record = {
-        "batch_id": batch_id,
-        "merkle_root": merkle_root_hash,
-        "anchored_at": anchored_at.isoformat(),
-        "event_count": len(event_hashes),
-        "event_hashes": event_hashes  # Store for proof generation
-    }
-    
-    anchors = load_anchors()
-    anchors.append(anchor_record)
-    save_anchors(anchors)
+    batches = [
+        {
+            "batch_id": batch_id,
+            "merkle_root": root,
+            "anchored_at": anchored_at.isoformat(),
+            "event_count": len(groups[namespace]),
+            "event_hashes": groups[namespace],
+            "namespace": namespace,
+            "epoch_id": epoch_id,
+        }
+        for batch_id, namespace, root in zip(batch_ids, namespaces, roots)
+    ]
+    append_anchors(batches)
     
-    return anchor_record
+    return {
+        "epoch_id": epoch_id,
+        "epoch_root": epoch_root,
+        "anchored_at": anchored_at,
+        "event_count": sum(batch["event_count"] for batch in batches),
+        "batches": batches,
+    }
+
+def event_namespace(db: Session, object_id: str, actor_id: str) -> str:
+    """Namespace a new event is anchored under (same rule as namespace_expression)."""
+    if ANCHOR_NAMESPACE_BY == "actor":
+        return f"actor:{actor_id}"
+    owner_id = db.query(Object.owner_id).filter(Object.object_id == object_id).scalar()
+    return f"owner:{owner_id}" if owner_id else DEFAULT_NAMESPACE
+
+def next_event_seq():
+    """
+    Insert-time value for Event.seq. SQLite runs one writer at a time, so
+    MAX + 1 inside the INSERT gives a gap-free order that matches commit order.
+    """
+    return select(func.coalesce(func.max(Event.seq), 0) + 1).scalar_subquery()
+
+def register_namespace(db: Session, namespace: str):
+    """Give a namespace a watermark row the first time it sees an event."""
+    if db.get(AnchorWatermark, namespace) is None:
+        db.add(AnchorWatermark(namespace=namespace, last_seq=0))
+
+def _pending_filter(namespace: str, after_seq: int):
+    return (Event.namespace == namespace, Event.seq > after_seq, Event.anchor_batch_id.is_(None))
+
+def pending_namespaces(db: Session, namespace: Optional[str] = None) -> List[AnchorWatermark]:
+    """Watermarks of namespaces with events past them; one index probe per namespace."""
+    query = db.query(AnchorWatermark)
+    if namespace:
+        query = query.filter(AnchorWatermark.namespace == namespace)
+    return [
+        watermark for watermark in query.order_by(AnchorWatermark.namespace)
+        if db.query(Event.seq).filter(*_pending_filter(watermark.namespace, watermark.last_seq)).first()
+    ]
+
+def stream_pending_events(db: Session, namespace: str, after_seq: int, limit: int) -> Iterator[List[tuple]]:
+    """
+    Unanchored (seq, event_hash) rows of a namespace past its watermark, in
+    seq order and chunks of ANCHOR_READ_CHUNK. Each chunk is a range read of
+    the (namespace, seq) index.
+    """
+    remaining = limit
+    while remaining > 0:
+        rows = db.query(Event.seq, Event.event_hash).filter(
+            *_pending_filter(namespace, after_seq)
+        ).order_by(Event.seq).limit(min(ANCHOR_READ_CHUNK, remaining)).all()
+        if not rows:
+            return
+        yield rows
+        after_seq = rows[-1].seq
+        remaining -= len(rows)
+
+def claim_range(db: Session, namespace: str, after_seq: int, last_seq: int) -> bool:
+    """
+    Move a namespace's watermark from after_seq to last_seq, only if it still
+    reads after_seq. False means another run (possibly in another process)
+    claimed these events first. The UPDATE holds the database write lock until
+    the caller commits, so later claims wait for this run to finish.
+    """
+    claimed = db.query(AnchorWatermark).filter(
+        AnchorWatermark.namespace == namespace, AnchorWatermark.last_seq == after_seq
+    ).update({AnchorWatermark.last_seq: last_seq}, synchronize_session=False)
+    return claimed == 1
+
+def anchor_pending_events(db: Session, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Anchor unanchored events (optionally of one namespace only) as a new epoch,
+    at most ANCHOR_MAX_BATCH_EVENTS per namespace; the rest wait for the next run.
+    Returns the epoch, or None if nothing is pending.
+    """
+    with _anchor_lock:
+        groups, ranges = {}, {}
+        for watermark in pending_namespaces(db, namespace):
+            hashes, last_seq = [], watermark.last_seq
+            for rows in stream_pending_events(db, watermark.namespace, watermark.last_seq, ANCHOR_MAX_BATCH_EVENTS):
+                hashes.extend(row.event_hash for row in rows)
+                last_seq = rows[-1].seq
+            groups[watermark.namespace] = hashes
+            ranges[watermark.namespace] = (watermark.last_seq, last_seq)
+        # Claim the ranges before any tree file or anchor log record is written
+        try:
+            for name in list(groups):
+                if not claim_range(db, name, *ranges[name]):
+                    del groups[name]
+        except Exception:
+            db.rollback()
+            raise
+        if not groups:
+            db.rollback()
+            return None
+        
+        try:
+            epoch = anchor_epoch(groups)
+        except Exception:
+            db.rollback()
+            raise
+        
+        db.add(AnchorEpoch(
+            epoch_id=epoch["epoch_id"],
+            epoch_root=epoch["epoch_root"],
+            namespace_count=len(epoch["batches"]),
+            event_count=epoch["event_count"],
+            anchored_at=epoch["anchored_at"]
+        ))
+        for index, batch in enumerate(epoch["batches"]):
+            db.add(AnchorBatch(
+                batch_id=batch["batch_id"],
+                merkle_root=batch["merkle_root"],
+                leaf_count=batch["event_count"],
+                anchored_at=epoch["anchored_at"],
+                namespace=batch["namespace"],
+                epoch_id=epoch["epoch_id"],
+                epoch_index=index
+            ))
+        db.flush()
+        for batch in epoch["batches"]:
+            db.bulk_insert_mappings(AnchorProof, [
+                {"event_hash": event_hash, "batch_id": batch["batch_id"], "leaf_index": index}
+                for index, event_hash in enumerate(batch["event_hashes"])
+            ])
+            # The batch is exactly the unanchored events in this seq range, so one ranged UPDATE marks them
+            after_seq, last_seq = ranges[batch["namespace"]]
+            db.query(Event).filter(
+                *_pending_filter(batch["namespace"], after_seq), Event.seq <= last_seq
+            ).update({Event.anchor_batch_id: batch["batch_id"]}, synchronize_session=False)
+        db.commit()
+        return epoch
 
 def get_anchor_by_batch_id(batch_id: str) -> Dict[str, Any] | None:
     """Get anchor record by batch_id."""
@@ -61,3 +273,182 @@ def get_all_anchors() -> List[Dict[str, Any]]:
     """Get all anchor records."""
     return load_anchors()
 
+def epoch_proof(db: Session, batch: AnchorBatch) -> Dict[str, Any]:
+    """Second hop of a chained proof: the batch (namespace) root up to its epoch root."""
+    epoch = db.query(AnchorEpoch).filter(AnchorEpoch.epoch_id == batch.epoch_id).first()
+    return {
+        "namespace": batch.namespace,
+        "epoch_id": epoch.epoch_id,
+        "epoch_root": epoch.epoch_root,
+        "epoch_index": batch.epoch_index,
+        "epoch_proof_path": open_tree(epoch.epoch_id).proof(batch.epoch_index),
+    }
+
+def get_inclusion_proof(db: Session, event_hash: str) -> Dict[str, Any] | None:
+    """
+    Chained inclusion proof for an anchored event: leaf -> namespace root from
+    the batch tree, then namespace root -> epoch root. None if not anchored.
+    """
+    row = db.query(AnchorProof, AnchorBatch).join(
+        AnchorBatch, AnchorBatch.batch_id == AnchorProof.batch_id
+    ).filter(AnchorProof.event_hash == event_hash).first()
+    if not row:
+        return None
+    proof, batch = row
+    tree = open_tree(batch.batch_id)
+    return {
+        "event_hash": event_hash,
+        "batch_id": batch.batch_id,
+        "leaf_index": proof.leaf_index,
+        "merkle_root": batch.merkle_root,
+        "proof_path": tree.proof(proof.leaf_index),
+        "anchored_at": batch.anchored_at,
+        **epoch_proof(db, batch)
+    }
+
+def get_batch_proofs(db: Session, event_hashes: List[str]) -> Dict[str, Any]:
+    """
+    One deduplicated multiproof per batch covering the given events.
+    Returns {"batches": [...], "unanchored": [event hashes without a proof]}.
+    """
+    wanted = list(dict.fromkeys(event_hashes))
+    positions = []
+    # Keep IN lists well under SQLite's bound-parameter limit
+    for i in range(0, len(wanted), 500):
+        positions.extend(db.query(AnchorProof.event_hash, AnchorProof.batch_id, AnchorProof.leaf_index).filter(
+            AnchorProof.event_hash.in_(wanted[i:i + 500])
+        ).all())
+    
+    found = {row.event_hash for row in positions}
+    positions.sort(key=lambda row: (row.batch_id, row.leaf_index))
+    batches = []
+    for batch_id, group in groupby(positions, key=lambda row: row.batch_id):
+        group = list(group)
+        batch = db.query(AnchorBatch).filter(AnchorBatch.batch_id == batch_id).first()
+        tree = open_tree(batch_id)
+        batches.append({
+            "batch_id": batch_id,
+            "merkle_root": batch.merkle_root,
+            "leaf_count": batch.leaf_count,
+            "anchored_at": batch.anchored_at,
+            **epoch_proof(db, batch),
+            "leaves": [{"event_hash": row.event_hash, "leaf_index": row.leaf_index} for row in group],
+            "nodes": [
+                {"level": level, "index": index, "hash": node}
+                for level, index, node in tree.multiproof(row.leaf_index for row in group)
+            ]
+        })
+    
+    return {
+        "batches": batches,
+        "unanchored": [event_hash for event_hash in wanted if event_hash not in found]
+    }
+
+def migrate_legacy_proofs():
+    """
+    Convert rows of the old per-event JSON proof table (renamed to
+    anchor_proofs_legacy by init_db) into tree files plus compact rows.
+    Leaf order is the order the old rows were inserted in.
+    """
+    if "anchor_proofs_legacy" not in inspect(engine).get_table_names():
+        return
+    
+    db = SessionLocal()
+    try:
+        rows = db.execute(text(
+            "SELECT batch_id, event_hash, merkle_root, anchored_at "
+            "FROM anchor_proofs_legacy ORDER BY batch_id, id"
+        )).fetchall()
+        
+        for batch_id, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            leaves = [row[1] for row in group]
+            stored_root = group[0][2]
+            rebuilt_root = write_tree(batch_id, leaves)
+            if rebuilt_root != stored_root:
+                logger.warning("Legacy batch %s: rebuilt root %s != stored %s", batch_id, rebuilt_root, stored_root)
+            
+            anchored_at = group[0][3]
+            if isinstance(anchored_at, str):
+                anchored_at = datetime.fromisoformat(anchored_at)
+            db.add(AnchorBatch(
+                batch_id=batch_id,
+                merkle_root=stored_root,
+                leaf_count=len(leaves),
+                anchored_at=anchored_at
+            ))
+            db.add_all(
+                AnchorProof(event_hash=leaf, batch_id=batch_id, leaf_index=index)
+                for index, leaf in enumerate(leaves)
+            )
+        
+        db.execute(text("DROP TABLE anchor_proofs_legacy"))
+        db.commit()
+    finally:
+        db.close()
+
+def assign_legacy_epochs():
+    """
+    Batches anchored before namespaces each become a one-batch epoch in the
+    default namespace. A single-leaf tree's root is the leaf, so the epoch
+    root equals the batch root and existing anchors stay valid.
+    """
+    db = SessionLocal()
+    try:
+        batches = db.query(AnchorBatch).filter(AnchorBatch.epoch_id.is_(None)).order_by(AnchorBatch.anchored_at).all()
+        for batch in batches:
+            epoch_id = str(uuid.uuid4())
+            db.add(AnchorEpoch(
+                epoch_id=epoch_id,
+                epoch_root=write_tree(epoch_id, [batch.merkle_root]),
+                namespace_count=1,
+                event_count=batch.leaf_count,
+                anchored_at=batch.anchored_at
+            ))
+            db.flush()
+            batch.namespace = batch.namespace or DEFAULT_NAMESPACE
+            batch.epoch_id = epoch_id
+            batch.epoch_index = 0
+        db.commit()
+    finally:
+        db.close()
+
+def backfill_event_sequence(batch_size: int = 5000):
+    """
+    Give events created before sequencing a seq (in timestamp order) and a
+    namespace, copy anchoring state from anchor_proofs, and start each
+    namespace's watermark just below its first unanchored event.
+    """
+    db = SessionLocal()
+    try:
+        if not db.query(Event.event_hash).filter(Event.seq.is_(None)).first():
+            return
+        next_seq = (db.query(func.max(Event.seq)).scalar() or 0) + 1
+        while True:
+            rows = db.query(Event.event_hash, namespace_expression().label("namespace")).join(
+                Object, Object.object_id == Event.object_id
+            ).filter(Event.seq.is_(None)).order_by(Event.timestamp, Event.event_hash).limit(batch_size).all()
+            if not rows:
+                break
+            db.bulk_update_mappings(Event, [
+                {"event_hash": row.event_hash, "seq": next_seq + offset, "namespace": row.namespace}
+                for offset, row in enumerate(rows)
+            ])
+            next_seq += len(rows)
+            db.commit()
+        
+        db.execute(text(
+            "UPDATE events SET anchor_batch_id = "
+            "(SELECT batch_id FROM anchor_proofs WHERE anchor_proofs.event_hash = events.event_hash) "
+            "WHERE anchor_batch_id IS NULL"
+        ))
+        first_unanchored = func.min(case((Event.anchor_batch_id.is_(None), Event.seq)))
+        for namespace, unanchored, last in db.query(
+            Event.namespace, first_unanchored, func.max(Event.seq)
+        ).group_by(Event.namespace):
+            watermark = db.get(AnchorWatermark, namespace) or AnchorWatermark(namespace=namespace)
+            watermark.last_seq = unanchored - 1 if unanchored is not None else last
+            db.add(watermark)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,233 @@
+"""
+Anchor audit: rebuild every batch's Merkle root from the events recorded in the
+database and cross-check it against the anchor log, the batch row and the
+stored tree file that inclusion proofs are served from. Epoch roots are then
+rebuilt from their namespace batch roots.
+Batches stream from the database in leaf order; worker processes each take a
+share of the batches and read them directly.
+"""
+import multiprocessing
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import AnchorEpoch, AnchorBatch, AnchorProof
+from app.merkle import MerkleRootBuilder
+from app.anchor_trees import MerkleTreeFile, build_levels, tree_path
+from app.anchor import load_anchors, ANCHOR_FILE
+
+AUDIT_WORKERS = int(os.getenv("ANCHOR_AUDIT_WORKERS", str(os.cpu_count() or 4)))
+# Most problems listed in a report (counts are always complete)
+MAX_REPORTED_PROBLEMS = 100
+
+# (batch_id, leaves, stored_root, log_root, log_hashes)
+BatchTask = Tuple[str, List[str], Optional[str], Optional[str], Optional[List[str]]]
+# (low, high) bounds on batch_id, either open
+Partition = Tuple[Optional[str], Optional[str]]
+
+def _rebuild_root(leaves: List[str]) -> str:
+    builder = MerkleRootBuilder()
+    for leaf in leaves:
+        builder.add(leaf)
+    return builder.root()
+
+def _audit_tree_file(batch_id: str, leaves: List[str], root: str, check_proofs: bool) -> List[str]:
+    """Compare the stored tree file (the source of every served proof) with the rebuilt tree."""
+    try:
+        tree = MerkleTreeFile(tree_path(batch_id))
+    except FileNotFoundError:
+        return ["tree file is missing"]
+    except (ValueError, struct.error) as e:
+        return [f"tree file is unreadable: {e}"]
+
+    try:
+        if tree.leaf_count != len(leaves):
+            return [f"tree file has {tree.leaf_count} leaves, database has {len(leaves)}"]
+        if tree.root != root:
+            return [f"tree file root {tree.root} != rebuilt root {root}"]
+        if check_proofs:
+            levels = build_levels([bytes.fromhex(leaf) for leaf in leaves])
+            bad = [level for level, nodes in enumerate(levels) if tree.level_bytes(level) != nodes]
+            if bad:
+                return [f"tree file nodes differ from the rebuilt tree at level(s) {bad}; proofs would be wrong"]
+        return []
+    finally:
+        tree.close()
+
+def audit_batch(task: BatchTask, check_proofs: bool = True) -> List[str]:
+    """All disagreements for one batch; an empty list means every source agrees."""
+    batch_id, leaves, stored_root, log_root, log_hashes = task
+    problems = []
+
+    if not leaves:
+        # Only the anchor log (or a batch row) knows this batch
+        problems.append("batch has no event positions in the database")
+        if log_hashes and _rebuild_root(log_hashes) != log_root:
+            problems.append("anchor log root does not match its own event hashes")
+        return problems
+
+    root = _rebuild_root(leaves)
+    if log_root is None:
+        problems.append("batch is in the database but missing from the anchor log")
+    else:
+        if root != log_root:
+            problems.append(f"rebuilt root {root} != anchor log root {log_root}")
+        if log_hashes is not None and log_hashes != leaves:
+            problems.append(
+                f"event hashes differ between database ({len(leaves)}) and anchor log ({len(log_hashes)})"
+            )
+
+    if stored_root is None:
+        problems.append("anchor_batches row is missing")
+    elif stored_root != root:
+        problems.append(f"stored batch root {stored_root} != rebuilt root {root}")
+
+    problems.extend(_audit_tree_file(batch_id, leaves, root, check_proofs))
+    return problems
+
+# Batches are split between workers by batch_id range (UUIDs start with a hex digit);
+# the ranges are contiguous, so every batch_id falls in exactly one
+_HEX_RANGES = [(c, chr(ord(c) + 1)) for c in "0123456789abcdef"]
+PARTITIONS = [(None, "0")] + _HEX_RANGES[:10] + [(":", "a")] + _HEX_RANGES[10:] + [("g", None)]
+
+_anchor_log_cache: Tuple[float, Dict[str, dict]] = (0.0, {})
+
+def _anchor_log() -> Dict[str, dict]:
+    """Anchor log keyed by batch_id, parsed once per process while the file is unchanged."""
+    global _anchor_log_cache
+    mtime = ANCHOR_FILE.stat().st_mtime if ANCHOR_FILE.exists() else 0.0
+    if _anchor_log_cache[0] != mtime or not _anchor_log_cache[1]:
+        _anchor_log_cache = (mtime, {anchor["batch_id"]: anchor for anchor in load_anchors()})
+    return _anchor_log_cache[1]
+
+def _in_partition(batch_id: str, partition: Partition) -> bool:
+    low, high = partition
+    return (low is None or batch_id >= low) and (high is None or batch_id < high)
+
+def stream_batches(db: Session, anchors: Dict[str, dict], partition: Partition) -> Iterator[BatchTask]:
+    """Every batch of a partition in the database (in leaf order), then those with no event rows."""
+    low, high = partition
+    query = db.query(
+        AnchorProof.batch_id, AnchorProof.event_hash, AnchorBatch.merkle_root
+    ).outerjoin(AnchorBatch, AnchorBatch.batch_id == AnchorProof.batch_id)
+    # Range filters keep this a scan of the (batch_id, leaf_index) index
+    if low is not None:
+        query = query.filter(AnchorProof.batch_id >= low)
+    if high is not None:
+        query = query.filter(AnchorProof.batch_id < high)
+    rows = query.order_by(AnchorProof.batch_id, AnchorProof.leaf_index).yield_per(10000)
+
+    seen = set()
+    for batch_id, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        seen.add(batch_id)
+        anchor = anchors.get(batch_id)
+        yield (
+            batch_id,
+            [row[1] for row in group],
+            group[0][2],
+            anchor["merkle_root"] if anchor else None,
+            anchor.get("event_hashes") if anchor else None,
+        )
+
+    batch_rows = db.query(AnchorBatch.batch_id)
+    if low is not None:
+        batch_rows = batch_rows.filter(AnchorBatch.batch_id >= low)
+    if high is not None:
+        batch_rows = batch_rows.filter(AnchorBatch.batch_id < high)
+    orphans = {batch_id for (batch_id,) in batch_rows if batch_id not in seen}
+    orphans.update(batch_id for batch_id in anchors if batch_id not in seen and _in_partition(batch_id, partition))
+    for batch_id in sorted(orphans):
+        anchor = anchors.get(batch_id)
+        yield (
+            batch_id, [], None,
+            anchor["merkle_root"] if anchor else None,
+            anchor.get("event_hashes") if anchor else None,
+        )
+
+def audit_partition(partition: Partition, check_proofs: bool = True) -> dict:
+    """
+    Audit one partition with its own database session, so workers stream rows
+    themselves instead of receiving them from the parent.
+    """
+    result = {"batches": 0, "events": 0, "inconsistent_batches": 0, "problems": []}
+    anchors = _anchor_log()
+    db = SessionLocal()
+    try:
+        for task in stream_batches(db, anchors, partition):
+            problems = audit_batch(task, check_proofs)
+            result["batches"] += 1
+            result["events"] += len(task[1]) or len(task[4] or [])
+            if problems:
+                result["inconsistent_batches"] += 1
+                if len(result["problems"]) < MAX_REPORTED_PROBLEMS:
+                    result["problems"].append({"batch_id": task[0], "problems": problems})
+    finally:
+        db.close()
+    return result
+
+def audit_epochs(check_proofs: bool = True) -> dict:
+    """Rebuild every epoch root from its batch roots and check the epoch tree file."""
+    result = {"epochs": 0, "inconsistent_epochs": 0, "problems": []}
+    db = SessionLocal()
+    try:
+        rows = db.query(AnchorEpoch.epoch_id, AnchorEpoch.epoch_root, AnchorBatch.epoch_index, AnchorBatch.merkle_root).outerjoin(
+            AnchorBatch, AnchorBatch.epoch_id == AnchorEpoch.epoch_id
+        ).order_by(AnchorEpoch.epoch_id, AnchorBatch.epoch_index).yield_per(10000)
+        for epoch_id, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            epoch_root = group[0][1]
+            roots = [row[3] for row in group if row[3] is not None]
+            problems = []
+            if not roots:
+                problems.append("epoch has no batches")
+            elif [row[2] for row in group] != list(range(len(group))):
+                problems.append("batch positions in the epoch are not contiguous")
+            else:
+                rebuilt = _rebuild_root(roots)
+                if rebuilt != epoch_root:
+                    problems.append(f"rebuilt epoch root {rebuilt} != stored {epoch_root}")
+                problems.extend(_audit_tree_file(epoch_id, roots, rebuilt, check_proofs))
+            result["epochs"] += 1
+            if problems:
+                result["inconsistent_epochs"] += 1
+                if len(result["problems"]) < MAX_REPORTED_PROBLEMS:
+                    result["problems"].append({"epoch_id": epoch_id, "problems": problems})
+    finally:
+        db.close()
+    return result
+
+def audit_anchors(workers: int = AUDIT_WORKERS, check_proofs: bool = True) -> dict:
+    """Audit every anchored batch. Returns counts, throughput and the problems found."""
+    started = time.perf_counter()
+    if workers <= 1:
+        results = [audit_partition(partition, check_proofs) for partition in PARTITIONS]
+    else:
+        # spawn: the API process has threads, which fork does not copy safely
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(PARTITIONS)), mp_context=context) as pool:
+            results = list(pool.map(audit_partition, PARTITIONS, [check_proofs] * len(PARTITIONS)))
+
+    batches = sum(r["batches"] for r in results)
+    events = sum(r["events"] for r in results)
+    inconsistent = sum(r["inconsistent_batches"] for r in results)
+    epochs = audit_epochs(check_proofs)
+    elapsed = time.perf_counter() - started
+    return {
+        "batches": batches,
+        "events": events,
+        "consistent_batches": batches - inconsistent,
+        "inconsistent_batches": inconsistent,
+        "epochs": epochs["epochs"],
+        "inconsistent_epochs": epochs["inconsistent_epochs"],
+        "workers": max(1, workers),
+        "proofs_checked": check_proofs,
+        "elapsed_seconds": round(elapsed, 3),
+        "batches_per_second": round(batches / elapsed, 1) if elapsed else None,
+        "events_per_second": round(events / elapsed, 1) if elapsed else None,
+        "problems": ([p for r in results for p in r["problems"]] + epochs["problems"])[:MAX_REPORTED_PROBLEMS],
+    }
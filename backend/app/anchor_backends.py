@@ -0,0 +1,231 @@
+"""
+Anchoring backends: where batch roots are published for third parties to check.
+A backend accepts a root and returns a receipt (tx_id), then reports how many
+confirmations that receipt has. External chains plug in by implementing
+AnchorBackend; two local backends ship:
+
+- json: appends to data/anchor_submissions.json, confirmed immediately
+- ledger: a hash-chained append-only file with simulated confirmation latency,
+  standing in for a real chain while throughput and latency are tuned
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.db import DATA_DIR
+from app.crypto import canonical_json
+
+ANCHOR_BACKEND = os.getenv("ANCHOR_BACKEND", "json")
+# Local ledger tuning: one block per LEDGER_BLOCK_SECONDS, submissions wait in a mempool until then
+LEDGER_PATH = Path(os.getenv("LEDGER_PATH", str(DATA_DIR / "ledger.jsonl")))
+LEDGER_BLOCK_SECONDS = float(os.getenv("LEDGER_BLOCK_SECONDS", "2"))
+# Fraction of submissions rejected, to exercise retries
+LEDGER_FAILURE_RATE = float(os.getenv("LEDGER_FAILURE_RATE", "0"))
+
+class AnchorBackendError(Exception):
+    """A submission or status query failed; the caller may retry."""
+
+class AnchorBackend(ABC):
+    """Publishes roots somewhere outside the archive."""
+    name = "base"
+    # Confirmations after which a submission is treated as final
+    required_confirmations = 1
+
+    @abstractmethod
+    async def submit(self, root_hex: str, metadata: Dict) -> str:
+        """Publish a root. Returns the backend's receipt id."""
+
+    @abstractmethod
+    async def confirmations(self, tx_id: str) -> int:
+        """Confirmations the receipt has so far (0 = not yet included)."""
+
+    async def knows(self, tx_id: str) -> bool:
+        """Whether the backend still has the receipt, e.g. after a restart. Durable backends always do."""
+        return True
+
+    async def wait_confirmed(self, tx_id: str, timeout: float, poll_seconds: float = 0.5) -> bool:
+        """Poll until the receipt reaches required_confirmations or timeout passes."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if await self.confirmations(tx_id) >= self.required_confirmations:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_seconds)
+
+class JsonFileBackend(AnchorBackend):
+    """Local JSON log of submitted roots; a submission counts as confirmed once written."""
+    name = "json"
+
+    def __init__(self, path: Path = DATA_DIR / "anchor_submissions.json"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, record: Dict):
+        with self._lock:
+            records = json.loads(self.path.read_text()) if self.path.exists() else []
+            records.append(record)
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(records, indent=2))
+            os.replace(tmp, self.path)
+
+    async def submit(self, root_hex: str, metadata: Dict) -> str:
+        tx_id = str(uuid.uuid4())
+        await asyncio.to_thread(self._append, {
+            "tx_id": tx_id, "root": root_hex, "submitted_at": time.time(), **metadata
+        })
+        return tx_id
+
+    async def confirmations(self, tx_id: str) -> int:
+        return 1
+
+class LocalLedgerBackend(AnchorBackend):
+    """
+    Hash-chained ledger in a JSON-lines file. Submissions wait in memory until the
+    next block is sealed (at most every block_seconds), so a restart loses any
+    not sealed yet; each block commits to its predecessor's hash, so rewriting
+    history breaks every later block. Confirmations grow by one per block
+    interval after inclusion, as on a chain. Blocks sealed by another process
+    (the worker holding the submitter lock) are picked up from the file.
+    """
+    name = "ledger"
+
+    def __init__(
+        self,
+        path: Path = LEDGER_PATH,
+        block_seconds: float = LEDGER_BLOCK_SECONDS,
+        failure_rate: float = LEDGER_FAILURE_RATE,
+        required_confirmations: int = 1
+    ):
+        self.path = path
+        self.block_seconds = block_seconds
+        self.failure_rate = failure_rate
+        self.required_confirmations = required_confirmations
+        self._lock = threading.Lock()
+        self._mempool: List[Dict] = []
+        self._included: Dict[str, float] = {}  # tx_id -> sealed_at of its block
+        self._height = -1
+        self._tip = "0" * 64
+        self._read_offset = 0  # Bytes of the ledger file already applied
+        self._last_seal = time.time()
+        self._catch_up()
+
+    def _catch_up(self):
+        """Apply blocks appended to the file since the last read (called under the lock, or from __init__)."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._read_offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._read_offset)
+            data = f.read(size - self._read_offset)
+        # A block still being written is picked up on the next read
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            block = json.loads(line)
+            self._height, self._tip = block["height"], block["block_hash"]
+            for tx in block["txs"]:
+                self._included[tx["tx_id"]] = block["sealed_at"]
+        self._read_offset += end
+
+    @staticmethod
+    def block_hash(block: Dict) -> str:
+        body = {k: v for k, v in block.items() if k != "block_hash"}
+        return hashlib.sha256(canonical_json(body)).hexdigest()
+
+    def _seal_if_due(self):
+        """Seal the mempool into a block once block_seconds have passed (called under the lock)."""
+        now = time.time()
+        if now - self._last_seal < self.block_seconds:
+            return
+        self._last_seal = now
+        if not self._mempool:
+            return  # idle intervals are not written out
+        self._catch_up()
+        block = {
+            "height": self._height + 1,
+            "prev_block_hash": self._tip,
+            "sealed_at": now,
+            "txs": self._mempool,
+        }
+        block["block_hash"] = self.block_hash(block)
+        with open(self.path, "ab") as f:
+            f.write((json.dumps(block) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self._read_offset = f.tell()
+        for tx in self._mempool:
+            self._included[tx["tx_id"]] = now
+        self._height, self._tip, self._mempool = block["height"], block["block_hash"], []
+
+    def _enqueue(self, tx: Dict):
+        with self._lock:
+            self._mempool.append(tx)
+            self._seal_if_due()
+
+    def _sealed_at(self, tx_id: str) -> Optional[float]:
+        with self._lock:
+            self._seal_if_due()
+            self._catch_up()
+            return self._included.get(tx_id)
+
+    def _holds(self, tx_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            return tx_id in self._included or any(tx["tx_id"] == tx_id for tx in self._mempool)
+
+    async def submit(self, root_hex: str, metadata: Dict) -> str:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise AnchorBackendError("ledger rejected the submission (simulated)")
+        tx_id = str(uuid.uuid4())
+        # Sealing writes and fsyncs the ledger file, so it runs off the event loop
+        await asyncio.to_thread(self._enqueue, {"tx_id": tx_id, "root": root_hex, **metadata})
+        return tx_id
+
+    async def knows(self, tx_id: str) -> bool:
+        return await asyncio.to_thread(self._holds, tx_id)
+
+    async def confirmations(self, tx_id: str) -> int:
+        sealed_at = await asyncio.to_thread(self._sealed_at, tx_id)
+        if sealed_at is None:
+            return 0
+        if self.block_seconds <= 0:
+            return self.required_confirmations
+        # The simulated chain keeps producing a block per interval after inclusion
+        return 1 + int((time.time() - sealed_at) / self.block_seconds)
+
+    def verify_chain(self) -> Optional[str]:
+        """None if every block links to its predecessor and hashes correctly, else the first problem."""
+        tip = "0" * 64
+        if not self.path.exists():
+            return None
+        with open(self.path) as f:
+            for height, line in enumerate(l for l in f if l.strip()):
+                block = json.loads(line)
+                if block["height"] != height or block["prev_block_hash"] != tip:
+                    return f"block {height} does not link to its predecessor"
+                if self.block_hash(block) != block["block_hash"]:
+                    return f"block {height} hash mismatch"
+                tip = block["block_hash"]
+        return None
+
+BACKENDS = {
+    JsonFileBackend.name: JsonFileBackend,
+    LocalLedgerBackend.name: LocalLedgerBackend,
+}
+
+def get_backend(name: str = ANCHOR_BACKEND) -> AnchorBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown anchor backend {name!r}; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,241 @@
+"""
+Asynchronous anchoring: epoch roots queue up after POST /anchor and are sent to
+the configured backend in the background, many at a time as one root-of-roots.
+Submission state lives in anchor_submissions, so a restart resumes unfinished
+submissions, and epochs whose submission fails are queued again.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.db import SessionLocal, DATA_DIR
+from app.models import AnchorEpoch, AnchorSubmission
+from app.merkle import MerkleRootBuilder
+from app.anchor_trees import write_tree
+from app.anchor_backends import AnchorBackend, AnchorBackendError, get_backend
+
+try:
+    import fcntl
+except ImportError:  # Windows: single worker assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_SUBMITTER_ENABLED = os.getenv("ANCHOR_SUBMITTER_ENABLED", "1") == "1"
+# How often queued epoch roots are collected into a submission
+ANCHOR_SUBMIT_INTERVAL = float(os.getenv("ANCHOR_SUBMIT_INTERVAL_SECONDS", "5"))
+ANCHOR_MAX_ROOTS = int(os.getenv("ANCHOR_MAX_ROOTS_PER_SUBMISSION", "64"))
+ANCHOR_MAX_IN_FLIGHT = int(os.getenv("ANCHOR_MAX_IN_FLIGHT", "4"))
+ANCHOR_SUBMIT_RETRIES = int(os.getenv("ANCHOR_SUBMIT_RETRIES", "5"))
+ANCHOR_CONFIRM_TIMEOUT = float(os.getenv("ANCHOR_CONFIRM_TIMEOUT_SECONDS", "600"))
+
+LOCK_PATH = DATA_DIR / "anchor_submitter.lock"
+
+def root_of_roots(roots: List[str]) -> str:
+    builder = MerkleRootBuilder()
+    for root in roots:
+        builder.add(root)
+    return builder.root()
+
+async def submit_with_retry(
+    backend: AnchorBackend,
+    root: str,
+    metadata: Dict,
+    retries: int = ANCHOR_SUBMIT_RETRIES,
+    base_delay: float = 1.0
+) -> Tuple[str, int]:
+    """Submit with exponential backoff. Returns (tx_id, attempts); raises after the last attempt."""
+    for attempt in range(1, retries + 1):
+        try:
+            return await backend.submit(root, metadata), attempt
+        except Exception:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(base_delay * 2 ** (attempt - 1))
+
+async def anchor_roots(
+    backend: AnchorBackend,
+    roots: List[str],
+    retries: int = ANCHOR_SUBMIT_RETRIES,
+    confirm_timeout: float = ANCHOR_CONFIRM_TIMEOUT,
+    retry_delay: float = 1.0
+) -> Dict:
+    """
+    Submit a root-of-roots over roots and wait for it to confirm, without the
+    database. Used by the benchmark; the submitter runs the same steps with state.
+    """
+    root = root_of_roots(roots)
+    tx_id, attempts = await submit_with_retry(backend, root, {"root_count": len(roots)}, retries, retry_delay)
+    confirmed = await backend.wait_confirmed(tx_id, confirm_timeout, poll_seconds=min(0.5, confirm_timeout / 10))
+    return {"root_of_roots": root, "tx_id": tx_id, "attempts": attempts, "confirmed": confirmed}
+
+class AnchorSubmitter:
+    """Background task that submits queued epoch roots; one process per data directory holds the lock."""
+
+    def __init__(self, backend: Optional[AnchorBackend] = None):
+        self.backend = backend or get_backend()
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._in_flight: set = set()
+        self._lock_file = None
+        self.stats = {"submitted": 0, "confirmed": 0, "failed": 0, "retries": 0}
+
+    def claim_epochs(self) -> Optional[str]:
+        """Group up to ANCHOR_MAX_ROOTS queued epochs into a new pending submission."""
+        db = SessionLocal()
+        try:
+            epochs = db.query(AnchorEpoch).filter(
+                AnchorEpoch.submission_id.is_(None)
+            ).order_by(AnchorEpoch.anchored_at).limit(ANCHOR_MAX_ROOTS).all()
+            if not epochs:
+                return None
+            submission_id = str(uuid.uuid4())
+            # Stored like a batch tree, so each epoch's path to the submitted root can be served
+            root = write_tree(submission_id, [epoch.epoch_root for epoch in epochs])
+            db.add(AnchorSubmission(
+                submission_id=submission_id,
+                backend=self.backend.name,
+                root_of_roots=root,
+                root_count=len(epochs),
+                status="pending",
+                attempts=0,
+                created_at=datetime.now(timezone.utc)
+            ))
+            db.flush()
+            for index, epoch in enumerate(epochs):
+                epoch.submission_id = submission_id
+                epoch.submission_index = index
+            db.commit()
+            return submission_id
+        finally:
+            db.close()
+
+    def _update(self, submission_id: str, release: bool = False, **fields):
+        db = SessionLocal()
+        try:
+            submission = db.query(AnchorSubmission).filter(AnchorSubmission.submission_id == submission_id).first()
+            for key, value in fields.items():
+                setattr(submission, key, value)
+            if release:
+                # Failed submissions give their epochs back to the queue
+                db.query(AnchorEpoch).filter(AnchorEpoch.submission_id == submission_id).update(
+                    {AnchorEpoch.submission_id: None, AnchorEpoch.submission_index: None},
+                    synchronize_session=False
+                )
+            db.commit()
+            return submission
+        finally:
+            db.close()
+
+    def _load(self, submission_id: str) -> AnchorSubmission:
+        db = SessionLocal()
+        try:
+            return db.query(AnchorSubmission).filter(AnchorSubmission.submission_id == submission_id).first()
+        finally:
+            db.close()
+
+    async def process(self, submission_id: str):
+        """Drive one submission to confirmed (or failed)."""
+        submission = await asyncio.to_thread(self._load, submission_id)
+        tx_id = submission.tx_id
+        try:
+            if submission.status == "pending" or not tx_id:
+                tx_id, attempts = await submit_with_retry(
+                    self.backend, submission.root_of_roots,
+                    {"submission_id": submission_id, "root_count": submission.root_count}
+                )
+                self.stats["submitted"] += 1
+                self.stats["retries"] += attempts - 1
+                await asyncio.to_thread(
+                    self._update, submission_id, status="submitted", tx_id=tx_id,
+                    attempts=submission.attempts + attempts, submitted_at=datetime.now(timezone.utc)
+                )
+            elif not await self.backend.knows(tx_id):
+                # Resumed after a restart that lost the receipt: requeue now instead of waiting out the timeout
+                raise AnchorBackendError(f"{self.backend.name} no longer has receipt {tx_id}")
+            if await self.backend.wait_confirmed(tx_id, ANCHOR_CONFIRM_TIMEOUT):
+                self.stats["confirmed"] += 1
+                await asyncio.to_thread(
+                    self._update, submission_id, status="confirmed", confirmed_at=datetime.now(timezone.utc)
+                )
+                return
+            error = f"not confirmed within {ANCHOR_CONFIRM_TIMEOUT:.0f}s"
+        except asyncio.CancelledError:
+            raise  # shutdown: resumed from its stored state on next start
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        self.stats["failed"] += 1
+        await asyncio.to_thread(self._update, submission_id, release=True, status="failed", last_error=error)
+
+    def _spawn(self, submission_id: str):
+        task = asyncio.create_task(self.process(submission_id))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+        task.add_done_callback(lambda _: self._wake.set())
+
+    def _unfinished(self) -> List[str]:
+        db = SessionLocal()
+        try:
+            return [row[0] for row in db.query(AnchorSubmission.submission_id).filter(
+                AnchorSubmission.status.in_(["pending", "submitted"])
+            ).order_by(AnchorSubmission.created_at)]
+        finally:
+            db.close()
+
+    async def _run(self):
+        for submission_id in await asyncio.to_thread(self._unfinished):
+            self._spawn(submission_id)
+        while True:
+            while len(self._in_flight) < ANCHOR_MAX_IN_FLIGHT:
+                try:
+                    submission_id = await asyncio.to_thread(self.claim_epochs)
+                except Exception:
+                    logger.exception("Could not queue anchor submission")
+                    submission_id = None
+                if not submission_id:
+                    break
+                self._spawn(submission_id)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), ANCHOR_SUBMIT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def wake(self):
+        """Collect queued roots now instead of at the next interval."""
+        self._wake.set()
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        self._lock_file = open(LOCK_PATH, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            # Another worker process is already submitting
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def start(self) -> bool:
+        """Start submitting in the running event loop unless another process already is."""
+        if self._task or not self._acquire_lock():
+            return False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        tasks = [task for task in [self._task, *self._in_flight] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+anchor_submitter = AnchorSubmitter()
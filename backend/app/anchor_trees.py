@@ -0,0 +1,146 @@
+"""
+Per-batch Merkle trees stored once as compact binary files.
+Every level is kept (leaves first, root last) as raw 32-byte nodes, so an
+inclusion proof is a handful of reads at computed offsets from an mmap.
+Tree shape matches merkle.merkle_root: odd levels duplicate their last node.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Tuple
+from app.merkle import multiproof_positions
+
+BASE_DIR = Path(__file__).parent.parent
+TREE_DIR = BASE_DIR / "data" / "trees"
+TREE_DIR.mkdir(parents=True, exist_ok=True)
+
+MAGIC = b"PMT1"
+HEADER = struct.Struct(">4sI")  # magic, leaf count
+NODE_SIZE = 32
+
+# Open tree files kept mapped for repeated proof requests
+OPEN_TREE_CACHE = int(os.getenv("ANCHOR_TREE_CACHE", "256"))
+
+def level_sizes(leaf_count: int) -> List[int]:
+    """Node count of each level, leaves first."""
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+def tree_path(batch_id: str) -> Path:
+    return TREE_DIR / f"{batch_id}.bin"
+
+def build_levels(leaves: List[bytes]) -> List[bytes]:
+    """All levels of the tree as concatenated node bytes, leaves first."""
+    levels = [b"".join(leaves)]
+    while len(levels[-1]) > NODE_SIZE:
+        level = levels[-1]
+        if len(level) // NODE_SIZE % 2:
+            level += level[-NODE_SIZE:]
+        levels.append(b"".join(
+            hashlib.sha256(level[i:i + 2 * NODE_SIZE]).digest()
+            for i in range(0, len(level), 2 * NODE_SIZE)
+        ))
+    return levels
+
+def write_tree(batch_id: str, leaf_hashes: List[str]) -> str:
+    """Build and persist a batch's tree (O(n) hashes, one file). Returns the root hex."""
+    if not leaf_hashes:
+        raise ValueError("Cannot build a tree for an empty batch")
+    levels = build_levels([bytes.fromhex(h) for h in leaf_hashes])
+
+    path = tree_path(batch_id)
+    tmp = path.with_suffix(".bin.tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(leaf_hashes)))
+        for level in levels:
+            f.write(level)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return levels[-1].hex()
+
+class MerkleTreeFile:
+    """Read-only mmap view of a stored batch tree."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.leaf_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a Merkle tree file: {path}")
+
+        self.sizes = level_sizes(self.leaf_count)
+        self._offsets = []
+        offset = HEADER.size
+        for size in self.sizes:
+            self._offsets.append(offset)
+            offset += size * NODE_SIZE
+        if len(self._mm) != offset:
+            self._mm.close()
+            raise ValueError(f"Truncated Merkle tree file: {path}")
+
+    def node(self, level: int, index: int) -> bytes:
+        start = self._offsets[level] + index * NODE_SIZE
+        return self._mm[start:start + NODE_SIZE]
+
+    def level_bytes(self, level: int) -> bytes:
+        start = self._offsets[level]
+        return self._mm[start:start + self.sizes[level] * NODE_SIZE]
+
+    @property
+    def root(self) -> str:
+        return self.node(len(self.sizes) - 1, 0).hex()
+
+    def leaf(self, index: int) -> str:
+        return self.node(0, index).hex()
+
+    def proof(self, index: int) -> List[str]:
+        """Sibling hashes from leaf to root, same format as merkle.merkle_proof."""
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(f"Leaf index {index} out of range for {self.leaf_count} leaves")
+        path = []
+        for level, size in enumerate(self.sizes[:-1]):
+            sibling = index ^ 1
+            # Odd level: the last node is paired with itself
+            path.append(self.node(level, sibling if sibling < size else index).hex())
+            index //= 2
+        return path
+
+    def multiproof(self, leaf_indices: Iterable[int]) -> List[Tuple[int, int, str]]:
+        """(level, index, hash) of the deduplicated nodes proving several leaves at once."""
+        leaf_indices = list(leaf_indices)
+        for index in leaf_indices:
+            if not 0 <= index < self.leaf_count:
+                raise IndexError(f"Leaf index {index} out of range for {self.leaf_count} leaves")
+        return [
+            (level, index, self.node(level, index).hex())
+            for level, index in multiproof_positions(self.leaf_count, leaf_indices)
+        ]
+
+    def close(self):
+        self._mm.close()
+
+_open_trees: "OrderedDict[str, MerkleTreeFile]" = OrderedDict()
+_open_trees_lock = threading.Lock()
+
+def open_tree(batch_id: str) -> MerkleTreeFile:
+    """Mapped tree for a batch (LRU-cached). Raises FileNotFoundError if not stored."""
+    with _open_trees_lock:
+        tree = _open_trees.get(batch_id)
+        if tree is not None:
+            _open_trees.move_to_end(batch_id)
+            return tree
+    tree = MerkleTreeFile(tree_path(batch_id))
+    with _open_trees_lock:
+        _open_trees[batch_id] = tree
+        while len(_open_trees) > OPEN_TREE_CACHE:
+            # Evicted maps are left to the garbage collector; a reader may still hold one
+            _open_trees.popitem(last=False)
+    return tree
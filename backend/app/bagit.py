@@ -0,0 +1,298 @@
+"""
+BagIt (RFC 8493) export of objects for deposit into other repositories.
+Each object gets data/objects/<object_id>/ with its original, derivatives,
+provenance JSON-LD and anchor proofs. Originals are listed in
+manifest-sha256.txt under their stored CID instead of being rehashed; other
+stored files are hashed in a thread pool, and generated files are hashed as
+they are written. Files are hardlinked (or reflinked) into the bag when the
+filesystem allows, and copied otherwise. Progress is journaled per object, so
+an interrupted export resumes after the last finished object.
+"""
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models import Event, Object
+from app.media import DERIVATIVES, original_path, derivative_path, stored_path
+from app.fixity import hash_stored_file
+from app.jsonld import object_document
+from app.anchor import get_batch_proofs
+
+BAGIT_SOURCE_ORGANIZATION = os.getenv("BAGIT_SOURCE_ORGANIZATION", "Kathmandu Cultural Heritage Archive")
+BAGIT_HASH_WORKERS = int(os.getenv("BAGIT_HASH_WORKERS", str(min(8, os.cpu_count() or 4))))
+JOURNAL_NAME = "export-journal.jsonl"
+
+# ioctl request for a copy-on-write clone (Linux, e.g. btrfs and XFS)
+FICLONE = 0x40049409
+
+def place_file(source: Path, target: Path, allow_link: bool = True) -> str:
+    """Put source at target: hardlink, else reflink, else copy. Returns which was used."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if allow_link:
+        try:
+            os.link(source, target)
+            return "link"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            target.unlink(missing_ok=True)
+    shutil.copyfile(source, target)
+    return "copy"
+
+def write_hashed(target: Path, content: bytes) -> Tuple[str, int]:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(content)
+    return hashlib.sha256(content).hexdigest(), len(content)
+
+def _manifest_path(path: str) -> str:
+    """Percent-encode the characters RFC 8493 does not allow raw in manifest paths."""
+    return path.replace("%", "%25").replace("\r", "%0D").replace("\n", "%0A")
+
+def _is_sha256(value: Optional[str]) -> bool:
+    return bool(value) and len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+def _isoformat(value) -> str:
+    """JSON encoding for the datetimes in anchor proofs."""
+    return value.isoformat()
+
+def _write_tag_file(bag_dir: Path, name: str, text: str) -> str:
+    """Write a tag file atomically and return its sha256."""
+    content = text.encode("utf-8")
+    tmp = bag_dir / f".{name}.tmp"
+    tmp.write_bytes(content)
+    os.replace(tmp, bag_dir / name)
+    return hashlib.sha256(content).hexdigest()
+
+def selected_objects(db: Session, collection: str, batch_size: int = 100, after: str = "") -> Iterator[Object]:
+    """Objects of a collection ("public", "all" or an owner's user id) in object_id order, after a key."""
+    while True:
+        query = db.query(Object).filter(Object.object_id > after)
+        if collection == "public":
+            query = query.filter(Object.visibility == "public")
+        elif collection != "all":
+            query = query.filter(Object.owner_id == collection, Object.visibility == "public")
+        objects = query.order_by(Object.object_id).limit(batch_size).all()
+        if not objects:
+            return
+        yield from objects
+        after = objects[-1].object_id
+
+class BagExporter:
+    """
+    Writes objects into one bag, or a numbered series of bags no larger than
+    max_bag_bytes (objects are never split), recording progress in a journal.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        name: str,
+        collection: str,
+        max_bag_bytes: Optional[int] = None,
+        workers: int = BAGIT_HASH_WORKERS,
+        allow_link: bool = True,
+        rehash_originals: bool = False
+    ):
+        self.output_dir = output_dir
+        self.name = name
+        self.collection = collection
+        self.max_bag_bytes = max_bag_bytes
+        self.allow_link = allow_link
+        self.rehash_originals = rehash_originals
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.journal_path = output_dir / JOURNAL_NAME
+        self.bag_number = 1
+        self.entries: List[Tuple[str, str, int]] = []  # (data path, sha256, size) in the current bag
+        self.bag_bytes = 0  # Payload bytes placed in the current bag, including objects still being hashed
+        self.last_object_id = ""
+        self.completed_bags: List[int] = []
+        self.resumed_from: Optional[Tuple[str, int]] = None  # (last object id, bag number) when resuming a journal
+        self.missing_files: List[Tuple[str, Path]] = []  # (object id, stored file) skipped because the file is gone
+        self.stats = {"objects": 0, "files": 0, "bytes": 0, "hashed": 0, "link": 0, "reflink": 0, "copy": 0, "missing": 0}
+
+    def bag_dir(self, number: int) -> Path:
+        return self.output_dir / (f"{self.name}-{number:04d}" if self.max_bag_bytes else self.name)
+
+    def _journal(self, record: Dict):
+        self._journal_file.write(json.dumps(record) + "\n")
+        self._journal_file.flush()
+
+    def _load_journal(self) -> bool:
+        """Restore progress from an existing journal. Returns False if there was none."""
+        if not self.journal_path.exists():
+            return False
+        with open(self.journal_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return False
+        header = json.loads(lines[0])
+        if header.get("options") != self._options():
+            raise ValueError(f"{self.journal_path} was written with different options: {header.get('options')}")
+        valid = 1
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn last line from an interruption; drop it so appends start clean
+                with open(self.journal_path, "w", encoding="utf-8") as f:
+                    f.write("".join(kept + "\n" for kept in lines[:valid]))
+                break
+            valid += 1
+            if record.get("complete"):
+                self.completed_bags.append(record["bag"])
+                self.bag_number = record["bag"] + 1
+                self.entries = []
+            else:
+                if record["bag"] != self.bag_number:
+                    self.bag_number, self.entries = record["bag"], []
+                self.entries.extend(tuple(entry) for entry in record["files"])
+                self.last_object_id = record["object_id"]
+        self.bag_bytes = sum(size for _, _, size in self.entries)
+        return True
+
+    def _options(self) -> Dict:
+        return {"name": self.name, "collection": self.collection, "max_bag_bytes": self.max_bag_bytes}
+
+    def _plan_object(self, db: Session, obj: Object) -> Tuple[List, List]:
+        """
+        An object's files: stored ones as (source, bag-relative path, sha256 if
+        already known) and generated ones as (bag-relative path, content).
+        """
+        stored = []
+        original = original_path(obj)
+        if original:
+            # The CID is the SHA-256 of the original, kept current by fixity scrubbing
+            known = obj.cid_sha256 if _is_sha256(obj.cid_sha256) and not self.rehash_originals else None
+            stored.append((original, f"original/{original.name}", known))
+            stored += [
+                (path, f"derivatives/{path.name}", None)
+                for path in (derivative_path(original, d) for d in DERIVATIVES) if path.is_file()
+            ]
+        try:
+            related = json.loads(obj.related_photos_json) if obj.related_photos_json else []
+        except (TypeError, ValueError):
+            related = []
+        for relative in related:
+            path = stored_path(relative)
+            stored.append((path, f"related/{path.name}", None))
+            stored += [
+                (derived, f"related/derivatives/{derived.name}", None)
+                for derived in (derivative_path(path, d) for d in DERIVATIVES) if derived.is_file()
+            ]
+        missing = [source for source, _, _ in stored if not source.is_file()]
+        for source in missing:
+            self.stats["missing"] += 1
+            self.missing_files.append((obj.object_id, source))
+        stored = [entry for entry in stored if entry[0] not in missing]
+
+        event_hashes = [row[0] for row in db.query(Event.event_hash).filter(
+            Event.object_id == obj.object_id
+        ).order_by(Event.chain_height)]
+        generated = [
+            ("provenance.jsonld", object_document(db, obj).encode("utf-8")),
+            ("anchor-proofs.json", json.dumps(get_batch_proofs(db, event_hashes), indent=2, default=_isoformat).encode("utf-8")),
+        ]
+        return stored, generated
+
+    def _place_object(self, obj: Object, stored: List, generated: List) -> List:
+        """Put an object's files into the current bag; returns (data path, sha256 or future, size) for each."""
+        object_dir = self.bag_dir(self.bag_number) / "data" / "objects" / obj.object_id
+        # Left over from an interrupted run (not journaled): redo it
+        if object_dir.exists():
+            shutil.rmtree(object_dir)
+        prefix = f"data/objects/{obj.object_id}"
+        files = []
+        for source, relative, sha256 in stored:
+            self.stats[place_file(source, object_dir / relative, self.allow_link)] += 1
+            if sha256 is None:
+                sha256 = self.pool.submit(hash_stored_file, source)
+                self.stats["hashed"] += 1
+            files.append((f"{prefix}/{relative}", sha256, source.stat().st_size))
+        for relative, content in generated:
+            sha256, size = write_hashed(object_dir / relative, content)
+            files.append((f"{prefix}/{relative}", sha256, size))
+        return files
+
+    def _finish_object(self, obj: Object, files: List):
+        resolved = [(path, sha if isinstance(sha, str) else sha.result(), size) for path, sha, size in files]
+        self.entries.extend(resolved)
+        self.last_object_id = obj.object_id
+        self._journal({"bag": self.bag_number, "object_id": obj.object_id, "files": resolved})
+        self.stats["objects"] += 1
+        self.stats["files"] += len(resolved)
+        self.stats["bytes"] += sum(size for _, _, size in resolved)
+
+    def finalize_bag(self):
+        """Write the current bag's tag files and mark it complete."""
+        bag_dir = self.bag_dir(self.bag_number)
+        (bag_dir / "data").mkdir(parents=True, exist_ok=True)
+        manifest = "".join(f"{sha}  {_manifest_path(path)}\n" for path, sha, _ in self.entries)
+        info = [
+            f"Source-Organization: {BAGIT_SOURCE_ORGANIZATION}",
+            f"Bagging-Date: {date.today().isoformat()}",
+            f"Payload-Oxum: {sum(size for _, _, size in self.entries)}.{len(self.entries)}",
+            f"External-Description: {self.collection} objects with provenance and anchor proofs",
+        ]
+        if self.max_bag_bytes:
+            # The total is not known until the last bag is written
+            info += [f"Bag-Group-Identifier: {self.name}", f"Bag-Count: {self.bag_number} of ?"]
+        tags = {
+            "bagit.txt": _write_tag_file(bag_dir, "bagit.txt", "BagIt-Version: 1.0\nTag-File-Character-Encoding: UTF-8\n"),
+            "bag-info.txt": _write_tag_file(bag_dir, "bag-info.txt", "\n".join(info) + "\n"),
+            "manifest-sha256.txt": _write_tag_file(bag_dir, "manifest-sha256.txt", manifest),
+        }
+        _write_tag_file(bag_dir, "tagmanifest-sha256.txt", "".join(f"{sha}  {name}\n" for name, sha in tags.items()))
+        self._journal({"bag": self.bag_number, "complete": True})
+        os.fsync(self._journal_file.fileno())
+        self.completed_bags.append(self.bag_number)
+        self.bag_number += 1
+        self.entries = []
+        self.bag_bytes = 0
+
+    def run(self, db: Session, batch_size: int = 100) -> List[Path]:
+        """Export (or resume exporting) the collection. Returns the bag directories."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        resumed = self._load_journal()
+        self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        try:
+            if not resumed:
+                self._journal({"options": self._options()})
+            elif self.last_object_id:
+                self.resumed_from = (self.last_object_id, self.bag_number)
+            pending = []
+            for obj in selected_objects(db, self.collection, batch_size, self.last_object_id):
+                stored, generated = self._plan_object(db, obj)
+                size = sum(source.stat().st_size for source, _, _ in stored) + sum(len(c) for _, c in generated)
+                if self.max_bag_bytes and self.bag_bytes and self.bag_bytes + size > self.max_bag_bytes:
+                    # Objects are never split: close this bag and start the next
+                    self._drain(pending)
+                    pending = []
+                    self.finalize_bag()
+                pending.append((obj, self._place_object(obj, stored, generated)))
+                self.bag_bytes += size
+                if len(pending) >= batch_size:
+                    self._drain(pending)
+                    pending = []
+            self._drain(pending)
+            if self.entries or not self.completed_bags:
+                self.finalize_bag()
+            return [self.bag_dir(number) for number in self.completed_bags]
+        finally:
+            self._journal_file.close()
+            self.pool.shutdown()
+
+    def _drain(self, pending: List):
+        for obj, files in pending:
+            self._finish_object(obj, files)
@@ -0,0 +1,120 @@
+"""
+Chunk-tree content identifiers: fixed-size chunk hashes under a Merkle root.
+Chunks hash in parallel threads (hashlib releases the GIL), and a byte range
+can be checked against the stored chunk hashes without reading the whole file.
+"""
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+from app.merkle import merkle_root
+
+BASE_DIR = Path(__file__).parent.parent
+CHUNK_DIR = BASE_DIR / "data" / "chunks"
+CHUNK_DIR.mkdir(parents=True, exist_ok=True)
+
+CHUNK_SIZE = int(os.getenv("CHUNK_TREE_CHUNK_MB", "4")) * 1024 * 1024
+HASH_WORKERS = int(os.getenv("CHUNK_HASH_WORKERS", str(os.cpu_count() or 4)))
+
+DIGEST_SIZE = 32
+
+def hash_chunks(
+    path: Path,
+    chunk_size: int = CHUNK_SIZE,
+    first: int = 0,
+    last: Optional[int] = None,
+    workers: int = HASH_WORKERS
+) -> List[bytes]:
+    """SHA-256 of chunks first..last (inclusive, default all) of a file, hashed in parallel."""
+    size = path.stat().st_size
+    if size == 0:
+        return [hashlib.sha256(b"").digest()]
+
+    count = (size + chunk_size - 1) // chunk_size
+    last = count - 1 if last is None else min(last, count - 1)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            def digest(index: int) -> bytes:
+                start = index * chunk_size
+                return hashlib.sha256(view[start:start + chunk_size]).digest()
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(digest, range(first, last + 1)))
+        finally:
+            view.release()
+
+def chunk_tree_root(leaves: List[bytes]) -> str:
+    """Merkle root (hex) over chunk hashes; equals the flat CID for single-chunk files."""
+    return merkle_root([leaf.hex() for leaf in leaves])
+
+def build_chunk_tree(path: Path, chunk_size: int = CHUNK_SIZE) -> Tuple[str, List[bytes]]:
+    """Hash every chunk of a file. Returns (root_hex, leaves)."""
+    leaves = hash_chunks(path, chunk_size)
+    return chunk_tree_root(leaves), leaves
+
+def _leaves_path(cid: str) -> Path:
+    return CHUNK_DIR / f"{cid}.sha256"
+
+def save_leaves(cid: str, leaves: List[bytes]):
+    """Store chunk hashes as raw concatenated 32-byte digests."""
+    _leaves_path(cid).write_bytes(b"".join(leaves))
+
+def load_leaves(cid: str) -> Optional[List[bytes]]:
+    """Stored chunk hashes for a CID, or None if it has no chunk tree."""
+    path = _leaves_path(cid)
+    if not path.exists():
+        return None
+    data = path.read_bytes()
+    return [data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)]
+
+def verify_range(
+    path: Path,
+    cid: str,
+    chunk_root: str,
+    chunk_size: int,
+    start: int = 0,
+    end: Optional[int] = None
+) -> dict:
+    """
+    Fixity report for bytes start..end (inclusive, default whole file) of a stored object.
+    Only the chunks covering the range are read; the stored chunk hashes are
+    first checked against chunk_root so they can be trusted. Raises ValueError
+    if start is not within the file.
+    """
+    leaves = load_leaves(cid)
+    if leaves is None:
+        raise FileNotFoundError(f"No chunk hashes stored for {cid}")
+    leaves_valid = chunk_tree_root(leaves) == chunk_root
+
+    size = path.stat().st_size
+    if start >= max(size, 1):
+        # Nothing would be hashed, and an empty check must not read as valid
+        raise ValueError(f"start {start} is beyond the end of the {size}-byte file")
+    end = size - 1 if end is None else min(end, size - 1)
+    first = start // chunk_size
+    last = max(first, end // chunk_size)
+
+    actual = hash_chunks(path, chunk_size, first, last)
+    corrupt = [
+        {
+            "chunk": index,
+            "start": index * chunk_size,
+            "end": min((index + 1) * chunk_size, size) - 1,
+        }
+        for index, digest in zip(range(first, last + 1), actual)
+        if index >= len(leaves) or digest != leaves[index]
+    ]
+
+    return {
+        "chunk_size": chunk_size,
+        "chunk_count": len(leaves),
+        "chunks_checked": len(actual),
+        "range": [start, end],
+        "chunk_hashes_match_root": leaves_valid,
+        "corrupt_chunks": corrupt,
+        "valid": leaves_valid and not corrupt,
+    }
@@ -0,0 +1,124 @@
+"""
+In-memory Bloom filter over known CIDs for fast "not stored" answers.
+The database stays the authority: a Bloom hit is confirmed by an indexed
+query, a miss is answered without touching the database.
+"""
+import math
+import os
+import threading
+import time
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import Object
+
+# Expected number of CIDs before the filter is resized, and target false-positive rate
+CID_BLOOM_CAPACITY = int(os.getenv("CID_BLOOM_CAPACITY", "1000000"))
+CID_BLOOM_FP_RATE = float(os.getenv("CID_BLOOM_FP_RATE", "0.001"))
+# Other worker processes insert objects too; pull their CIDs at most this often
+CID_INDEX_REFRESH_SECONDS = float(os.getenv("CID_INDEX_REFRESH_SECONDS", "5"))
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter keyed by SHA-256 hex CIDs.
+    The CID is already a uniform hash, so the k probe positions are taken from
+    it by double hashing instead of hashing again.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(64, int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, cid: str):
+        try:
+            h1 = int(cid[:16], 16)
+            h2 = int(cid[16:32], 16) | 1
+        except ValueError:
+            # Not a hex digest; fold the string into the same scheme
+            h1 = hash(cid) & 0xFFFFFFFFFFFFFFFF
+            h2 = hash(cid[::-1]) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, cid: str):
+        for pos in self._positions(cid):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, cid: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(cid))
+
+class CidIndex:
+    """Process-wide Bloom filter of object CIDs, loaded from the database on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = None
+        self._refreshed_at = 0.0
+
+    def _load(self, db: Session):
+        capacity = max(CID_BLOOM_CAPACITY, db.query(Object).count() * 2)
+        bloom = BloomFilter(capacity, CID_BLOOM_FP_RATE)
+        watermark = None
+        for cid, created_at in db.query(Object.cid_sha256, Object.created_at).yield_per(10000):
+            if cid:
+                bloom.add(cid)
+            if created_at and (watermark is None or created_at > watermark):
+                watermark = created_at
+        self._bloom = bloom
+        self._watermark = watermark
+        self._refreshed_at = time.monotonic()
+
+    def _refresh(self, db: Session):
+        """Pick up objects created by other processes since the last load."""
+        query = db.query(Object.cid_sha256, Object.created_at)
+        if self._watermark is not None:
+            # >= so rows sharing the watermark's (second-resolution) timestamp are not missed
+            query = query.filter(Object.created_at >= self._watermark)
+        for cid, created_at in query:
+            if cid:
+                self._bloom.add(cid)
+            if created_at and (self._watermark is None or created_at > self._watermark):
+                self._watermark = created_at
+        self._refreshed_at = time.monotonic()
+
+    def _sync(self, db: Session):
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._load(db)
+            elif time.monotonic() - self._refreshed_at > CID_INDEX_REFRESH_SECONDS:
+                self._refresh(db)
+
+    def add(self, cid: str):
+        """Record a CID written by this process (no-op until the filter is loaded)."""
+        with self._lock:
+            if self._bloom is not None and cid:
+                self._bloom.add(cid)
+
+    def might_contain(self, db: Session, cid: str) -> bool:
+        """False means the CID is certainly not stored (as of the last refresh)."""
+        self._sync(db)
+        return cid in self._bloom
+
+    def lookup(self, db: Session, cids: Iterable[str]) -> dict:
+        """Map each stored CID to its object_id (None for private objects); CIDs not stored are left out."""
+        self._sync(db)
+        candidates = list({cid for cid in cids if cid in self._bloom})
+        found = {}
+        # Keep IN lists well under SQLite's bound-parameter limit
+        for i in range(0, len(candidates), 500):
+            rows = db.query(Object.cid_sha256, Object.object_id, Object.visibility).filter(
+                Object.cid_sha256.in_(candidates[i:i + 500])
+            )
+            found.update((cid, object_id if visibility == "public" else None) for cid, object_id, visibility in rows)
+        return found
+
+cid_index = CidIndex()
+
+@event.listens_for(Object, "after_insert")
+@event.listens_for(Object, "after_update")
+def _track_object_cid(mapper, connection, target: Object):
+    cid_index.add(target.cid_sha256)
@@ -7,6 +7,7 @@ from typing import Dict, Any
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
 from cryptography.hazmat.primitives import serialization
 import base64
+from app.keys import derived_keys, private_key as cached_private_key, public_key as cached_public_key
 
 def compute_cid(file_bytes: bytes) -> str:
     """Compute SHA-256 Content Identifier (CID) from file bytes."""
@@ -21,7 +22,10 @@ def canonical_json(data: Dict[str, Any]) -> bytes:
 
 def hash_event(event_data: Dict[str, Any]) -> str:
     """Compute SHA-256 hash of canonical event payload."""
-    canonical = canonical_json(event_data)
+    return hash_canonical(canonical_json(event_data))
+
+def hash_canonical(canonical: bytes) -> str:
+    """SHA-256 of already canonicalized event bytes (the event hash)."""
     return hashlib.sha256(canonical).hexdigest()
 
 def generate_keypair() -> tuple[str, str]:
@@ -51,35 +55,21 @@ def derive_keypair_from_seed(seed: str) -> tuple[str, str]:
     Derive a deterministic Ed25519 keypair from a seed string.
     For MVP: allows consistent keypair generation for the same actor.
     NOT cryptographically secure for production - use proper key derivation.
+    Derived keys are cached in the key registry (app.keys).
     """
-    # Use SHA-256 to derive 32 bytes from seed
-    seed_bytes = hashlib.sha256(seed.encode('utf-8')).digest()
-    
-    # Ed25519 private keys are 32 bytes
-    private_key = Ed25519PrivateKey.from_private_bytes(seed_bytes)
-    public_key = private_key.public_key()
-    
-    priv_b64 = base64.b64encode(seed_bytes).decode('ascii')
-    pub_b64 = base64.b64encode(
-        public_key.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
-    ).decode('ascii')
-    
-    return priv_b64, pub_b64
+    keys = derived_keys(seed)
+    return keys.private_key_b64, keys.public_key_b64
 
 def sign_event(event_data: Dict[str, Any], private_key_b64: str) -> str:
     """
     Sign canonical event payload with Ed25519 private key.
     Returns base64-encoded signature.
     """
-    private_key_bytes = base64.b64decode(private_key_b64)
-    private_key = Ed25519PrivateKey.from_private_bytes(private_key_bytes)
-    
-    canonical = canonical_json(event_data)
-    signature = private_key.sign(canonical)
-    
+    return sign_canonical(canonical_json(event_data), private_key_b64)
+
+def sign_canonical(canonical: bytes, private_key_b64: str) -> str:
+    """Sign already canonicalized event bytes; returns base64-encoded signature."""
+    signature = cached_private_key(private_key_b64).sign(canonical)
     return base64.b64encode(signature).decode('ascii')
 
 def verify_signature(event_data: Dict[str, Any], signature_b64: str, public_key_b64: str) -> bool:
@@ -88,9 +78,25 @@ def verify_signature(event_data: Dict[str, Any], signature_b64: str, public_key_
     Returns True if valid, False otherwise.
     """
     try:
-        public_key_bytes = base64.b64decode(public_key_b64)
-        public_key = Ed25519PublicKey.from_public_bytes(public_key_bytes)
-        
+        public_key = cached_public_key(public_key_b64)
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).error(f"Invalid public key: {e}")
+        return False
+    return verify_signature_with_key(event_data, signature_b64, public_key)
+
+def verify_canonical(canonical: bytes, signature_b64: str, public_key: Ed25519PublicKey) -> bool:
+    """Verify a signature over stored canonical event bytes, without re-serializing."""
+    try:
+        public_key.verify(base64.b64decode(signature_b64), canonical)
+        return True
+    except Exception:
+        return False
+
+def verify_signature_with_key(event_data: Dict[str, Any], signature_b64: str, public_key: Ed25519PublicKey) -> bool:
+    """verify_signature for an already parsed public key (see app.keys)."""
+    canonical = b''
+    try:
         signature = base64.b64decode(signature_b64)
         canonical = canonical_json(event_data)
         
@@ -3,7 +3,7 @@ Database connection and initialization.
 """
 import os
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Database path
@@ -32,8 +32,53 @@ def get_db():
 def init_db():
     """Initialize database tables."""
     from app.models import (
-        Actor, Object, Event, AnchorProof,
-        User, ContributionRequest, Submission, ActivityLog
+        Actor, Object, Event, AnchorWatermark, AnchorEpoch, AnchorBatch, AnchorProof, AnchorSubmission,
+        User, ContributionRequest, Submission, ActivityLog, FixityCheck, LogTreeHead, VerificationCheckpoint,
+        ObjectState, StateSnapshot
     )
+    from app.anchor import migrate_legacy_proofs, assign_legacy_epochs, backfill_event_sequence
+    from app.provenance import backfill_signed_envelopes
+    from app.ancestry import backfill_chain_heights
+    _set_aside_legacy_anchor_proofs()
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    migrate_legacy_proofs()
+    assign_legacy_epochs()
+    backfill_event_sequence()
+    backfill_signed_envelopes()
+    backfill_chain_heights()
+
+def _set_aside_legacy_anchor_proofs():
+    """
+    anchor_proofs used to hold a JSON proof per event. Rename that table so the
+    compact one can be created; anchor.migrate_legacy_proofs converts its rows.
+    """
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    if "anchor_proofs" not in tables or "anchor_proofs_legacy" in tables:
+        return
+    if "proof_path" not in {c["name"] for c in inspector.get_columns("anchor_proofs")}:
+        return
+    indexes = [index["name"] for index in inspector.get_indexes("anchor_proofs")]
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE anchor_proofs RENAME TO anchor_proofs_legacy"))
+        # Index names are global in SQLite; free them for the new table
+        for name in indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+def _add_missing_columns():
+    """
+    Bring existing tables up to the current models: add new (nullable) columns
+    and any indexes declared on them. create_all only handles missing tables.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
@@ -0,0 +1,263 @@
+"""
+Background fixity scrubbing: rehash stored originals against their CIDs on a
+rolling schedule, under a bytes-per-second budget so live traffic keeps the disk.
+Progress lives in the fixity_checks table, so a restart resumes with the
+objects checked least recently.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.db import SessionLocal, DATA_DIR
+from app.models import Object, FixityCheck
+from app.media import original_path
+from app.chunks import load_leaves, verify_range
+from app.utils import log_activity
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single worker assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIXITY_SCRUB_ENABLED = os.getenv("FIXITY_SCRUB_ENABLED", "1") == "1"
+# Read budget shared by all scrub workers; 0 disables throttling
+FIXITY_MB_PER_SECOND = float(os.getenv("FIXITY_MB_PER_SECOND", "50"))
+FIXITY_WORKERS = int(os.getenv("FIXITY_WORKERS", "2"))
+# Each object is rechecked once this long after its last check
+FIXITY_INTERVAL_DAYS = float(os.getenv("FIXITY_INTERVAL_DAYS", "30"))
+FIXITY_BATCH_SIZE = int(os.getenv("FIXITY_BATCH_SIZE", "64"))
+# Sleep between polls when nothing is due
+FIXITY_IDLE_SECONDS = float(os.getenv("FIXITY_IDLE_SECONDS", "300"))
+
+READ_SLICE = 8 * 1024 * 1024
+LOCK_PATH = DATA_DIR / "fixity.lock"
+
+class ByteRateLimiter:
+    """Token bucket over bytes, shared between threads. Allows one second of burst."""
+
+    def __init__(self, bytes_per_second: float):
+        self.rate = bytes_per_second
+        self._lock = threading.Lock()
+        self._available_at = time.monotonic()
+
+    def consume(self, count: int, stop: Optional[threading.Event] = None):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now - 1.0, self._available_at)
+            self._available_at = start + count / self.rate
+            wait = self._available_at - now - 1.0
+        if wait > 0:
+            if stop:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+
+def hash_stored_file(
+    path: Path,
+    limiter: Optional[ByteRateLimiter] = None,
+    stop: Optional[threading.Event] = None
+) -> Optional[str]:
+    """
+    SHA-256 of a file read through mmap in throttled slices.
+    Pages are dropped from the page cache afterwards so a scrub pass doesn't
+    evict the working set of live requests. Returns None if interrupted.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mm)
+                try:
+                    for start in range(0, size, READ_SLICE):
+                        if stop and stop.is_set():
+                            return None
+                        block = view[start:start + READ_SLICE]
+                        if limiter:
+                            limiter.consume(len(block), stop)
+                        hasher.update(block)
+                        block.release()
+                finally:
+                    view.release()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return hasher.hexdigest()
+
+def check_object(
+    obj: Object,
+    limiter: Optional[ByteRateLimiter] = None,
+    stop: Optional[threading.Event] = None
+) -> Optional[dict]:
+    """Fixity result for one object: {status, size_bytes, detail}. None if interrupted."""
+    path = original_path(obj)
+    if not path or not path.is_file():
+        return {"status": "missing", "size_bytes": None, "detail": {"path": str(path) if path else None}}
+
+    size = path.stat().st_size
+    actual = hash_stored_file(path, limiter, stop)
+    if actual is None:
+        return None
+    if actual == obj.cid_sha256:
+        return {"status": "ok", "size_bytes": size, "detail": None}
+
+    detail = {"path": str(path), "actual_cid": actual}
+    # Localise the damage when the object has a chunk tree (only on failure, so rare)
+    if obj.chunk_root_sha256 and load_leaves(obj.cid_sha256) is not None:
+        report = verify_range(path, obj.cid_sha256, obj.chunk_root_sha256, obj.chunk_size)
+        detail["corrupt_chunks"] = report["corrupt_chunks"]
+        detail["chunk_hashes_match_root"] = report["chunk_hashes_match_root"]
+    return {"status": "corrupt", "size_bytes": size, "detail": detail}
+
+def record_result(db: Session, obj: Object, result: dict) -> FixityCheck:
+    """Store a check result; newly failing objects are written to the activity log for admins."""
+    record = db.query(FixityCheck).filter(FixityCheck.object_id == obj.object_id).first()
+    previous = record.status if record else None
+    if not record:
+        record = FixityCheck(object_id=obj.object_id)
+        db.add(record)
+
+    record.status = result["status"]
+    record.checked_at = datetime.now(timezone.utc)
+    record.size_bytes = result["size_bytes"]
+    record.detail_json = json.dumps(result["detail"]) if result["detail"] else None
+    db.commit()
+
+    if result["status"] != "ok" and previous != result["status"]:
+        log_activity(
+            db=db,
+            user_id=None,
+            action_type=f"fixity_{result['status']}",
+            resource_type="object",
+            resource_id=obj.object_id,
+            details=result["detail"]
+        )
+    return record
+
+def due_objects(
+    db: Session,
+    limit: int,
+    interval_days: float = FIXITY_INTERVAL_DAYS,
+    before: Optional[datetime] = None
+):
+    """
+    Objects never checked, then those checked longest ago, up to limit.
+    before caps the cutoff so a single pass doesn't revisit what it just checked.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=interval_days)
+    if before is not None:
+        cutoff = min(cutoff, before)
+    return db.query(Object).outerjoin(
+        FixityCheck, FixityCheck.object_id == Object.object_id
+    ).filter(
+        Object.cid_sha256 != "",
+        or_(FixityCheck.checked_at.is_(None), FixityCheck.checked_at < cutoff)
+    ).order_by(FixityCheck.checked_at.asc().nullsfirst()).limit(limit).all()
+
+class FixityScrubber:
+    """Rolling scrub in a daemon thread; one process per data directory holds the lock."""
+
+    def __init__(
+        self,
+        mb_per_second: float = FIXITY_MB_PER_SECOND,
+        workers: int = FIXITY_WORKERS,
+        interval_days: float = FIXITY_INTERVAL_DAYS
+    ):
+        self.limiter = ByteRateLimiter(mb_per_second * 1024 * 1024)
+        self.workers = workers
+        self.interval_days = interval_days
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.stats = {
+            "running": False,
+            "checked": 0,
+            "bytes": 0,
+            "failures": 0,
+            "started_at": None,
+            "last_check_at": None,
+        }
+
+    def run_batch(self, db: Session, limit: int = FIXITY_BATCH_SIZE, before: Optional[datetime] = None) -> int:
+        """Check up to limit due objects in parallel. Returns how many were checked."""
+        objects = due_objects(db, limit, self.interval_days, before)
+        if not objects:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda o: check_object(o, self.limiter, self._stop), objects))
+
+        checked = 0
+        for obj, result in zip(objects, results):
+            if result is None:
+                continue  # interrupted by shutdown; stays due
+            record_result(db, obj, result)
+            checked += 1
+            self.stats["checked"] += 1
+            self.stats["bytes"] += result["size_bytes"] or 0
+            self.stats["failures"] += result["status"] != "ok"
+            self.stats["last_check_at"] = datetime.now(timezone.utc).isoformat()
+        return checked
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                checked = self.run_batch(db)
+            except Exception:
+                logger.exception("Fixity scrub batch failed")
+                checked = 0
+            finally:
+                db.close()
+            if not checked:
+                self._stop.wait(FIXITY_IDLE_SECONDS)
+        self.stats["running"] = False
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        self._lock_file = open(LOCK_PATH, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            # Another worker process is already scrubbing
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def start(self) -> bool:
+        """Start scrubbing in the background unless another process already is."""
+        if self._thread or not self._acquire_lock():
+            return False
+        self._stop.clear()
+        self.stats["running"] = True
+        self.stats["started_at"] = datetime.now(timezone.utc).isoformat()
+        self._thread = threading.Thread(target=self._run, name="fixity-scrubber", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+fixity_scrubber = FixityScrubber()
@@ -0,0 +1,151 @@
+"""
+Image admission control: header inspection, pixel/byte budgets and bounded decode concurrency.
+"""
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Admission limits (override via environment)
+ALLOWED_FORMATS = frozenset(
+    os.getenv("IMAGE_ALLOWED_FORMATS", "JPEG,PNG,WEBP,TIFF,GIF").upper().split(",")
+)
+MAX_IMAGE_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(200 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "150000000"))
+DECODE_MEMORY_BUDGET = int(os.getenv("IMAGE_DECODE_MEMORY_MB", "1024")) * 1024 * 1024
+MAX_CONCURRENT_DECODES = int(os.getenv("IMAGE_MAX_CONCURRENT_DECODES", "4"))
+DECODE_WAIT_SECONDS = float(os.getenv("IMAGE_DECODE_WAIT_SECONDS", "30"))
+
+# Pillow refuses anything over twice this limit when parsing the header
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+class ImageRejected(HTTPException):
+    """Raised when an image is refused or deferred; detail says why."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int | None = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        super().__init__(status_code=status_code, detail=reason, headers=headers)
+        self.reason = reason
+
+def _draft_scale(width: int, height: int, draft_edge: int) -> int:
+    """Reduction factor libjpeg draft mode will apply for a given target edge."""
+    scale = min(width // draft_edge, height // draft_edge)
+    for factor in (8, 4, 2):
+        if scale >= factor:
+            return factor
+    return 1
+
+def inspect_image(file_content: bytes, draft_edge: int | None = None) -> dict:
+    """
+    Parse only the image header and enforce format, byte and pixel budgets.
+    Returns format, size, mode and the estimated bytes needed to decode it.
+    """
+    if len(file_content) > MAX_IMAGE_BYTES:
+        raise ImageRejected(
+            413,
+            f"Image is {len(file_content) / 1e6:.1f} MB, over the "
+            f"{MAX_IMAGE_BYTES / 1e6:.0f} MB limit"
+        )
+
+    try:
+        with Image.open(io.BytesIO(file_content)) as img:
+            fmt, (width, height), mode = img.format, img.size, img.mode
+    except Image.DecompressionBombError:
+        raise ImageRejected(
+            413,
+            f"Image dimensions exceed the {MAX_IMAGE_PIXELS / 1e6:.0f} MP limit"
+        )
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ImageRejected(415, "File is not a recognised image")
+
+    if fmt not in ALLOWED_FORMATS:
+        raise ImageRejected(
+            415,
+            f"Image format {fmt} is not allowed (allowed: {', '.join(sorted(ALLOWED_FORMATS))})"
+        )
+
+    pixels = width * height
+    if pixels > MAX_IMAGE_PIXELS:
+        raise ImageRejected(
+            413,
+            f"Image is {width}x{height} ({pixels / 1e6:.1f} MP), over the "
+            f"{MAX_IMAGE_PIXELS / 1e6:.0f} MP limit"
+        )
+
+    # Pillow keeps multi-band images at 4 bytes per pixel; JPEGs decoded in
+    # draft mode only ever materialise the reduced raster.
+    scale = _draft_scale(width, height, draft_edge) if fmt == "JPEG" and draft_edge else 1
+    decode_bytes = (width // scale) * (height // scale) * 4
+
+    return {
+        "format": fmt,
+        "width": width,
+        "height": height,
+        "mode": mode,
+        "decode_bytes": decode_bytes,
+    }
+
+class DecodeBudget:
+    """
+    Semaphore weighted by estimated decode memory, with a cap on concurrent decodes.
+    A single image larger than the whole budget is admitted only when nothing else runs.
+    """
+
+    def __init__(self, capacity_bytes: int, max_concurrent: int):
+        self.capacity_bytes = capacity_bytes
+        self.max_concurrent = max_concurrent
+        self._in_use = 0
+        self._active = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, cost_bytes: int, timeout: float = DECODE_WAIT_SECONDS):
+        """Hold budget for one decode; raise ImageRejected (503) if none frees up in time."""
+        cost = min(cost_bytes, self.capacity_bytes)
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while (
+                self._active >= self.max_concurrent
+                or self._in_use + cost > self.capacity_bytes
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "Deferring image decode of %.0f MB: %d decodes using %.0f/%.0f MB",
+                        cost_bytes / 1e6, self._active, self._in_use / 1e6, self.capacity_bytes / 1e6
+                    )
+                    raise ImageRejected(
+                        503,
+                        "Image processing is at capacity; please retry shortly",
+                        retry_after=max(1, int(timeout))
+                    )
+                self._cond.wait(remaining)
+            self._in_use += cost
+            self._active += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= cost
+                self._active -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Current usage, for monitoring."""
+        with self._cond:
+            return {
+                "active_decodes": self._active,
+                "max_concurrent": self.max_concurrent,
+                "bytes_in_use": self._in_use,
+                "capacity_bytes": self.capacity_bytes,
+            }
+
+decode_budget = DecodeBudget(DECODE_MEMORY_BUDGET, MAX_CONCURRENT_DECODES)
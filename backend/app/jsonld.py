@@ -0,0 +1,158 @@
+"""
+Streaming JSON-LD export. Documents are written piece by piece: the object
+node first, then its prov:wasGeneratedBy events read in chain order through a
+keyset cursor. Stored payload JSON is spliced in as-is instead of being parsed
+and re-serialized. Memory stays flat whatever the chain or collection size.
+"""
+import json
+import zlib
+from typing import Iterable, Iterator, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import Event, Object
+from app.verification import stored_checkpoint, checkpoint_dict
+
+JSONLD_CONTEXT = {
+    "@version": 1.1,
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "premis": "http://www.loc.gov/premis/rdf/v1#",
+    "prov": "http://www.w3.org/ns/prov#",
+    "provenance": "urn:provenance:"
+}
+# Rows read per query
+EXPORT_CHUNK = 1000
+# Output is flushed to the client in pieces of about this size
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+def object_node(db: Session, obj: Object) -> dict:
+    """The object's JSON-LD node without its events."""
+    try:
+        bundle_manifest = json.loads(obj.bundle_manifest_json)
+    except (TypeError, ValueError):
+        bundle_manifest = {}
+    node = {
+        "@id": f"urn:object:{obj.object_id}",
+        "@type": "premis:Object",
+        "dc:identifier": obj.object_id,
+        "provenance:cid": obj.cid_sha256,
+        "dc:created": obj.created_at.isoformat() if obj.created_at else None,
+        "premis:objectCharacteristics": bundle_manifest.get("metadata", {}),
+    }
+    # Consumers can verify from here instead of from genesis
+    checkpoint = stored_checkpoint(db, obj.object_id)
+    if checkpoint:
+        node["provenance:verificationCheckpoint"] = {
+            "@id": f"urn:provenance:event:{checkpoint.event_hash}",
+            **checkpoint_dict(checkpoint)
+        }
+    return node
+
+def event_node_json(event: Event) -> str:
+    node = {
+        "@id": f"urn:provenance:event:{event.event_hash}",
+        "@type": f"provenance:{event.event_type}",
+        "prov:atTime": event.timestamp.isoformat(),
+        "prov:wasAttributedTo": {
+            "@id": f"urn:actor:{event.actor_id}",
+            "provenance:actorId": event.actor_id
+        },
+        "provenance:signature": event.signature_b64,
+    }
+    if event.prev_event_hash:
+        node["prov:wasInformedBy"] = {
+            "@id": f"urn:provenance:event:{event.prev_event_hash}"
+        }
+    # payload_json was written by json.dumps, so it can be embedded directly
+    return json.dumps(node)[:-1] + ', "provenance:payload": ' + (event.payload_json or "{}") + "}"
+
+def _object_parts(db: Session, obj: Object, context: bool) -> Iterator[str]:
+    head = object_node(db, obj)
+    if context:
+        head = {"@context": JSONLD_CONTEXT, **head}
+    yield json.dumps(head)[:-1] + ', "prov:wasGeneratedBy": ['
+    after = -1
+    first = True
+    while True:
+        events = db.query(Event).filter(
+            Event.object_id == obj.object_id, Event.chain_height > after
+        ).order_by(Event.chain_height).limit(EXPORT_CHUNK).all()
+        if not events:
+            break
+        for event in events:
+            yield ("" if first else ", ") + event_node_json(event)
+            first = False
+        after = events[-1].chain_height
+        db.expunge_all()
+    yield "]}"
+
+def object_document(db: Session, obj: Object) -> str:
+    """One object as a complete JSON-LD document string (for embedding, e.g. in OAI-PMH records)."""
+    return "".join(_object_parts(db, obj, context=True))
+
+def _buffered(parts: Iterable[str]) -> Iterator[bytes]:
+    """Join small pieces so the response is written in reasonably sized chunks."""
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_FLUSH_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+def stream_object(object_id: str) -> Iterator[bytes]:
+    """One object as a JSON-LD document. Uses its own session (the response outlives the request's)."""
+    db = SessionLocal()
+    try:
+        obj = db.query(Object).filter(Object.object_id == object_id).first()
+        yield from _buffered(_object_parts(db, obj, context=True))
+    finally:
+        db.close()
+
+def stream_collection(owner_id: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Every public object (optionally one owner's) as a single JSON-LD document,
+    {"@context": ..., "@graph": [object, ...]}, objects in object_id order.
+    """
+    db = SessionLocal()
+    try:
+        def parts() -> Iterator[str]:
+            yield '{"@context": ' + json.dumps(JSONLD_CONTEXT) + ', "@graph": ['
+            last_id = ""
+            first = True
+            while True:
+                query = db.query(Object).filter(Object.visibility == "public", Object.object_id > last_id)
+                if owner_id:
+                    query = query.filter(Object.owner_id == owner_id)
+                objects = query.order_by(Object.object_id).limit(EXPORT_CHUNK).all()
+                if not objects:
+                    break
+                last_id = objects[-1].object_id
+                for obj in objects:
+                    if not first:
+                        yield ", "
+                    first = False
+                    yield from _object_parts(db, obj, context=False)
+            yield "]}"
+        yield from _buffered(parts())
+    finally:
+        db.close()
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def jsonld_response(chunks: Iterable[bytes], accept_encoding: Optional[str], filename: str) -> StreamingResponse:
+    """Stream a JSON-LD document, gzipped when the client accepts it."""
+    headers = {"Content-Disposition": f'inline; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if "gzip" in (accept_encoding or "").lower():
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/ld+json", headers=headers)
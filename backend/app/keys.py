@@ -0,0 +1,121 @@
+"""
+Actor key registry: parsed Ed25519 key objects in a bounded LRU cache.
+Signing and verification look keys up here instead of decoding base64 and
+rebuilding (or re-deriving) the key on every call. Entries are keyed by the
+key material or seed; an actor's stored public key is cached per actor and
+dropped when Actor.pubkey_ed25519 changes.
+"""
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from cryptography.hazmat.primitives import serialization
+from sqlalchemy import event
+from app.models import Actor
+
+KEY_CACHE_SIZE = int(os.getenv("KEY_CACHE_SIZE", "4096"))
+
+class ActorKeys(NamedTuple):
+    private_key: Ed25519PrivateKey
+    public_key: Ed25519PublicKey
+    private_key_b64: str
+    public_key_b64: str
+
+class KeyCache:
+    """Thread-safe LRU map of parsed keys."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key: tuple, create: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Built outside the lock; two threads racing on a miss build the same value
+        value = create()
+        self.put(key, value)
+        return value
+
+    def put(self, key: tuple, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+key_cache = KeyCache(KEY_CACHE_SIZE)
+
+def _public_b64(public_key: Ed25519PublicKey) -> str:
+    return base64.b64encode(
+        public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+    ).decode('ascii')
+
+def private_key(private_key_b64: str) -> Ed25519PrivateKey:
+    return key_cache.get_or_create(
+        ("private", private_key_b64),
+        lambda: Ed25519PrivateKey.from_private_bytes(base64.b64decode(private_key_b64))
+    )
+
+def public_key(public_key_b64: str) -> Ed25519PublicKey:
+    return key_cache.get_or_create(
+        ("public", public_key_b64),
+        lambda: Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_b64))
+    )
+
+def derived_keys(seed: str) -> ActorKeys:
+    """Deterministic keypair for a seed string (SHA-256 of the seed is the private key)."""
+    def derive() -> ActorKeys:
+        seed_bytes = hashlib.sha256(seed.encode('utf-8')).digest()
+        priv = Ed25519PrivateKey.from_private_bytes(seed_bytes)
+        pub = priv.public_key()
+        keys = ActorKeys(priv, pub, base64.b64encode(seed_bytes).decode('ascii'), _public_b64(pub))
+        # Callers pass the b64 strings on to sign_event / verify_signature
+        key_cache.put(("private", keys.private_key_b64), priv)
+        key_cache.put(("public", keys.public_key_b64), pub)
+        return keys
+    return key_cache.get_or_create(("seed", seed), derive)
+
+def actor_keys(actor_id: str) -> ActorKeys:
+    """The keypair an actor signs with (MVP: derived from the actor_id)."""
+    return derived_keys(f"actor:{actor_id}")
+
+def actor_public_key(actor: Actor) -> Ed25519PublicKey:
+    """The actor's registered public key, cached until Actor.pubkey_ed25519 changes."""
+    stored_b64, key = key_cache.get_or_create(
+        ("actor", actor.actor_id),
+        lambda: (actor.pubkey_ed25519, public_key(actor.pubkey_ed25519))
+    )
+    if stored_b64 != actor.pubkey_ed25519:
+        # Changed by another process since it was cached
+        key = public_key(actor.pubkey_ed25519)
+        key_cache.put(("actor", actor.actor_id), (actor.pubkey_ed25519, key))
+    return key
+
+@event.listens_for(Actor.pubkey_ed25519, "set")
+def _forget_actor_key(target: Actor, value, oldvalue, initiator):
+    if value != oldvalue:
+        key_cache.discard(("actor", target.actor_id))
@@ -3,15 +3,22 @@ FastAPI main application entry point.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
-from app.db import init_db
+from app.db import init_db, SessionLocal
 from app.routes import router  # Original provenance routes
 from app.routes_auth import router as auth_router
 from app.routes_gallery import router as gallery_router
 from app.routes_contribute import router as contribute_router
 from app.routes_contributor import router as contributor_router
 from app.routes_admin import router as admin_router
+from app.routes_media import router as media_router
+from app.routes_uploads import router as uploads_router
+from app.routes_log import router as log_router
+from app.routes_export import router as export_router
+from app.routes_oai import router as oai_router
+from app.uploads import purge_expired
+from app.fixity import fixity_scrubber, FIXITY_SCRUB_ENABLED
+from app.translog import sync_log
+from app.anchor_submitter import anchor_submitter, ANCHOR_SUBMITTER_ENABLED
 
 app = FastAPI(
     title="Kathmandu Cultural Heritage Archive API",
@@ -26,6 +33,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Resumable uploads report progress in response headers
+    expose_headers=["Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires", "Upload-Ranges", "X-Object-Id"],
 )
 
 # Include routes
@@ -35,17 +44,33 @@ app.include_router(gallery_router)
 app.include_router(contribute_router)
 app.include_router(contributor_router)
 app.include_router(admin_router)
-
-# Serve uploaded images under /data/*
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
-app.mount("/data", StaticFiles(directory=str(DATA_DIR)), name="data")
+app.include_router(media_router)
+app.include_router(uploads_router)
+app.include_router(log_router)
+app.include_router(export_router)
+app.include_router(oai_router)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
     init_db()
+    purge_expired()
+    # Events created before the log existed (or left unlogged by a crash)
+    db = SessionLocal()
+    try:
+        sync_log(db)
+    finally:
+        db.close()
+    if FIXITY_SCRUB_ENABLED:
+        fixity_scrubber.start()
+    if ANCHOR_SUBMITTER_ENABLED:
+        anchor_submitter.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work."""
+    fixity_scrubber.stop()
+    await anchor_submitter.stop()
 
 @app.get("/")
 async def root():
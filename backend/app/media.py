@@ -0,0 +1,300 @@
+"""
+Media serving: path resolution by CID, byte ranges, zero-copy send and proxy offload.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import secrets
+import time
+from pathlib import Path, PureWindowsPath
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.auth import SECRET_KEY
+from app.models import Object
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+BINARY_DIR = DATA_DIR / "binaries"
+
+# Derivatives produced by utils.save_photo next to the original
+DERIVATIVES = ("small", "medium", "large")
+
+# Content-addressed responses never change, so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Proxy offload: "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd)
+MEDIA_OFFLOAD = os.getenv("MEDIA_OFFLOAD", "").lower()
+# nginx internal location that aliases the data directory, e.g. "/_protected_data"
+MEDIA_OFFLOAD_PREFIX = os.getenv("MEDIA_OFFLOAD_PREFIX", "/_protected_data").rstrip("/")
+
+MAX_RANGES = 16
+CHUNK_SIZE = 256 * 1024
+
+# Signed media URLs: HMAC key separate from the JWT key unless explicitly shared
+MEDIA_SIGNING_KEY = (
+    os.getenv("MEDIA_SIGNING_KEY", "").encode("utf-8")
+    or hmac.new(SECRET_KEY.encode("utf-8"), b"media-url-signing", hashlib.sha256).digest()
+)
+MEDIA_URL_TTL = int(os.getenv("MEDIA_URL_TTL_SECONDS", "3600"))
+PUBLIC_MEDIA_URL_TTL = int(os.getenv("PUBLIC_MEDIA_URL_TTL_SECONDS", "86400"))
+
+def stored_path(relative: str) -> Path:
+    """Resolve a stored relative path (possibly written on Windows) under BASE_DIR."""
+    return BASE_DIR.joinpath(*PureWindowsPath(relative).parts)
+
+def data_relative(relative: str) -> str:
+    """Normalise a stored path like 'data\\objects\\x\\original_x.jpg' to 'objects/x/original_x.jpg'."""
+    parts = PureWindowsPath(relative).parts
+    if parts and parts[0] == "data":
+        parts = parts[1:]
+    return "/".join(parts)
+
+def _media_signature(path: str, expires: int) -> str:
+    mac = hmac.new(MEDIA_SIGNING_KEY, f"{path}\n{expires}".encode("utf-8"), hashlib.sha256)
+    return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode("ascii")
+
+def signed_media_url(stored: Optional[str], ttl: int = MEDIA_URL_TTL) -> Optional[str]:
+    """
+    Mint a time-limited URL for a stored media path.
+    Expiry is rounded up to a ttl-sized window so repeated page loads reuse the
+    same URL (and browser cache) until the window rolls over.
+    """
+    if not stored:
+        return None
+    path = data_relative(stored)
+    expires = (int(time.time()) // ttl + 2) * ttl
+    sig = _media_signature(path, expires)
+    return f"/media/signed/{quote(path)}?exp={expires}&sig={sig}"
+
+def signed_media_urls(stored: Optional[List[str]], ttl: int = MEDIA_URL_TTL) -> Optional[List[str]]:
+    """signed_media_url over a list of stored paths."""
+    if not stored:
+        return None
+    return [signed_media_url(p, ttl) for p in stored]
+
+def verify_media_signature(path: str, expires: int, sig: str) -> bool:
+    """Check a signed media URL in constant time; no database access."""
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_media_signature(path, expires), sig)
+
+def resolve_data_path(path: str) -> Optional[Path]:
+    """Resolve a data-relative path, refusing anything that escapes the data directory."""
+    candidate = (DATA_DIR / path).resolve()
+    try:
+        candidate.relative_to(DATA_DIR.resolve())
+    except ValueError:
+        return None
+    return candidate
+
+def original_path(obj: Object) -> Optional[Path]:
+    """Locate the stored original for an object, or None if it has no file."""
+    try:
+        manifest = json.loads(obj.bundle_manifest_json)
+    except (TypeError, ValueError):
+        manifest = {}
+
+    # Objects from /ingest keep the upload under data/binaries
+    filename = manifest.get("filename")
+    if filename:
+        return BINARY_DIR / f"{obj.object_id}_{filename}"
+
+    # Gallery items keep it as original_<name> next to their derivatives
+    if obj.primary_photo_path:
+        return stored_path(obj.primary_photo_path)
+    return None
+
+def derivative_path(original: Path, derivative: str) -> Path:
+    """Path of a small/medium/large derivative stored beside an original."""
+    name = original.name
+    if name.startswith("original_"):
+        name = name[len("original_"):]
+    return original.with_name(f"{derivative}_{name}")
+
+def parse_range_header(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an RFC 9110 bytes Range header into sorted, merged inclusive ranges.
+    Returns None if the header is malformed (serve the full body), or an
+    empty list if no range is satisfiable (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_s, sep, end_s = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_s:
+                # Suffix range: last N bytes
+                length = int(end_s)
+                if length <= 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        if start > end:
+            return None
+        ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Merge overlapping/adjacent ranges so a client can't amplify the response
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+class MediaResponse(Response):
+    """
+    ASGI response for a stored file with single and multipart byte ranges.
+    Uses the zerocopysend / pathsend ASGI extensions when the server offers
+    them, and otherwise streams in bounded chunks from a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        etag: str,
+        method: str = "GET",
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    ):
+        self.background = None
+        self.path = path
+        self.size = path.stat().st_size
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.send_body = method != "HEAD"
+        self.status_code = 200
+        self.ranges: List[Tuple[int, int]] = []
+        self.boundary = None
+        self.media_headers = {
+            "etag": f'"{etag}"',
+            "cache-control": cache_control,
+            "accept-ranges": "bytes",
+        }
+
+        if if_none_match and self.media_headers["etag"] in [t.strip() for t in if_none_match.split(",")]:
+            self.status_code = 304
+            self.send_body = False
+            return
+
+        # If-Range only honours the Range header while the representation is unchanged
+        if range_header and (not if_range or if_range.strip() == self.media_headers["etag"]):
+            ranges = parse_range_header(range_header, self.size)
+            if ranges == []:
+                self.status_code = 416
+                self.media_headers["content-range"] = f"bytes */{self.size}"
+                self.send_body = False
+                return
+            if ranges:
+                self.status_code = 206
+                self.ranges = ranges
+
+        if len(self.ranges) > 1:
+            self.boundary = secrets.token_hex(16)
+            self.media_headers["content-type"] = f"multipart/byteranges; boundary={self.boundary}"
+            self.media_headers["content-length"] = str(sum(
+                len(head) + (end - start + 1) for head, start, end in self._parts()
+            ) + len(self._closing()))
+        elif self.ranges:
+            start, end = self.ranges[0]
+            self.media_headers["content-type"] = self.media_type
+            self.media_headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+            self.media_headers["content-length"] = str(end - start + 1)
+        else:
+            self.media_headers["content-type"] = self.media_type
+            self.media_headers["content-length"] = str(self.size)
+
+    @property
+    def raw_headers(self):
+        return [(k.encode("latin-1"), v.encode("latin-1")) for k, v in self.media_headers.items()]
+
+    def _parts(self):
+        for start, end in self.ranges:
+            head = (
+                f"\r\n--{self.boundary}\r\n"
+                f"Content-Type: {self.media_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{self.size}\r\n\r\n"
+            ).encode("latin-1")
+            yield head, start, end
+
+    def _closing(self) -> bytes:
+        return f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions", {})
+        if not self.ranges and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        zerocopy = "http.response.zerocopysend" in extensions
+        with open(self.path, "rb") as f:
+            if self.boundary:
+                for head, start, end in self._parts():
+                    await send({"type": "http.response.body", "body": head, "more_body": True})
+                    await self._send_range(send, f, start, end - start + 1, zerocopy)
+                await send({"type": "http.response.body", "body": self._closing()})
+            else:
+                start, end = self.ranges[0] if self.ranges else (0, self.size - 1)
+                await self._send_range(send, f, start, end - start + 1, zerocopy)
+                await send({"type": "http.response.body", "body": b""})
+
+    async def _send_range(self, send: Send, f, offset: int, count: int, zerocopy: bool):
+        if zerocopy:
+            # Server calls sendfile(2) on the descriptor; bytes never enter Python
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": f.fileno(),
+                "offset": offset,
+                "count": count,
+                "more_body": True,
+            })
+            return
+
+        f.seek(offset)
+        remaining = count
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+def offload_headers(path: Path) -> Optional[dict]:
+    """Headers that hand the transfer to the fronting proxy, if offload is configured."""
+    if MEDIA_OFFLOAD == "x-accel-redirect":
+        relative = path.resolve().relative_to(DATA_DIR.resolve())
+        return {"X-Accel-Redirect": f"{MEDIA_OFFLOAD_PREFIX}/{relative.as_posix()}"}
+    if MEDIA_OFFLOAD == "x-sendfile":
+        return {"X-Sendfile": str(path.resolve())}
+    return None
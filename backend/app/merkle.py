@@ -2,7 +2,7 @@
 Merkle tree construction and inclusion proof generation.
 """
 import hashlib
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 def sha256_hash(data: bytes) -> str:
     """Compute SHA-256 hash, return hex string."""
@@ -77,21 +77,124 @@ def merkle_proof(event_hash: str, event_hashes: List[str]) -> Tuple[str, List[st
     
     return root, proof_path
 
-def verify_merkle_proof(event_hash: str, proof_path: List[str], merkle_root: str) -> bool:
+def proof_directions(leaf_index: int, length: int) -> List[int]:
+    """Direction bit per proof step: 1 if the sibling is on the left, 0 if on the right."""
+    return [(leaf_index >> level) & 1 for level in range(length)]
+
+def verify_merkle_proof(event_hash: str, proof_path: List[str], merkle_root: str, leaf_index: int) -> bool:
     """
     Verify that event_hash is included in the Merkle tree with given root.
+    Sibling order comes from the leaf's position (its bits are the direction bits).
+    """
+    try:
+        return root_from_proof(event_hash, leaf_index, proof_path) == merkle_root
+    except ValueError:
+        return False
+
+def multiproof_positions(leaf_count: int, leaf_indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    (level, index) of every node a verifier needs, besides the leaves themselves,
+    to recompute the root for a set of leaves. Nodes shared between the leaves'
+    paths, or computable from them, are not repeated.
     """
-    current = event_hash
+    known = set(leaf_indices)
+    needed = []
+    size = leaf_count
+    level = 0
+    while size > 1:
+        for index in sorted(known):
+            sibling = index ^ 1
+            # The last node of an odd level pairs with itself, so it needs no sibling
+            if sibling < size and sibling not in known:
+                needed.append((level, sibling))
+        known = {index // 2 for index in known}
+        size = (size + 1) // 2
+        level += 1
+    return needed
+
+def verify_multiproof(
+    leaves: Dict[int, str],
+    leaf_count: int,
+    nodes: Dict[Tuple[int, int], str],
+    merkle_root: str
+) -> bool:
+    """Recompute the root from {leaf_index: hash} and the multiproof's {(level, index): hash}."""
+    try:
+        current = {index: bytes.fromhex(h) for index, h in leaves.items()}
+        proof = {position: bytes.fromhex(h) for position, h in nodes.items()}
+    except ValueError:
+        return False
+    if not current or any(not 0 <= index < leaf_count for index in current):
+        return False
     
-    def hash_pair(a: str, b: str) -> str:
-        return sha256_hash(bytes.fromhex(a) + bytes.fromhex(b))
+    size = leaf_count
+    level = 0
+    while size > 1:
+        parents = {}
+        for index in sorted(current):
+            parent = index // 2
+            if parent in parents:
+                continue
+            left = index & ~1
+            right = left + 1 if left + 1 < size else left
+            left_hash = current.get(left, proof.get((level, left)))
+            right_hash = current.get(right, proof.get((level, right)))
+            if left_hash is None or right_hash is None:
+                return False
+            parents[parent] = hashlib.sha256(left_hash + right_hash).digest()
+        current = parents
+        size = (size + 1) // 2
+        level += 1
+    return current.get(0, b"").hex() == merkle_root
+
+class MerkleRootBuilder:
+    """
+    Incremental merkle_root: feed leaves in order, memory O(log n).
+    Same tree as merkle_root, including duplicating the last node of odd levels.
+    """
     
-    for sibling in proof_path:
-        # Determine order: if current < sibling (lexicographically), left child, else right
-        if current < sibling:
-            current = hash_pair(current, sibling)
+    def __init__(self):
+        self.pending: List[Optional[bytes]] = []  # pending[level] = unpaired node at that level, or None
+        self.count = 0
+    
+    def add(self, leaf_hex: str):
+        node = bytes.fromhex(leaf_hex)
+        level = 0
+        while level < len(self.pending) and self.pending[level] is not None:
+            node = hashlib.sha256(self.pending[level] + node).digest()
+            self.pending[level] = None
+            level += 1
+        if level == len(self.pending):
+            self.pending.append(node)
         else:
-            current = hash_pair(sibling, current)
+            self.pending[level] = node
+        self.count += 1
     
-    return current == merkle_root
+    def root(self) -> str:
+        if not self.count:
+            return sha256_hash(b"")
+        
+        carry = None
+        for level, node in enumerate(self.pending):
+            higher = any(n is not None for n in self.pending[level + 1:])
+            if node is not None and carry is not None:
+                carry = hashlib.sha256(node + carry).digest()
+            elif node is not None or carry is not None:
+                last = node if node is not None else carry
+                if not higher:
+                    return last.hex()
+                # Odd level: last node pairs with itself
+                carry = hashlib.sha256(last + last).digest()
+        return carry.hex()
 
+def root_from_proof(leaf_hex: str, index: int, proof_path: List[str]) -> str:
+    """Fold a merkle_proof path back to the root using the leaf index for sibling order."""
+    current = bytes.fromhex(leaf_hex)
+    for sibling in proof_path:
+        sibling_bytes = bytes.fromhex(sibling)
+        if index % 2:
+            current = hashlib.sha256(sibling_bytes + current).digest()
+        else:
+            current = hashlib.sha256(current + sibling_bytes).digest()
+        index //= 2
+    return current.hex()
@@ -1,7 +1,7 @@
 """
 SQLAlchemy database models.
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, CheckConstraint
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, CheckConstraint, Index, LargeBinary
 from sqlalchemy.sql import func
 from app.db import Base
 
@@ -69,6 +69,8 @@ class Object(Base):
     
     object_id = Column(String, primary_key=True)
     cid_sha256 = Column(String, nullable=False, unique=True, index=True)
+    chunk_root_sha256 = Column(String, nullable=True)  # Merkle root over fixed-size chunk hashes
+    chunk_size = Column(Integer, nullable=True)  # Bytes per chunk for chunk_root_sha256
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     bundle_manifest_json = Column(Text, nullable=False)  # JSON string
     
@@ -98,6 +100,8 @@ class Object(Base):
     
     __table_args__ = (
         CheckConstraint("visibility IN ('private', 'public')", name='check_visibility'),
+        # OAI-PMH harvesting pages through public objects by (updated_at, object_id)
+        Index("ix_objects_visibility_updated", "visibility", "updated_at", "object_id"),
     )
 
 class Submission(Base):
@@ -144,15 +148,146 @@ class Event(Base):
     actor_id = Column(String, ForeignKey("actors.actor_id"), nullable=False)
     payload_json = Column(Text, nullable=False)  # JSON string
     signature_b64 = Column(String, nullable=False)  # Base64 encoded Ed25519 signature
+    signed_envelope = Column(LargeBinary, nullable=True)  # Exact canonical bytes hashed and signed; empty if not recoverable
+    chain_height = Column(Integer, nullable=True)  # Position in the object's chain, genesis = 0
+    skip_links_json = Column(Text, nullable=True)  # Signed skip links (see app.ancestry); NULL for older events
+    log_index = Column(Integer, nullable=True)  # Position in the transparency log
+    seq = Column(Integer, nullable=True)  # Global insertion order, assigned on insert
+    namespace = Column(String, nullable=True)  # Anchoring namespace, fixed when the event is created
+    anchor_batch_id = Column(String, ForeignKey("anchor_batches.batch_id"), nullable=True)  # NULL until anchored
+    
+    __table_args__ = (
+        Index("ix_events_log_index", "log_index", unique=True),
+        Index("ix_events_seq", "seq", unique=True),
+        Index("ix_events_namespace_seq", "namespace", "seq"),
+        Index("ix_events_object_height", "object_id", "chain_height"),
+        Index("ix_events_object_time", "object_id", "timestamp"),
+    )
+
+class AnchorWatermark(Base):
+    """Per-namespace anchoring progress: every event with seq <= last_seq is anchored."""
+    __tablename__ = "anchor_watermarks"
+    
+    namespace = Column(String, primary_key=True)
+    last_seq = Column(Integer, nullable=False, default=0)
+
+class LogTreeHead(Base):
+    """Signed head of the transparency log at one tree size."""
+    __tablename__ = "log_tree_heads"
+    
+    tree_size = Column(Integer, primary_key=True)
+    root_hash = Column(String, nullable=False)
+    timestamp = Column(String, nullable=False)  # ISO string exactly as signed
+    signature_b64 = Column(String, nullable=False)
+
+class ObjectState(Base):
+    """Current state of an object, folded from its events (see app.projection)."""
+    __tablename__ = "object_states"
+    
+    object_id = Column(String, ForeignKey("objects.object_id"), primary_key=True)
+    event_count = Column(Integer, nullable=False)  # Events folded in, genesis included
+    event_hash = Column(String, nullable=False)  # Last event folded in
+    seq = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, nullable=False)  # Timestamp of that event (UTC)
+    state_json = Column(Text, nullable=False)
+
+class StateSnapshot(Base):
+    """Object state after its first event_count events, kept every STATE_SNAPSHOT_INTERVAL events."""
+    __tablename__ = "state_snapshots"
+    
+    object_id = Column(String, ForeignKey("objects.object_id"), primary_key=True)
+    event_count = Column(Integer, primary_key=True)
+    event_hash = Column(String, nullable=False)
+    seq = Column(Integer, nullable=True)
+    timestamp = Column(DateTime, nullable=False)  # Timestamp of the last event folded in (UTC)
+    state_json = Column(Text, nullable=False)
+
+class VerificationCheckpoint(Base):
+    """Server-signed statement that an object's chain verified through one event."""
+    __tablename__ = "verification_checkpoints"
+    
+    object_id = Column(String, ForeignKey("objects.object_id"), primary_key=True)
+    chain_length = Column(Integer, primary_key=True)  # Events covered, genesis through event_hash
+    event_hash = Column(String, nullable=False)
+    event_seq = Column(Integer, nullable=True)  # Global seq of event_hash
+    anchored_count = Column(Integer, nullable=False)  # Leading events whose anchor proofs verified
+    verified_at = Column(String, nullable=False)  # ISO string exactly as signed
+    verifier_key_b64 = Column(String, nullable=False)
+    signature_b64 = Column(String, nullable=False)
+
+class AnchorEpoch(Base):
+    """
+    One anchoring run: the root over every namespace batch sealed together.
+    Its tree (batch roots in namespace order) is stored in data/trees/{epoch_id}.bin.
+    """
+    __tablename__ = "anchor_epochs"
+    
+    epoch_id = Column(String, primary_key=True)
+    epoch_root = Column(String, nullable=False)
+    namespace_count = Column(Integer, nullable=False)
+    event_count = Column(Integer, nullable=False)
+    anchored_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Set once the epoch root is sent to an anchoring backend
+    submission_id = Column(String, ForeignKey("anchor_submissions.submission_id"), nullable=True, index=True)
+    submission_index = Column(Integer, nullable=True)  # Leaf index in the submission's root-of-roots tree
+
+class AnchorBatch(Base):
+    """Anchored batch of one namespace; its Merkle tree is stored in data/trees/{batch_id}.bin."""
+    __tablename__ = "anchor_batches"
+    
+    batch_id = Column(String, primary_key=True)
+    merkle_root = Column(String, nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    anchored_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    namespace = Column(String, nullable=True, index=True)  # e.g. 'owner:<user_id>'; see anchor.ANCHOR_NAMESPACE_BY
+    epoch_id = Column(String, ForeignKey("anchor_epochs.epoch_id"), nullable=True, index=True)
+    epoch_index = Column(Integer, nullable=True)  # Leaf index of merkle_root in the epoch tree
+
+class AnchorSubmission(Base):
+    """
+    Root-of-roots over one or more epoch roots, submitted to an anchoring backend.
+    Its tree is stored in data/trees/{submission_id}.bin like a batch tree.
+    """
+    __tablename__ = "anchor_submissions"
+    
+    submission_id = Column(String, primary_key=True)
+    backend = Column(String, nullable=False)
+    root_of_roots = Column(String, nullable=False)
+    root_count = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, index=True)  # 'pending', 'submitted', 'confirmed', 'failed'
+    tx_id = Column(String, nullable=True)  # Backend receipt
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    submitted_at = Column(DateTime(timezone=True), nullable=True)
+    confirmed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'submitted', 'confirmed', 'failed')", name='check_submission_status'),
+    )
 
 class AnchorProof(Base):
-    """Merkle inclusion proof for anchored events."""
+    """Position of an anchored event in its batch tree; the proof is read from the tree file."""
     __tablename__ = "anchor_proofs"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    event_hash = Column(String, ForeignKey("events.event_hash"), nullable=False, index=True)
-    batch_id = Column(String, nullable=False, index=True)
-    merkle_root = Column(String, nullable=False)
-    proof_path = Column(Text, nullable=False)  # JSON array of hashes for inclusion proof
-    anchored_at = Column(DateTime(timezone=True), nullable=False)
+    event_hash = Column(String, ForeignKey("events.event_hash"), primary_key=True)
+    batch_id = Column(String, ForeignKey("anchor_batches.batch_id"), nullable=False)
+    leaf_index = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_anchor_proofs_batch_leaf", "batch_id", "leaf_index", unique=True),
+    )
 
+class FixityCheck(Base):
+    """Latest fixity scrub result per stored original."""
+    __tablename__ = "fixity_checks"
+    
+    object_id = Column(String, ForeignKey("objects.object_id"), primary_key=True)
+    status = Column(String, nullable=False, index=True)  # 'ok', 'corrupt', 'missing'
+    checked_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    size_bytes = Column(Integer, nullable=True)
+    detail_json = Column(Text, nullable=True)  # JSON object: path, actual CID, corrupt chunks
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('ok', 'corrupt', 'missing')", name='check_fixity_status'),
+    )
@@ -0,0 +1,199 @@
+"""
+OAI-PMH 2.0 data provider over public objects. Records are Dublin Core
+(oai_dc) or the provenance JSON-LD export (prov_jsonld). Datestamps are
+Object.updated_at; list requests page by (updated_at, object_id) and the
+resumption token carries the last key, so tokens are stateless and every page
+is one index range scan, never an OFFSET.
+"""
+import base64
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+from sqlalchemy import String, and_, func, or_, type_coerce
+from sqlalchemy.orm import Session
+from app.models import Object
+from app.jsonld import object_document
+
+OAI_BASE_URL = os.getenv("OAI_BASE_URL", "http://localhost:8000/oai")
+OAI_REPOSITORY_NAME = os.getenv("OAI_REPOSITORY_NAME", "Kathmandu Cultural Heritage Archive")
+OAI_REPOSITORY_IDENTIFIER = os.getenv("OAI_REPOSITORY_IDENTIFIER", "heritage.local")
+OAI_ADMIN_EMAIL = os.getenv("OAI_ADMIN_EMAIL", "admin@heritage.local")
+# Records per ListRecords/ListIdentifiers response
+OAI_PAGE_SIZE = int(os.getenv("OAI_PAGE_SIZE", "100"))
+
+METADATA_FORMATS = {
+    "oai_dc": {
+        "schema": "http://www.openarchives.org/OAI/2.0/oai_dc.xsd",
+        "metadataNamespace": "http://www.openarchives.org/OAI/2.0/oai_dc/",
+    },
+    "prov_jsonld": {
+        "schema": "https://www.w3.org/TR/json-ld11/",
+        "metadataNamespace": "urn:provenance:",
+    },
+}
+
+class OAIError(Exception):
+    """An OAI-PMH protocol error (reported in an <error> element, with HTTP 200)."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+# updated_at is compared as stored text: rows written by SQLite and by Python
+# differ in fractional seconds, which a bound datetime would not match
+_updated = type_coerce(Object.updated_at, String)
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def datestamp(stored: Optional[str]) -> str:
+    """A stored 'YYYY-MM-DD HH:MM:SS[.ffffff]' value at second granularity."""
+    return (stored or "")[:19].replace(" ", "T") + "Z"
+
+def parse_date(value: str, name: str, is_until: bool) -> Tuple[str, int]:
+    """
+    A from/until argument as a bound on the stored text, and its granularity.
+    until is inclusive, so it becomes an exclusive bound one day or second later.
+    """
+    for fmt, granularity, step in (("%Y-%m-%d", 10, timedelta(days=1)), ("%Y-%m-%dT%H:%M:%SZ", 20, timedelta(seconds=1))):
+        if len(value) != granularity:
+            continue
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            break
+        if is_until:
+            parsed += step
+        return parsed.strftime("%Y-%m-%d %H:%M:%S"), granularity
+    raise OAIError("badArgument", f"{name} is not a valid UTC datestamp: {value}")
+
+def object_id_from(identifier: str) -> Optional[str]:
+    prefix = f"oai:{OAI_REPOSITORY_IDENTIFIER}:"
+    return identifier[len(prefix):] if identifier.startswith(prefix) else None
+
+def oai_identifier(object_id: str) -> str:
+    return f"oai:{OAI_REPOSITORY_IDENTIFIER}:{object_id}"
+
+def encode_token(state: Dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_token(token: str) -> Dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if state["p"] not in METADATA_FORMATS or not isinstance(state["d"], str) or not isinstance(state["i"], str):
+            raise ValueError
+        return state
+    except (ValueError, KeyError, TypeError):
+        raise OAIError("badResumptionToken", "The resumption token is invalid")
+
+def public_objects(db: Session):
+    return db.query(Object).filter(Object.visibility == "public")
+
+def earliest_datestamp(db: Session) -> str:
+    earliest = db.query(func.min(_updated)).filter(Object.visibility == "public").scalar()
+    return datestamp(earliest) if earliest else "1970-01-01T00:00:00Z"
+
+def list_sets(db: Session) -> List[str]:
+    """One set per heritage type."""
+    rows = db.query(Object.heritage_type).filter(
+        Object.visibility == "public", Object.heritage_type.isnot(None)
+    ).distinct().order_by(Object.heritage_type)
+    return [row[0] for row in rows if row[0]]
+
+def list_page(db: Session, state: Dict) -> Tuple[List[Tuple[Object, str]], Optional[Dict]]:
+    """
+    One page of (object, stored updated_at) after the key in state, and the
+    state for the next page (None on the last page).
+    """
+    query = db.query(Object, _updated).filter(Object.visibility == "public", _updated.isnot(None))
+    if state.get("f"):
+        query = query.filter(_updated >= state["f"])
+    if state.get("u"):
+        query = query.filter(_updated < state["u"])
+    if state.get("s"):
+        query = query.filter(Object.heritage_type == state["s"])
+    if state.get("i"):
+        query = query.filter(or_(
+            _updated > state["d"],
+            and_(_updated == state["d"], Object.object_id > state["i"])
+        ))
+    rows = query.order_by(_updated, Object.object_id).limit(OAI_PAGE_SIZE + 1).all()
+    if len(rows) <= OAI_PAGE_SIZE:
+        return rows, None
+    rows = rows[:OAI_PAGE_SIZE]
+    last, last_updated = rows[-1]
+    return rows, {**state, "d": last_updated, "i": last.object_id}
+
+def header_xml(obj: Object, stored_updated: Optional[str]) -> str:
+    parts = [
+        "<header>",
+        f"<identifier>{escape(oai_identifier(obj.object_id))}</identifier>",
+        f"<datestamp>{datestamp(stored_updated)}</datestamp>",
+    ]
+    if obj.heritage_type:
+        parts.append(f"<setSpec>{escape(obj.heritage_type)}</setSpec>")
+    parts.append("</header>")
+    return "".join(parts)
+
+def _json_list(value: Optional[str]) -> list:
+    try:
+        items = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return []
+    return items if isinstance(items, list) else []
+
+def dublin_core_xml(obj: Object) -> str:
+    fields = [
+        ("title", obj.title),
+        ("description", obj.description),
+        ("type", obj.heritage_type),
+        ("coverage", obj.location),
+        ("date", obj.date_created),
+        ("subject", obj.culture),
+    ]
+    fields += [("subject", keyword) for keyword in _json_list(obj.keywords_json)]
+    fields += [("relation", reference) for reference in _json_list(obj.references_json)]
+    fields += [("identifier", f"urn:object:{obj.object_id}"), ("identifier", f"sha256:{obj.cid_sha256}")]
+    elements = "".join(
+        f"<dc:{name}>{escape(str(value))}</dc:{name}>" for name, value in fields if value
+    )
+    return (
+        '<oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://www.openarchives.org/OAI/2.0/oai_dc/ '
+        'http://www.openarchives.org/OAI/2.0/oai_dc.xsd">'
+        f"{elements}</oai_dc:dc>"
+    )
+
+def provenance_xml(db: Session, obj: Object) -> str:
+    """The JSON-LD export as the text of a single element."""
+    return (
+        '<provenance:jsonld xmlns:provenance="urn:provenance:" contentType="application/ld+json">'
+        f"{escape(object_document(db, obj))}</provenance:jsonld>"
+    )
+
+def record_xml(db: Session, obj: Object, stored_updated: Optional[str], prefix: str) -> str:
+    metadata = dublin_core_xml(obj) if prefix == "oai_dc" else provenance_xml(db, obj)
+    return f"<record>{header_xml(obj, stored_updated)}<metadata>{metadata}</metadata></record>"
+
+def envelope(request_args: Dict[str, str], body: str) -> str:
+    """Wrap a verb's response (or an error) in the OAI-PMH document."""
+    attributes = "".join(f" {name}={quoteattr(value)}" for name, value in sorted(request_args.items()))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://www.openarchives.org/OAI/2.0/ '
+        'http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd">'
+        f"<responseDate>{_utc_now()}</responseDate>"
+        f"<request{attributes}>{escape(OAI_BASE_URL)}</request>"
+        f"{body}</OAI-PMH>"
+    )
+
+def error_xml(error: OAIError) -> str:
+    return f'<error code="{error.code}">{escape(error.message)}</error>'
@@ -0,0 +1,256 @@
+"""
+Event-sourced object state: events are folded, in chain order, into a
+materialized current state (object_states), updated incrementally on every
+append. Every STATE_SNAPSHOT_INTERVAL events the state is also kept as a
+snapshot (state_snapshots), so the state at any time is the nearest earlier
+snapshot plus a replay of the few events after it, and those intermediate
+states are cached.
+"""
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import Event, ObjectState, StateSnapshot
+
+STATE_SNAPSHOT_INTERVAL = int(os.getenv("STATE_SNAPSHOT_INTERVAL", "50"))
+STATE_CACHE_SIZE = int(os.getenv("STATE_CACHE_SIZE", "1024"))
+PROJECTION_WORKERS = int(os.getenv("PROJECTION_WORKERS", str(os.cpu_count() or 4)))
+
+# Top-level INGESTION payload keys that are not descriptive metadata
+_INGESTION_KEYS = {"cid", "filename", "metadata"}
+
+def empty_state() -> Dict[str, Any]:
+    return {"cid": None, "filename": None, "format": None, "custodian": None, "metadata": {}}
+
+def apply_event(state: Dict[str, Any], event_type: str, payload: Dict[str, Any], actor_id: str) -> Dict[str, Any]:
+    """Fold one event into a state (a new dict; the input is left unchanged)."""
+    state = {**state, "metadata": dict(state["metadata"])}
+    if not isinstance(payload, dict):
+        payload = {}
+    if event_type == "INGESTION":
+        state["cid"] = payload.get("cid", state["cid"])
+        state["filename"] = payload.get("filename", state["filename"])
+        if isinstance(payload.get("metadata"), dict):
+            state["metadata"].update(payload["metadata"])
+        # Contributor and seeded items carry title/description at the top level
+        state["metadata"].update({k: v for k, v in payload.items() if k not in _INGESTION_KEYS})
+        state["custodian"] = state["custodian"] or actor_id
+    elif event_type == "METADATA_EDIT":
+        if "field" in payload:
+            state["metadata"][payload["field"]] = payload.get("new_value")
+        if isinstance(payload.get("metadata"), dict):
+            state["metadata"].update(payload["metadata"])
+    elif event_type == "CUSTODY_TRANSFER":
+        state["custodian"] = payload.get("to_actor") or state["custodian"]
+    elif event_type == "MIGRATION":
+        state["format"] = payload.get("to_format", state["format"])
+        state["cid"] = payload.get("new_cid", state["cid"])
+    return state
+
+def _fold(state: Dict[str, Any], event: Event) -> Dict[str, Any]:
+    try:
+        payload = json.loads(event.payload_json)
+    except (TypeError, ValueError):
+        payload = {}
+    return apply_event(state, event.event_type, payload, event.actor_id)
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def chain_events(db: Session, object_id: str, after_count: int = 0):
+    """An object's events in chain order, skipping the first after_count."""
+    return db.query(Event).filter(
+        Event.object_id == object_id, Event.chain_height >= after_count
+    ).order_by(Event.chain_height)
+
+def _snapshot_row(object_id: str, count: int, event: Event, state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "object_id": object_id,
+        "event_count": count,
+        "event_hash": event.event_hash,
+        "seq": event.seq,
+        "timestamp": _naive_utc(event.timestamp),
+        "state_json": json.dumps(state),
+    }
+
+def _state_row(object_id: str, count: int, event: Event, state: Dict[str, Any]) -> Dict[str, Any]:
+    row = _snapshot_row(object_id, count, event, state)
+    return {**row, "updated_at": row.pop("timestamp")}
+
+def rebuild_object(db: Session, object_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """Replay an object's whole chain. Returns its state row and snapshot rows (not written)."""
+    state, count, event, snapshots = empty_state(), 0, None, []
+    for event in chain_events(db, object_id):
+        state = _fold(state, event)
+        count += 1
+        if count % STATE_SNAPSHOT_INTERVAL == 0:
+            snapshots.append(_snapshot_row(object_id, count, event, state))
+    if event is None:
+        return None, []
+    return _state_row(object_id, count, event, state), snapshots
+
+def _replace_projection(db: Session, object_ids: List[str], states: List[Dict], snapshots: List[Dict]):
+    db.query(StateSnapshot).filter(StateSnapshot.object_id.in_(object_ids)).delete(synchronize_session=False)
+    db.query(ObjectState).filter(ObjectState.object_id.in_(object_ids)).delete(synchronize_session=False)
+    db.bulk_insert_mappings(ObjectState, states)
+    db.bulk_insert_mappings(StateSnapshot, snapshots)
+    db.commit()
+
+def project_event(db: Session, event: Event):
+    """
+    Fold a newly appended event into its object's state, writing a snapshot at
+    every STATE_SNAPSHOT_INTERVAL events. Falls back to replaying the object
+    if the stored state is missing or not at the event's predecessor.
+    """
+    current = db.get(ObjectState, event.object_id)
+    if current is None or current.event_count != event.chain_height:
+        state_row, snapshots = rebuild_object(db, event.object_id)
+        if state_row:
+            _replace_projection(db, [event.object_id], [state_row], snapshots)
+        return
+    count = current.event_count + 1
+    state = _fold(json.loads(current.state_json), event)
+    current.state_json = json.dumps(state)
+    current.event_count = count
+    current.event_hash = event.event_hash
+    current.seq = event.seq
+    current.updated_at = _naive_utc(event.timestamp)
+    if count % STATE_SNAPSHOT_INTERVAL == 0:
+        db.merge(StateSnapshot(**_snapshot_row(event.object_id, count, event, state)))
+    db.commit()
+
+def current_state(db: Session, object_id: str) -> Optional[ObjectState]:
+    """The materialized state, built on first use for objects not yet projected."""
+    current = db.get(ObjectState, object_id)
+    if current is None:
+        state_row, snapshots = rebuild_object(db, object_id)
+        if not state_row:
+            return None
+        _replace_projection(db, [object_id], [state_row], snapshots)
+        current = db.get(ObjectState, object_id)
+    return current
+
+class StateCache:
+    """LRU of folded intermediate states, keyed by (object_id, event_count, last event hash)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+            return state
+
+    def put(self, key: tuple, state: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# States after a given event never change (events are append-only), so entries need no invalidation
+state_cache = StateCache(STATE_CACHE_SIZE)
+
+def folded_state(db: Session, object_id: str, count: int, last_event: Event) -> Dict[str, Any]:
+    """
+    State after an object's first count events (last_event is the count-th):
+    the cached state, or the nearest snapshot at or below count plus at most
+    STATE_SNAPSHOT_INTERVAL - 1 events.
+    """
+    key = (object_id, count, last_event.event_hash)
+    state = state_cache.get(key)
+    if state is not None:
+        return state
+    snapshot = db.query(StateSnapshot).filter(
+        StateSnapshot.object_id == object_id, StateSnapshot.event_count <= count
+    ).order_by(StateSnapshot.event_count.desc()).first()
+    if snapshot:
+        state, folded = json.loads(snapshot.state_json), snapshot.event_count
+    else:
+        state, folded = empty_state(), 0
+    for event in chain_events(db, object_id, folded).filter(Event.chain_height < count):
+        state = _fold(state, event)
+    state_cache.put(key, state)
+    return state
+
+def state_at(db: Session, object_id: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    State as of time at (default: now) and the event that produced it, found
+    with one seek on (object_id, timestamp). None if the object had no events yet.
+    """
+    current = current_state(db, object_id)
+    if current is None:
+        return None
+    query = db.query(Event).filter(Event.object_id == object_id)
+    if at is not None:
+        query = query.filter(Event.timestamp <= _naive_utc(at))
+    event = query.order_by(Event.timestamp.desc(), Event.chain_height.desc()).first()
+    if event is None:
+        return None
+    count = event.chain_height + 1
+    if count == current.event_count and event.event_hash == current.event_hash:
+        state = json.loads(current.state_json)
+    else:
+        state = folded_state(db, object_id, count, event)
+    return {"state": state, "event_count": count, "event": event}
+
+def rebuild_partition(object_ids: List[str]) -> Tuple[List[Dict], List[Dict]]:
+    """Worker: replay a share of the objects and return their rows for the parent to write."""
+    db = SessionLocal()
+    try:
+        states, snapshots = [], []
+        for object_id in object_ids:
+            state_row, object_snapshots = rebuild_object(db, object_id)
+            if state_row:
+                states.append(state_row)
+                snapshots.extend(object_snapshots)
+        return states, snapshots
+    finally:
+        db.close()
+
+def rebuild_projections(workers: int = PROJECTION_WORKERS, chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Replay the whole event log into object_states and state_snapshots.
+    Objects are independent, so worker processes replay chunks of them in
+    parallel; this process does all the writing (SQLite has one writer).
+    """
+    db = SessionLocal()
+    try:
+        object_ids = [row[0] for row in db.query(Event.object_id).distinct().order_by(Event.object_id)]
+        chunks = [object_ids[i:i + chunk_size] for i in range(0, len(object_ids), chunk_size)]
+        totals = {"objects": 0, "snapshots": 0}
+
+        def write(chunk, result):
+            states, snapshots = result
+            _replace_projection(db, chunk, states, snapshots)
+            totals["objects"] += len(states)
+            totals["snapshots"] += len(snapshots)
+
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                write(chunk, rebuild_partition(chunk))
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+                for chunk, result in zip(chunks, pool.map(rebuild_partition, chunks)):
+                    write(chunk, result)
+        return totals
+    finally:
+        db.close()
@@ -2,11 +2,111 @@
 Provenance event chain logic: prev_event_hash linking, append-only guarantees.
 """
 import json
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.models import Event, Object
-from app.crypto import hash_event, sign_event
-from datetime import datetime
+from app.crypto import canonical_json, hash_canonical, sign_canonical
+from app.db import SessionLocal
+from app.translog import log_events
+from app.anchor import event_namespace, next_event_seq, register_namespace
+from app.ancestry import skip_links_for
+from app.projection import project_event
+from datetime import datetime, timezone
+
+def signed_event_data(event: Event) -> dict:
+    """
+    Rebuild the dict an event was signed over from its columns. Only needed for
+    events stored before signed_envelope existed.
+    """
+    try:
+        payload = json.loads(event.payload_json)
+    except (TypeError, ValueError):
+        payload = {}
+    # Signed with timestamp_utc.replace(tzinfo=None).isoformat(); the column comes back timezone-aware
+    timestamp_dt = event.timestamp
+    if timestamp_dt.tzinfo is not None:
+        timestamp_dt = timestamp_dt.astimezone(timezone.utc).replace(tzinfo=None)
+    event_data = {
+        "object_id": event.object_id,
+        "event_type": event.event_type,
+        "prev_event_hash": event.prev_event_hash,
+        "timestamp": timestamp_dt.isoformat(),
+        "actor_id": event.actor_id,
+        "payload": payload
+    }
+    if event.skip_links_json is not None:
+        event_data["height"] = event.chain_height
+        event_data["skip_links"] = json.loads(event.skip_links_json)
+    return event_data
+
+def event_envelope(event: Event) -> bytes:
+    """The canonical bytes an event's hash and signature cover."""
+    if event.signed_envelope:
+        return event.signed_envelope
+    return canonical_json(signed_event_data(event))
+
+def envelope_mismatches(event: Event, envelope: bytes) -> List[str]:
+    """
+    Columns of an event that disagree with its signed envelope. Links, the
+    timeline, projections and exports read the columns, so a valid signature
+    only vouches for them if they match what was signed.
+    """
+    try:
+        signed = json.loads(envelope)
+    except (TypeError, ValueError):
+        return ["envelope"]
+    mismatches = [
+        field for field in ("object_id", "event_type", "prev_event_hash", "actor_id")
+        if signed.get(field) != getattr(event, field)
+    ]
+    try:
+        payload = json.loads(event.payload_json)
+    except (TypeError, ValueError):
+        payload = None
+    if signed.get("payload") != payload:
+        mismatches.append("payload")
+    timestamp = event.timestamp
+    if timestamp is not None and timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        signed_timestamp = datetime.fromisoformat(signed.get("timestamp"))
+    except (TypeError, ValueError):
+        signed_timestamp = None
+    if signed_timestamp != timestamp:
+        mismatches.append("timestamp")
+    if "height" in signed and signed["height"] != event.chain_height:
+        mismatches.append("chain_height")
+    if "skip_links" in signed and signed["skip_links"] != json.loads(event.skip_links_json or "null"):
+        mismatches.append("skip_links")
+    return mismatches
+
+def backfill_signed_envelopes(batch_size: int = 2000):
+    """
+    Store the signed bytes of older events. A rebuilt envelope is kept only if
+    it hashes to the event hash; otherwise an empty marker is stored so the
+    event is not retried, and verification keeps rebuilding it.
+    """
+    db = SessionLocal()
+    try:
+        last_hash = ""
+        while True:
+            events = db.query(Event).filter(
+                Event.signed_envelope.is_(None), Event.event_hash > last_hash
+            ).order_by(Event.event_hash).limit(batch_size).all()
+            if not events:
+                break
+            updates = []
+            for event in events:
+                envelope = canonical_json(signed_event_data(event))
+                updates.append({
+                    "event_hash": event.event_hash,
+                    "signed_envelope": envelope if hash_canonical(envelope) == event.event_hash else b""
+                })
+            db.bulk_update_mappings(Event, updates)
+            db.commit()
+            last_hash = events[-1].event_hash
+    finally:
+        db.close()
 
 def get_latest_event(db: Session, object_id: str) -> Optional[Event]:
     """Get the most recent event for an object (by timestamp)."""
@@ -27,7 +127,6 @@ def create_genesis_event(
     """
     # Get a single timestamp and use it for both signing and storing
     # This ensures the stored timestamp matches exactly what was signed
-    from datetime import timezone
     timestamp_utc = datetime.now(timezone.utc)
     
     # Convert to timezone-naive UTC for signing (matches datetime.utcnow() behavior)
@@ -40,11 +139,18 @@ def create_genesis_event(
         "prev_event_hash": None,
         "timestamp": timestamp_for_signing,
         "actor_id": actor_id,
-        "payload": payload
+        "payload": payload,
+        "height": 0,
+        "skip_links": []
     }
     
-    event_hash = hash_event(event_data)
-    signature = sign_event(event_data, private_key_b64)
+    # One serialization is hashed, signed and stored
+    envelope = canonical_json(event_data)
+    event_hash = hash_canonical(envelope)
+    signature = sign_canonical(envelope, private_key_b64)
+    # The object may still be pending in this session (autoflush is off)
+    db.flush()
+    namespace = event_namespace(db, object_id, actor_id)
     
     event = Event(
         event_hash=event_hash,
@@ -54,12 +160,20 @@ def create_genesis_event(
         timestamp=timestamp_utc,
         actor_id=actor_id,
         payload_json=json.dumps(payload),
-        signature_b64=signature
+        signature_b64=signature,
+        signed_envelope=envelope,
+        chain_height=0,
+        skip_links_json="[]",
+        seq=next_event_seq(),
+        namespace=namespace
     )
     
+    register_namespace(db, namespace)
     db.add(event)
     db.commit()
     db.refresh(event)
+    log_events(db, [event])
+    project_event(db, event)
     return event
 
 def append_event(
@@ -81,10 +195,15 @@ def append_event(
     # Get previous event
     prev_event = get_latest_event(db, object_id)
     prev_event_hash = prev_event.event_hash if prev_event else None
+    if prev_event and prev_event.chain_height is None:
+        # Heights are backfilled by init_db; count the chain if this one was missed
+        height = db.query(Event).filter(Event.object_id == object_id).count()
+    else:
+        height = prev_event.chain_height + 1 if prev_event else 0
+    skip_links = skip_links_for(db, object_id, height)
     
     # Get a single timestamp and use it for both signing and storing
     # This ensures the stored timestamp matches exactly what was signed
-    from datetime import timezone
     timestamp_utc = datetime.now(timezone.utc)
     
     # Convert to timezone-naive UTC for signing (matches datetime.utcnow() behavior)
@@ -97,11 +216,18 @@ def append_event(
         "prev_event_hash": prev_event_hash,
         "timestamp": timestamp_for_signing,
         "actor_id": actor_id,
-        "payload": payload
+        "payload": payload,
+        "height": height,
+        "skip_links": skip_links
     }
     
-    event_hash = hash_event(event_data)
-    signature = sign_event(event_data, private_key_b64)
+    # One serialization is hashed, signed and stored
+    envelope = canonical_json(event_data)
+    event_hash = hash_canonical(envelope)
+    signature = sign_canonical(envelope, private_key_b64)
+    # The object may still be pending in this session (autoflush is off)
+    db.flush()
+    namespace = event_namespace(db, object_id, actor_id)
     
     event = Event(
         event_hash=event_hash,
@@ -111,11 +237,21 @@ def append_event(
         timestamp=timestamp_utc,
         actor_id=actor_id,
         payload_json=json.dumps(payload),
-        signature_b64=signature
+        signature_b64=signature,
+        signed_envelope=envelope,
+        chain_height=height,
+        skip_links_json=json.dumps(skip_links),
+        seq=next_event_seq(),
+        namespace=namespace
     )
     
+    register_namespace(db, namespace)
     db.add(event)
+    # A new event changes the object's exported record; harvesters select on updated_at
+    obj.updated_at = timestamp_utc.replace(tzinfo=None)
     db.commit()
     db.refresh(event)
+    log_events(db, [event])
+    project_event(db, event)
     return event
 
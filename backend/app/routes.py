@@ -4,23 +4,39 @@ API route handlers.
 import json
 import uuid
 from pathlib import Path
+from typing import Callable, Optional
 from datetime import datetime
 import datetime as dt
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Header
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.db import get_db
-from app.models import Actor, Object, Event, AnchorProof
+from app.db import get_db, SessionLocal
+from app.models import Actor, Object, Event, AnchorEpoch, AnchorBatch, AnchorSubmission
 from app.schemas import (
     ActorCreate, ActorResponse,
     IngestResponse,
+    CidLookupRequest, CidLookupResponse,
+    InclusionProofResponse, BatchProofRequest, BatchProofResponse, AncestryProof, AncestryStep,
+    ObjectStateResponse, ChainEvent, EventPage,
     EventCreate, EventResponse,
-    AnchorResponse,
-    VerificationReport, EventTimelineItem
+    AnchorResponse, AnchorBatchSummary, AnchorReceipt,
+    VerificationReport
 )
 from app.crypto import compute_cid, generate_keypair
-from app.provenance import create_genesis_event, append_event, get_latest_event
-from app.merkle import merkle_proof, verify_merkle_proof
-from app.anchor import anchor_batch, get_all_anchors
+from app.keys import actor_keys
+from app.provenance import create_genesis_event, append_event, get_latest_event, event_envelope
+from app.ancestry import ancestry_path
+from app.projection import state_at
+from app.merkle import proof_directions
+from app.anchor import anchor_pending_events, get_all_anchors, get_inclusion_proof, get_batch_proofs, epoch_proof
+from app.chunks import build_chunk_tree, save_leaves, load_leaves, verify_range, CHUNK_SIZE
+from app.media import original_path
+from app.cid_index import cid_index
+from app.anchor_trees import open_tree
+from app.anchor_submitter import anchor_submitter
+from app.verification import load_chain, verify_chain
+from app.jsonld import stream_object, jsonld_response
 
 router = APIRouter()
 
@@ -39,9 +55,7 @@ async def create_actor(actor_data: ActorCreate, db: Session = Depends(get_db)):
     # If no public key provided, derive one deterministically from actor_id
     # This ensures consistency - same actor_id always gets same keypair
     if not actor_data.pubkey_ed25519:
-        from app.crypto import derive_keypair_from_seed
-        _, pub_key = derive_keypair_from_seed(f"actor:{actor_data.actor_id}")
-        actor_data.pubkey_ed25519 = pub_key
+        actor_data.pubkey_ed25519 = actor_keys(actor_data.actor_id).public_key_b64
     
     actor = Actor(
         actor_id=actor_data.actor_id,
@@ -63,15 +77,20 @@ async def generate_actor_keypair():
         "note": "Store the private key securely. Use the public key when creating an actor."
     }
 
-@router.post("/ingest", response_model=IngestResponse)
-async def ingest_object(
-    file: UploadFile = File(...),
-    metadata: str = Form(...),
-    actor_id: str = Form(...),
-    private_key: str = Form(None),  # MVP: accept private key as form field
-    db: Session = Depends(get_db)
-):
-    """Ingest a digital heritage object: upload file, generate CID, create genesis event."""
+def ingest_binary(
+    db: Session,
+    cid: str,
+    filename: str,
+    content_type: str | None,
+    metadata: str,
+    actor_id: str,
+    private_key: str | None,
+    write_binary: Callable[[Path], None]
+) -> IngestResponse:
+    """
+    Shared ingest path: register the object, store its binary and create the genesis event.
+    write_binary places the file bytes at the given path (write or move).
+    """
     # Verify actor exists
     actor = db.query(Actor).filter(Actor.actor_id == actor_id).first()
     if not actor:
@@ -79,24 +98,17 @@ async def ingest_object(
     
     # MVP: Always derive private key deterministically from actor_id
     # This ensures the same actor always uses the same keypair for signing
-    from app.crypto import derive_keypair_from_seed
-    derived_private_key, derived_pub_key = derive_keypair_from_seed(f"actor:{actor_id}")
+    keys = actor_keys(actor_id)
     
     # Use provided private key if given, otherwise use derived one
     if not private_key:
-        private_key = derived_private_key
+        private_key = keys.private_key_b64
     
     # Ensure actor's public key matches the derived one (important for verification)
-    if actor.pubkey_ed25519 != derived_pub_key:
-        actor.pubkey_ed25519 = derived_pub_key
+    if actor.pubkey_ed25519 != keys.public_key_b64:
+        actor.pubkey_ed25519 = keys.public_key_b64
         db.commit()
     
-    # Read file bytes
-    file_bytes = await file.read()
-    
-    # Compute CID
-    cid = compute_cid(file_bytes)
-    
     # Check if object with this CID already exists
     existing_obj = db.query(Object).filter(Object.cid_sha256 == cid).first()
     if existing_obj:
@@ -115,39 +127,52 @@ async def ingest_object(
     bundle_manifest = {
         "object_id": object_id,
         "cid": cid,
-        "filename": file.filename,
-        "content_type": file.content_type,
+        "filename": filename,
+        "content_type": content_type,
         "metadata": metadata_dict,
         "created_at": datetime.utcnow().isoformat()
     }
     
     # Store binary file
-    binary_path = BINARY_DIR / f"{object_id}_{file.filename}"
-    with open(binary_path, "wb") as f:
-        f.write(file_bytes)
+    binary_path = BINARY_DIR / f"{object_id}_{filename}"
+    write_binary(binary_path)
+    
+    # Chunk-tree CID alongside the flat one, for parallel and partial fixity checks
+    chunk_root, leaves = build_chunk_tree(binary_path)
+    save_leaves(cid, leaves)
     
     # Create object record
     obj = Object(
         object_id=object_id,
         cid_sha256=cid,
+        chunk_root_sha256=chunk_root,
+        chunk_size=CHUNK_SIZE,
         bundle_manifest_json=json.dumps(bundle_manifest)
     )
     db.add(obj)
     db.commit()
     
     # Create genesis event
-    genesis_event = create_genesis_event(
-        db=db,
-        object_id=object_id,
-        event_type="INGESTION",
-        payload={
-            "cid": cid,
-            "filename": file.filename,
-            "metadata": metadata_dict
-        },
-        actor_id=actor_id,
-        private_key_b64=private_key
-    )
+    try:
+        genesis_event = create_genesis_event(
+            db=db,
+            object_id=object_id,
+            event_type="INGESTION",
+            payload={
+                "cid": cid,
+                "filename": filename,
+                "metadata": metadata_dict
+            },
+            actor_id=actor_id,
+            private_key_b64=private_key
+        )
+    except Exception:
+        # Without its genesis event the object can't be used; drop it so the CID can be ingested again
+        db.rollback()
+        if not db.query(Event.event_hash).filter(Event.object_id == object_id).first():
+            db.query(Object).filter(Object.object_id == object_id).delete(synchronize_session=False)
+            db.commit()
+        raise
     
     return IngestResponse(
         object_id=object_id,
@@ -155,6 +180,64 @@ async def ingest_object(
         genesis_event_hash=genesis_event.event_hash
     )
 
+@router.post("/ingest", response_model=IngestResponse)
+async def ingest_object(
+    file: UploadFile = File(...),
+    metadata: str = Form(...),
+    actor_id: str = Form(...),
+    private_key: str = Form(None),  # MVP: accept private key as form field
+    db: Session = Depends(get_db)
+):
+    """Ingest a digital heritage object: upload file, generate CID, create genesis event."""
+    # Read file bytes
+    file_bytes = await file.read()
+    
+    # Compute CID
+    cid = compute_cid(file_bytes)
+    
+    # Writing and chunk-tree hashing can take a while for large files; keep them off the event loop
+    return await run_in_threadpool(
+        ingest_binary,
+        db=db,
+        cid=cid,
+        filename=file.filename,
+        content_type=file.content_type,
+        metadata=metadata,
+        actor_id=actor_id,
+        private_key=private_key,
+        write_binary=lambda path: path.write_bytes(file_bytes)
+    )
+
+# Upper bound on CIDs per lookup request
+MAX_CID_LOOKUP = 1000
+
+@router.head("/objects/by-cid/{cid}")
+async def object_exists_by_cid(cid: str, db: Session = Depends(get_db)):
+    """
+    Pre-flight check before uploading: 200 if the CID is stored, else 404.
+    X-Object-Id is only sent for public objects, so a file's hash doesn't reveal private ids.
+    """
+    cid = cid.lower()
+    if cid_index.might_contain(db, cid):
+        obj = db.query(Object.object_id, Object.visibility).filter(Object.cid_sha256 == cid).first()
+        if obj:
+            headers = {"X-Object-Id": obj.object_id} if obj.visibility == "public" else {}
+            return Response(status_code=200, headers=headers)
+    return Response(status_code=404)
+
+@router.post("/objects/cids:lookup", response_model=CidLookupResponse)
+async def lookup_cids(request: CidLookupRequest, db: Session = Depends(get_db)):
+    """Batch pre-flight check: which of these CIDs are already stored."""
+    if len(request.cids) > MAX_CID_LOOKUP:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CID_LOOKUP} CIDs per lookup")
+    
+    cids = [cid.lower() for cid in request.cids]
+    found = cid_index.lookup(db, cids)
+    return CidLookupResponse(
+        found=found,
+        missing=[cid for cid in dict.fromkeys(cids) if cid not in found]
+    )
+
 @router.post("/objects/{object_id}/events", response_model=EventResponse)
 async def create_event(
     object_id: str,
@@ -172,33 +255,30 @@ async def create_event(
     # If actor_id is 'anonymous' or not provided, use anonymous actor for visitors
     actor_id = event_data.actor_id if event_data.actor_id else "anonymous"
     
+    # MVP: Always derive private key deterministically from actor_id
+    # This ensures the same actor always uses the same keypair for signing
+    # The actor's stored public key should match this derived one
+    keys = actor_keys(actor_id)
+    
     # Get or create actor
     actor = db.query(Actor).filter(Actor.actor_id == actor_id).first()
     if not actor:
         # Create anonymous actor for visitor events
-        from app.crypto import derive_keypair_from_seed
-        _, pub_key = derive_keypair_from_seed(f"actor:{actor_id}")
         actor = Actor(
             actor_id=actor_id,
             name="Anonymous Visitor" if actor_id == "anonymous" else actor_id,
-            pubkey_ed25519=pub_key
+            pubkey_ed25519=keys.public_key_b64
         )
         db.add(actor)
         db.commit()
     
-    # MVP: Always derive private key deterministically from actor_id
-    # This ensures the same actor always uses the same keypair for signing
-    # The actor's stored public key should match this derived one
-    from app.crypto import derive_keypair_from_seed
-    derived_private_key, derived_pub_key = derive_keypair_from_seed(f"actor:{actor_id}")
-    
     # Use provided private key if given, otherwise use derived one
     if not private_key:
-        private_key = derived_private_key
+        private_key = keys.private_key_b64
     
     # Ensure actor's public key matches the derived one
-    if actor.pubkey_ed25519 != derived_pub_key:
-        actor.pubkey_ed25519 = derived_pub_key
+    if actor.pubkey_ed25519 != keys.public_key_b64:
+        actor.pubkey_ed25519 = keys.public_key_b64
         db.commit()
     
     # Append event
@@ -213,52 +293,282 @@ async def create_event(
     
     return EventResponse(event_hash=event.event_hash)
 
-@router.post("/anchor", response_model=AnchorResponse)
-async def anchor_events(db: Session = Depends(get_db)):
-    """Anchor unanchored events by computing Merkle root and storing it."""
-    # Get all events that don't have anchor proofs
-    anchored_events = db.query(AnchorProof.event_hash).subquery()
-    unanchored_events = db.query(Event).filter(
-        ~Event.event_hash.in_(db.query(AnchorProof.event_hash))
-    ).all()
-    
-    if not unanchored_events:
-        raise HTTPException(status_code=400, detail="No unanchored events to anchor")
-    
-    event_hashes = [e.event_hash for e in unanchored_events]
-    
-    # Compute Merkle root and anchor
-    anchor_record = anchor_batch(event_hashes)
-    
-    # Generate inclusion proofs and store them
-    from app.merkle import merkle_proof
-    
-    root, proof_path = merkle_proof(event_hashes[0], event_hashes)  # Proof for first event as example
-    # In practice, we'd generate proofs for all events
+# Page size bounds for GET /objects/{object_id}/events
+DEFAULT_EVENT_PAGE = 100
+MAX_EVENT_PAGE = 1000
+# Rows fetched per query while streaming NDJSON
+EVENT_STREAM_CHUNK = 1000
+
+def _chain_event(event: Event) -> ChainEvent:
+    try:
+        payload = json.loads(event.payload_json)
+    except (TypeError, ValueError):
+        payload = {}
+    return ChainEvent(
+        event_hash=event.event_hash,
+        chain_height=event.chain_height,
+        seq=event.seq,
+        event_type=event.event_type,
+        timestamp=event.timestamp,
+        actor_id=event.actor_id,
+        payload=payload,
+        prev_event_hash=event.prev_event_hash,
+        signature_b64=event.signature_b64,
+        anchored=event.anchor_batch_id is not None,
+        batch_id=event.anchor_batch_id
+    )
+
+def _event_page_query(db: Session, object_id: str, after: int, filters: dict):
+    """Keyset query over one chain: events after height `after`, in chain order."""
+    query = db.query(Event).filter(Event.object_id == object_id, Event.chain_height > after)
+    if filters["event_types"]:
+        query = query.filter(Event.event_type.in_(filters["event_types"]))
+    if filters["actor_id"]:
+        query = query.filter(Event.actor_id == filters["actor_id"])
+    if filters["since"]:
+        query = query.filter(Event.timestamp >= filters["since"])
+    if filters["until"]:
+        query = query.filter(Event.timestamp <= filters["until"])
+    return query.order_by(Event.chain_height)
+
+def _stream_events(object_id: str, after: int, filters: dict, limit: Optional[int]):
+    # Own session: the request's session is closed once the response starts streaming
+    db = SessionLocal()
+    try:
+        sent = 0
+        while limit is None or sent < limit:
+            size = EVENT_STREAM_CHUNK if limit is None else min(EVENT_STREAM_CHUNK, limit - sent)
+            events = _event_page_query(db, object_id, after, filters).limit(size).all()
+            if not events:
+                break
+            yield "".join(_chain_event(event).model_dump_json() + "\n" for event in events)
+            sent += len(events)
+            after = events[-1].chain_height
+            db.expunge_all()
+    finally:
+        db.close()
+
+@router.get("/objects/{object_id}/events", response_model=EventPage)
+async def list_object_events(
+    object_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, description=f"Page size (default {DEFAULT_EVENT_PAGE}, max {MAX_EVENT_PAGE}); in NDJSON mode, optional cap"),
+    event_type: Optional[str] = Query(None, description="Comma-separated event types"),
+    actor_id: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Events at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Events at or before this time (UTC)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson streams every matching event, one per line"),
+    db: Session = Depends(get_db)
+):
+    """An object's events in chain order, paginated by position in the chain."""
+    if not db.query(Object.object_id).filter(Object.object_id == object_id).first():
+        raise HTTPException(status_code=404, detail="Object not found")
+    try:
+        after = int(cursor) if cursor else -1
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Timestamps are stored as naive UTC
+    as_utc = lambda value: value.astimezone(dt.timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+    filters = {
+        "event_types": [t.strip() for t in event_type.split(",") if t.strip()] if event_type else [],
+        "actor_id": actor_id,
+        "since": as_utc(since),
+        "until": as_utc(until),
+    }
     
-    for event_hash in event_hashes:
-        # Generate proof for each event
-        root_check, proof = merkle_proof(event_hash, event_hashes)
-        assert root_check == anchor_record["merkle_root"]
-        
-        proof_record = AnchorProof(
-            event_hash=event_hash,
-            batch_id=anchor_record["batch_id"],
-            merkle_root=anchor_record["merkle_root"],
-            proof_path=json.dumps(proof),
-            anchored_at=datetime.fromisoformat(anchor_record["anchored_at"].replace('Z', '+00:00'))
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_events(object_id, after, filters, limit),
+            media_type="application/x-ndjson"
         )
-        db.add(proof_record)
     
-    db.commit()
+    page_size = min(limit or DEFAULT_EVENT_PAGE, MAX_EVENT_PAGE)
+    events = _event_page_query(db, object_id, after, filters).limit(page_size + 1).all()
+    has_more = len(events) > page_size
+    events = events[:page_size]
+    return EventPage(
+        object_id=object_id,
+        events=[_chain_event(event) for event in events],
+        next_cursor=str(events[-1].chain_height) if has_more else None
+    )
+
+@router.post("/anchor", response_model=AnchorResponse)
+async def anchor_events(
+    namespace: Optional[str] = Query(None, description="Seal only this namespace, e.g. owner:<user_id>"),
+    db: Session = Depends(get_db)
+):
+    """
+    Anchor unanchored events as a new epoch: one batch tree per namespace
+    (built in parallel for large runs) and an epoch root over their roots.
+    """
+    epoch = await run_in_threadpool(anchor_pending_events, db, namespace)
+    if not epoch:
+        raise HTTPException(status_code=400, detail="No unanchored events to anchor")
+    # The epoch root is published to the anchoring backend in the background
+    anchor_submitter.wake()
     
     return AnchorResponse(
-        batch_id=anchor_record["batch_id"],
-        merkle_root=anchor_record["merkle_root"],
-        anchored_at=datetime.fromisoformat(anchor_record["anchored_at"].replace('Z', '+00:00')),
-        event_count=anchor_record["event_count"]
+        epoch_id=epoch["epoch_id"],
+        epoch_root=epoch["epoch_root"],
+        anchored_at=epoch["anchored_at"],
+        event_count=epoch["event_count"],
+        batches=[
+            AnchorBatchSummary(
+                namespace=batch["namespace"],
+                batch_id=batch["batch_id"],
+                merkle_root=batch["merkle_root"],
+                event_count=batch["event_count"]
+            )
+            for batch in epoch["batches"]
+        ]
+    )
+
+@router.get("/anchor/{batch_id}/receipt", response_model=AnchorReceipt)
+async def get_anchor_receipt(batch_id: str, db: Session = Depends(get_db)):
+    """
+    Where a batch was published: its path into the epoch root, and the epoch
+    root's path into the submitted root-of-roots.
+    """
+    batch = db.query(AnchorBatch).filter(AnchorBatch.batch_id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    hop = epoch_proof(db, batch)
+    receipt = {
+        "batch_id": batch_id,
+        "merkle_root": batch.merkle_root,
+        **hop,
+        "epoch_directions": proof_directions(hop["epoch_index"], len(hop["epoch_proof_path"])),
+    }
+    epoch = db.query(AnchorEpoch).filter(AnchorEpoch.epoch_id == batch.epoch_id).first()
+    if not epoch.submission_id:
+        return AnchorReceipt(**receipt, status="queued")
+    
+    submission = db.query(AnchorSubmission).filter(
+        AnchorSubmission.submission_id == epoch.submission_id
+    ).first()
+    proof_path = open_tree(submission.submission_id).proof(epoch.submission_index)
+    confirmations = None
+    if submission.tx_id and submission.backend == anchor_submitter.backend.name:
+        confirmations = await anchor_submitter.backend.confirmations(submission.tx_id)
+    return AnchorReceipt(
+        **receipt,
+        status=submission.status,
+        submission_id=submission.submission_id,
+        backend=submission.backend,
+        root_of_roots=submission.root_of_roots,
+        submission_index=epoch.submission_index,
+        proof_path=proof_path,
+        directions=proof_directions(epoch.submission_index, len(proof_path)),
+        tx_id=submission.tx_id,
+        confirmations=confirmations,
+        attempts=submission.attempts,
+        last_error=submission.last_error,
+        submitted_at=submission.submitted_at,
+        confirmed_at=submission.confirmed_at
+    )
+
+# Upper bound on events per batch proof request
+MAX_PROOF_EVENTS = 10000
+
+@router.get("/events/{event_hash}/proof", response_model=InclusionProofResponse)
+async def get_event_proof(event_hash: str, db: Session = Depends(get_db)):
+    """Inclusion proof for one anchored event, with explicit direction bits."""
+    proof = get_inclusion_proof(db, event_hash)
+    if not proof:
+        raise HTTPException(status_code=404, detail="Event not anchored")
+    
+    batch = db.query(AnchorBatch).filter(AnchorBatch.batch_id == proof["batch_id"]).first()
+    return InclusionProofResponse(
+        **proof,
+        leaf_count=batch.leaf_count,
+        directions=proof_directions(proof["leaf_index"], len(proof["proof_path"])),
+        epoch_directions=proof_directions(proof["epoch_index"], len(proof["epoch_proof_path"]))
+    )
+
+@router.get("/objects/{object_id}/state", response_model=ObjectStateResponse)
+async def get_object_state(
+    object_id: str,
+    at: Optional[datetime] = Query(None, description="ISO timestamp (UTC if no offset); default now"),
+    db: Session = Depends(get_db)
+):
+    """The object's record as of a point in time, replayed from its events, and the event that produced it."""
+    if not db.query(Object.object_id).filter(Object.object_id == object_id).first():
+        raise HTTPException(status_code=404, detail="Object not found")
+    result = state_at(db, object_id, at)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Object has no events at or before this time")
+    
+    state, event = result["state"], result["event"]
+    return ObjectStateResponse(
+        object_id=object_id,
+        at=at,
+        cid=state["cid"],
+        filename=state["filename"],
+        format=state["format"],
+        custodian=state["custodian"],
+        metadata=state["metadata"],
+        event_count=result["event_count"],
+        event_hash=event.event_hash,
+        event_type=event.event_type,
+        event_timestamp=event.timestamp,
+        actor_id=event.actor_id
+    )
+
+@router.get("/objects/{object_id}/ancestry", response_model=AncestryProof)
+async def get_ancestry_proof(
+    object_id: str,
+    ancestor: str = Query(..., description="Event hash of the historical event"),
+    descendant: Optional[str] = Query(None, description="Event hash to prove from (default: chain head)"),
+    db: Session = Depends(get_db)
+):
+    """O(log n) proof that ancestor is in the history of descendant, following signed skip links."""
+    descendant_event = (
+        db.query(Event).filter(Event.event_hash == descendant, Event.object_id == object_id).first()
+        if descendant else get_latest_event(db, object_id)
+    )
+    ancestor_event = db.query(Event).filter(Event.event_hash == ancestor, Event.object_id == object_id).first()
+    if not descendant_event or not ancestor_event:
+        raise HTTPException(status_code=404, detail="Event not found in this object's chain")
+    
+    path = ancestry_path(db, descendant_event, ancestor_event)
+    if path is None:
+        raise HTTPException(status_code=400, detail="Ancestor is not in the descendant's history")
+    return AncestryProof(
+        object_id=object_id,
+        descendant=descendant_event.event_hash,
+        ancestor=ancestor_event.event_hash,
+        hops=len(path) - 1,
+        steps=[
+            AncestryStep(
+                event_hash=event.event_hash,
+                chain_height=event.chain_height,
+                actor_id=event.actor_id,
+                envelope=event_envelope(event).decode("utf-8"),
+                signature_b64=event.signature_b64
+            )
+            for event in path
+        ]
     )
 
+@router.post("/proofs:batch", response_model=BatchProofResponse)
+async def get_batch_proofs_route(request: BatchProofRequest, db: Session = Depends(get_db)):
+    """
+    Proofs for many events at once: one deduplicated multiproof per batch.
+    Pass object_id to cover every event in that object's chain.
+    """
+    event_hashes = list(request.event_hashes)
+    if request.object_id:
+        event_hashes.extend(
+            e.event_hash for e in db.query(Event.event_hash).filter(Event.object_id == request.object_id)
+        )
+    if not event_hashes:
+        raise HTTPException(status_code=400, detail="Provide event_hashes or object_id")
+    if len(event_hashes) > MAX_PROOF_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PROOF_EVENTS} events per request")
+    
+    return await run_in_threadpool(get_batch_proofs, db, event_hashes)
+
 @router.post("/verify", response_model=VerificationReport)
 async def verify_object(
     file: UploadFile = File(...),
@@ -287,10 +597,8 @@ async def verify_object(
             errors=errors
         )
     
-    # Get all events for this object, ordered by timestamp
-    events = db.query(Event).filter(
-        Event.object_id == obj.object_id
-    ).order_by(Event.timestamp.asc()).all()
+    # Events from the latest verification checkpoint on, in chain order
+    checkpoint, events = load_chain(db, obj.object_id)
     
     if not events:
         errors.append("No events found for object")
@@ -303,172 +611,81 @@ async def verify_object(
             errors=errors
         )
     
-    # Validate chain integrity
-    chain_valid = True
-    signatures_valid = True
-    timeline_items = []
-    
-    for i, event in enumerate(events):
-        # Reconstruct event data for verification
-        # Parse payload JSON
-        try:
-            payload = json.loads(event.payload_json)
-        except:
-            payload = {}
-        
-        # Reconstruct timestamp in the same format used for signing
-        # When creating events, we use: timestamp_utc.replace(tzinfo=None).isoformat()
-        # The database stores it as timezone-aware UTC, so we need to convert back to naive UTC
-        import datetime as dt
-        timestamp_dt = event.timestamp
-        if timestamp_dt.tzinfo is not None:
-            # Convert to UTC and make it naive (no timezone) to match signing format
-            # This matches: timestamp_utc.replace(tzinfo=None).isoformat()
-            timestamp_dt = timestamp_dt.astimezone(dt.timezone.utc).replace(tzinfo=None)
-        
-        # Format exactly as .isoformat() would (timezone-naive)
-        timestamp_str = timestamp_dt.isoformat()
-        
-        event_data = {
-            "object_id": event.object_id,
-            "event_type": event.event_type,
-            "prev_event_hash": event.prev_event_hash,
-            "timestamp": timestamp_str,
-            "actor_id": event.actor_id,
-            "payload": payload
-        }
-        
-        # Verify prev_event_hash link
-        if i == 0:
-            if event.prev_event_hash is not None:
-                chain_valid = False
-                errors.append(f"Genesis event {event.event_hash} should have null prev_event_hash")
-        else:
-            prev_event = events[i-1]
-            if event.prev_event_hash != prev_event.event_hash:
-                chain_valid = False
-                errors.append(f"Event {event.event_hash} has incorrect prev_event_hash")
-        
-        # Verify signature
-        sig_valid = False
-        actor = db.query(Actor).filter(Actor.actor_id == event.actor_id).first()
-        if actor:
-            from app.crypto import verify_signature, derive_keypair_from_seed
-            # Always use the derived public key (same as what was used for signing)
-            _, derived_pub_key = derive_keypair_from_seed(f"actor:{event.actor_id}")
-            
-            # Use derived public key for verification (should match what was used for signing)
-            sig_valid = verify_signature(event_data, event.signature_b64, derived_pub_key)
-            
-            if not sig_valid:
-                # If derived key doesn't work, try stored key (for backward compatibility)
-                if actor.pubkey_ed25519 != derived_pub_key:
-                    sig_valid = verify_signature(event_data, event.signature_b64, actor.pubkey_ed25519)
-                    if sig_valid:
-                        # Update actor's public key to match derived one for future consistency
-                        actor.pubkey_ed25519 = derived_pub_key
-                        db.commit()
-            
-            if not sig_valid:
-                signatures_valid = False
-                errors.append(f"Invalid signature for event {event.event_hash}")
-        else:
-            signatures_valid = False
-            errors.append(f"Actor {event.actor_id} not found for event {event.event_hash}")
-        
-        # Check if anchored
-        anchor_proof = db.query(AnchorProof).filter(AnchorProof.event_hash == event.event_hash).first()
-        anchored = anchor_proof is not None
-        batch_id = anchor_proof.batch_id if anchor_proof else None
-        
-        timeline_items.append(EventTimelineItem(
-            event_hash=event.event_hash,
-            event_type=event.event_type,
-            timestamp=event.timestamp,
-            actor_id=event.actor_id,
-            payload=payload,
-            prev_event_hash=event.prev_event_hash,
-            signature_valid=sig_valid,
-            anchored=anchored,
-            batch_id=batch_id
-        ))
-    
-    # Check if any event is anchored
-    anchored = any(item.anchored for item in timeline_items)
+    # Validate chain integrity, starting from the latest verification checkpoint
+    result = verify_chain(db, obj.object_id, events, checkpoint)
+    timeline_items = result["timeline"]
+    
+    # Check if any event is anchored (including the checkpoint's anchored prefix)
+    anchored = any(item.anchored for item in timeline_items) or bool(checkpoint and checkpoint.anchored_count)
     
     return VerificationReport(
         cid_match=cid_match,
-        chain_valid=chain_valid,
-        signatures_valid=signatures_valid,
+        chain_valid=result["chain_valid"],
+        signatures_valid=result["signatures_valid"],
         anchored=anchored,
         timeline=timeline_items,
-        errors=errors
+        errors=errors + result["errors"],
+        checkpoint_chain_length=result["checkpoint"].chain_length if result["checkpoint"] else 0,
+        timeline_start=result["timeline_start"],
+        signatures_checked=result["signatures_checked"]
     )
 
-@router.get("/objects/{object_id}/export.jsonld")
-async def export_jsonld(object_id: str, db: Session = Depends(get_db)):
-    """Export object and provenance events as JSON-LD."""
-    from fastapi.responses import JSONResponse
-    
-    # Get object
+def _chunked_object(db: Session, object_id: str):
     obj = db.query(Object).filter(Object.object_id == object_id).first()
     if not obj:
         raise HTTPException(status_code=404, detail="Object not found")
+    if not obj.chunk_root_sha256:
+        raise HTTPException(status_code=404, detail="Object has no chunk tree")
+    return obj
+
+@router.get("/objects/{object_id}/chunks", response_model=dict)
+async def get_object_chunks(object_id: str, db: Session = Depends(get_db)):
+    """Chunk-tree CID and per-chunk SHA-256 hashes of an object."""
+    obj = _chunked_object(db, object_id)
+    leaves = load_leaves(obj.cid_sha256) or []
+    return {
+        "object_id": object_id,
+        "cid": obj.cid_sha256,
+        "chunk_root": obj.chunk_root_sha256,
+        "chunk_size": obj.chunk_size,
+        "chunks": [leaf.hex() for leaf in leaves]
+    }
+
+@router.get("/objects/{object_id}/fixity", response_model=dict)
+async def check_object_fixity(
+    object_id: str,
+    start: int = Query(0, ge=0, description="First byte of the range to verify"),
+    end: int = Query(None, ge=0, description="Last byte (inclusive); defaults to end of file"),
+    db: Session = Depends(get_db)
+):
+    """Re-hash the stored binary (or just the chunks covering a byte range) and report corrupt chunks."""
+    obj = _chunked_object(db, object_id)
+    path = original_path(obj)
+    if not path or not path.is_file():
+        raise HTTPException(status_code=404, detail="Stored binary not found")
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
     
-    # Get all events
-    events = db.query(Event).filter(
-        Event.object_id == object_id
-    ).order_by(Event.timestamp.asc()).all()
-    
-    # Parse bundle manifest
     try:
-        bundle_manifest = json.loads(obj.bundle_manifest_json)
-    except:
-        bundle_manifest = {}
-    
-    # Build JSON-LD structure
-    jsonld = {
-        "@context": {
-            "@version": 1.1,
-            "dc": "http://purl.org/dc/elements/1.1/",
-            "premis": "http://www.loc.gov/premis/rdf/v1#",
-            "prov": "http://www.w3.org/ns/prov#",
-            "provenance": "urn:provenance:"
-        },
-        "@id": f"urn:object:{object_id}",
-        "@type": "premis:Object",
-        "dc:identifier": object_id,
-        "provenance:cid": obj.cid_sha256,
-        "dc:created": obj.created_at.isoformat(),
-        "premis:objectCharacteristics": bundle_manifest.get("metadata", {}),
-        "prov:wasGeneratedBy": []
-    }
+        report = await run_in_threadpool(
+            verify_range, path, obj.cid_sha256, obj.chunk_root_sha256, obj.chunk_size, start, end
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        # Same as a byte-range request past the end of the media
+        raise HTTPException(status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{path.stat().st_size}"})
     
-    # Add events as provenance activities
-    for event in events:
-        try:
-            payload = json.loads(event.payload_json)
-        except:
-            payload = {}
-        
-        event_node = {
-            "@id": f"urn:provenance:event:{event.event_hash}",
-            "@type": f"provenance:{event.event_type}",
-            "prov:atTime": event.timestamp.isoformat(),
-            "prov:wasAttributedTo": {
-                "@id": f"urn:actor:{event.actor_id}",
-                "provenance:actorId": event.actor_id
-            },
-            "provenance:signature": event.signature_b64,
-            "provenance:payload": payload
-        }
-        
-        if event.prev_event_hash:
-            event_node["prov:wasInformedBy"] = {
-                "@id": f"urn:provenance:event:{event.prev_event_hash}"
-            }
-        
-        jsonld["prov:wasGeneratedBy"].append(event_node)
-    
-    return JSONResponse(content=jsonld, media_type="application/ld+json")
+    return {"object_id": object_id, "chunk_root": obj.chunk_root_sha256, **report}
+
+@router.get("/objects/{object_id}/export.jsonld")
+async def export_jsonld(
+    object_id: str,
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Export object and provenance events as JSON-LD (streamed; gzipped if accepted)."""
+    if not db.query(Object.object_id).filter(Object.object_id == object_id).first():
+        raise HTTPException(status_code=404, detail="Object not found")
+    return jsonld_response(stream_object(object_id), accept_encoding, f"{object_id}.jsonld")
 
@@ -6,10 +6,12 @@ import json
 from datetime import datetime, timezone
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models import (
-    ContributionRequest, User, Object, Submission, ActivityLog
+    ContributionRequest, User, Object, Submission, ActivityLog, FixityCheck
 )
 from app.schemas import (
     ContributionRequestDetail, ApproveRequestRequest, RejectRequestRequest,
@@ -19,8 +21,12 @@ from app.schemas import (
 from app.auth import require_admin
 from app.security import hash_password
 from app.utils import log_activity, get_client_ip, OBJECTS_DIR, BASE_DIR
-from app.crypto import compute_cid, derive_keypair_from_seed
+from app.crypto import compute_cid
+from app.keys import actor_keys
 from app.provenance import create_genesis_event
+from app.media import signed_media_urls
+from app.fixity import fixity_scrubber, check_object, record_result
+from app.anchor_audit import audit_anchors, AUDIT_WORKERS
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -58,6 +64,7 @@ async def list_contribution_requests(
             sample_significance=req.sample_significance,
             sample_references=references,
             sample_photos=photos,
+            sample_photo_urls=signed_media_urls(photos) or [],
             status=req.status,
             submitted_at=req.submitted_at,
             reviewed_by=req.reviewed_by,
@@ -98,6 +105,7 @@ async def get_contribution_request(
         sample_significance=req.sample_significance,
         sample_references=references,
         sample_photos=photos,
+        sample_photo_urls=signed_media_urls(photos) or [],
         status=req.status,
         submitted_at=req.submitted_at,
         reviewed_by=req.reviewed_by,
@@ -183,16 +191,15 @@ async def approve_contribution_request(
     actor_id = f"contributor-{user.user_id}"
     from app.models import Actor
     actor = db.query(Actor).filter(Actor.actor_id == actor_id).first()
+    keys = actor_keys(actor_id)
     if not actor:
-        _, pub_key = derive_keypair_from_seed(f"actor:{actor_id}")
         actor = Actor(
             actor_id=actor_id,
             name=req.name,
-            pubkey_ed25519=pub_key
+            pubkey_ed25519=keys.public_key_b64
         )
         db.add(actor)
     
-    _, private_key = derive_keypair_from_seed(f"actor:{actor_id}")
     create_genesis_event(
         db=db,
         object_id=object_id,
@@ -203,7 +210,7 @@ async def approve_contribution_request(
             "description": req.sample_item_description
         },
         actor_id=actor_id,
-        private_key_b64=private_key
+        private_key_b64=keys.private_key_b64
     )
     
     # Update request
@@ -440,3 +447,69 @@ async def get_stats(
         "pending_requests": pending_requests,
         "pending_submissions": pending_submissions
     }
+
+# Fixity
+
+def _fixity_entry(record: FixityCheck, obj: Optional[Object]) -> dict:
+    return {
+        "object_id": record.object_id,
+        "title": obj.title if obj else None,
+        "cid": obj.cid_sha256 if obj else None,
+        "status": record.status,
+        "checked_at": record.checked_at,
+        "size_bytes": record.size_bytes,
+        "detail": json.loads(record.detail_json) if record.detail_json else None
+    }
+
+@router.get("/fixity")
+async def get_fixity_report(
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Scrub progress and every object whose stored original is corrupt or missing."""
+    counts = dict(db.query(FixityCheck.status, func.count()).group_by(FixityCheck.status).all())
+    total_objects = db.query(Object).filter(Object.cid_sha256 != "").count()
+    oldest = db.query(func.min(FixityCheck.checked_at)).scalar()
+    
+    problems = db.query(FixityCheck, Object).outerjoin(
+        Object, Object.object_id == FixityCheck.object_id
+    ).filter(FixityCheck.status != 'ok').order_by(FixityCheck.checked_at.desc()).all()
+    
+    return {
+        "total_objects": total_objects,
+        "never_checked": max(0, total_objects - sum(counts.values())),
+        "ok": counts.get('ok', 0),
+        "corrupt": counts.get('corrupt', 0),
+        "missing": counts.get('missing', 0),
+        "oldest_check_at": oldest,
+        "scrubber": fixity_scrubber.stats,
+        "problems": [_fixity_entry(record, obj) for record, obj in problems]
+    }
+
+@router.post("/fixity/{object_id}/check")
+async def check_object_fixity_now(
+    object_id: str,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Rehash one object immediately (not throttled) and record the result."""
+    obj = db.query(Object).filter(Object.object_id == object_id).first()
+    if not obj:
+        raise HTTPException(status_code=404, detail="Object not found")
+    if not obj.cid_sha256:
+        raise HTTPException(status_code=400, detail="Object has no CID to check against")
+    
+    result = await run_in_threadpool(check_object, obj)
+    record = record_result(db, obj, result)
+    return _fixity_entry(record, obj)
+
+# Anchor audit
+
+@router.get("/anchors/audit")
+async def audit_anchor_batches(
+    workers: int = Query(AUDIT_WORKERS, ge=1, le=64),
+    check_proofs: bool = Query(True),
+    admin: User = Depends(require_admin)
+):
+    """Rebuild every batch root from the database and cross-check the anchor log and stored proofs."""
+    return await run_in_threadpool(audit_anchors, workers, check_proofs)
@@ -4,6 +4,7 @@ Contribution request routes (public).
 import uuid
 import json
 from datetime import datetime, timezone
+from fastapi.concurrency import run_in_threadpool
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db import get_db
@@ -55,14 +56,14 @@ async def submit_contribution_request(
     
     # Primary photo
     primary_content = await primary_photo.read()
-    primary_path = save_photo(primary_content, REQUESTS_DIR, primary_photo.filename)
+    primary_path = await run_in_threadpool(save_photo, primary_content, REQUESTS_DIR, primary_photo.filename)
     photo_paths.append(primary_path)
     
     # Related photos (max 5)
     if related_photos:
         for i, photo in enumerate(related_photos[:5]):
             content = await photo.read()
-            path = save_photo(content, REQUESTS_DIR, photo.filename)
+            path = await run_in_threadpool(save_photo, content, REQUESTS_DIR, photo.filename)
             photo_paths.append(path)
     
     # Parse references
@@ -5,6 +5,7 @@ import uuid
 import json
 from datetime import datetime, timezone
 from typing import List
+from fastapi.concurrency import run_in_threadpool
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db import get_db
@@ -12,8 +13,11 @@ from app.models import Object, Submission, User
 from app.schemas import ItemCreate, SubmissionResponse, ItemDetail
 from app.auth import require_contributor
 from app.utils import save_photo, log_activity, get_client_ip, OBJECTS_DIR, BASE_DIR
-from app.crypto import compute_cid, derive_keypair_from_seed
+from app.crypto import compute_cid
+from app.keys import actor_keys
 from app.provenance import create_genesis_event
+from app.media import signed_media_url, signed_media_urls, stored_path
+from app.chunks import build_chunk_tree, save_leaves, CHUNK_SIZE
 from app.models import Actor
 
 router = APIRouter(prefix="/my", tags=["contributor"])
@@ -44,7 +48,9 @@ async def my_contributions(
             keywords=keywords,
             references=references,
             primary_photo_path=item.primary_photo_path,
+            primary_photo_url=signed_media_url(item.primary_photo_path),
             related_photos=related_photos,
+            related_photo_urls=signed_media_urls(related_photos),
             created_at=item.created_at,
             published_at=item.published_at
         ))
@@ -98,17 +104,19 @@ async def submit_item(
     
     # Read and save primary photo
     primary_content = await primary_photo.read()
-    primary_path = save_photo(primary_content, OBJECTS_DIR, primary_photo.filename)
+    primary_path = await run_in_threadpool(save_photo, primary_content, OBJECTS_DIR, primary_photo.filename)
     
     # Compute CID from primary photo
     cid = compute_cid(primary_content)
+    chunk_root, leaves = await run_in_threadpool(build_chunk_tree, stored_path(primary_path))
+    save_leaves(cid, leaves)
     
     # Save related photos
     related_photo_paths = []
     if related_photos:
         for photo in related_photos[:5]:
             content = await photo.read()
-            path = save_photo(content, OBJECTS_DIR, photo.filename)
+            path = await run_in_threadpool(save_photo, content, OBJECTS_DIR, photo.filename)
             related_photo_paths.append(path)
     
     # Parse JSON fields
@@ -132,6 +140,8 @@ async def submit_item(
     obj = Object(
         object_id=object_id,
         cid_sha256=cid,
+        chunk_root_sha256=chunk_root,
+        chunk_size=CHUNK_SIZE,
         bundle_manifest_json=json.dumps({
             "title": title,
             "description": description
@@ -156,16 +166,15 @@ async def submit_item(
     # Create genesis event
     actor_id = f"contributor-{user.user_id}"
     actor = db.query(Actor).filter(Actor.actor_id == actor_id).first()
+    keys = actor_keys(actor_id)
     if not actor:
-        _, pub_key = derive_keypair_from_seed(f"actor:{actor_id}")
         actor = Actor(
             actor_id=actor_id,
             name=user.name,
-            pubkey_ed25519=pub_key
+            pubkey_ed25519=keys.public_key_b64
         )
         db.add(actor)
     
-    _, private_key = derive_keypair_from_seed(f"actor:{actor_id}")
     create_genesis_event(
         db=db,
         object_id=object_id,
@@ -176,7 +185,7 @@ async def submit_item(
             "description": description
         },
         actor_id=actor_id,
-        private_key_b64=private_key
+        private_key_b64=keys.private_key_b64
     )
     
     # Create submission
@@ -240,7 +249,9 @@ async def get_my_item(
         keywords=keywords,
         references=references,
         primary_photo_path=item.primary_photo_path,
+        primary_photo_url=signed_media_url(item.primary_photo_path),
         related_photos=related_photos,
+        related_photo_urls=signed_media_urls(related_photos),
         created_at=item.created_at,
         published_at=item.published_at
     )
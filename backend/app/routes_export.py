@@ -0,0 +1,26 @@
+"""
+Bulk JSON-LD export of collections. A collection is every public object
+("public") or the public objects of one contributor (by user id).
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models import User
+from app.jsonld import stream_collection, jsonld_response
+
+router = APIRouter(prefix="/collections", tags=["export"])
+
+@router.get("/{collection}/export.jsonld")
+async def export_collection_jsonld(
+    collection: str,
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """All objects of a collection as one JSON-LD @graph (streamed; gzipped if accepted)."""
+    owner_id = None
+    if collection != "public":
+        if not db.query(User.user_id).filter(User.user_id == collection).first():
+            raise HTTPException(status_code=404, detail="Collection not found")
+        owner_id = collection
+    return jsonld_response(stream_collection(owner_id), accept_encoding, f"{collection}.jsonld")
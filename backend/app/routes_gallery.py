@@ -8,6 +8,7 @@ from sqlalchemy import or_
 from app.db import get_db
 from app.models import Object
 from app.schemas import ItemSummary, ItemDetail
+from app.media import signed_media_url, signed_media_urls, PUBLIC_MEDIA_URL_TTL
 import json
 
 router = APIRouter(prefix="/gallery", tags=["gallery"])
@@ -54,6 +55,7 @@ async def list_items(
             location=item.location,
             culture=item.culture,
             primary_photo_path=item.primary_photo_path,
+            primary_photo_url=signed_media_url(item.primary_photo_path, PUBLIC_MEDIA_URL_TTL),
             date_created=item.date_created
         )
         for item in items
@@ -79,6 +81,9 @@ async def get_item(object_id: str, db: Session = Depends(get_db)):
     references = json.loads(item.references_json) if item.references_json else None
     related_photos = json.loads(item.related_photos_json) if item.related_photos_json else None
     
+    # Only published items get media grants from the public gallery
+    is_public = item.visibility == 'public'
+    
     return ItemDetail(
         object_id=item.object_id,
         title=item.title or "Untitled",
@@ -91,7 +96,9 @@ async def get_item(object_id: str, db: Session = Depends(get_db)):
         keywords=keywords,
         references=references,
         primary_photo_path=item.primary_photo_path,
+        primary_photo_url=signed_media_url(item.primary_photo_path, PUBLIC_MEDIA_URL_TTL) if is_public else None,
         related_photos=related_photos,
+        related_photo_urls=signed_media_urls(related_photos, PUBLIC_MEDIA_URL_TTL) if is_public else None,
         created_at=item.created_at,
         published_at=item.published_at
     )
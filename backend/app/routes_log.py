@@ -0,0 +1,73 @@
+"""
+Transparency log routes (public, for monitors and auditors).
+Modelled on RFC 6962: signed tree heads, inclusion by hash, consistency between sizes.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models import Event, LogTreeHead
+from app.schemas import SignedTreeHead, LogInclusionProof, LogConsistencyProof, LogEntries
+from app.translog import (
+    transparency_log, signed_tree_head, head_dict, log_public_key_b64, leaf_hash, MAX_LOG_ENTRIES
+)
+
+router = APIRouter(prefix="/log", tags=["transparency-log"])
+
+@router.get("/public-key")
+async def get_log_public_key():
+    """Ed25519 key that signs tree heads (base64, raw 32 bytes)."""
+    return {"algorithm": "ed25519", "public_key_b64": log_public_key_b64()}
+
+@router.get("/sth", response_model=SignedTreeHead)
+async def get_signed_tree_head(db: Session = Depends(get_db)):
+    """Signed head for the current log size."""
+    return head_dict(signed_tree_head(db))
+
+@router.get("/sth/{tree_size}", response_model=SignedTreeHead)
+async def get_past_tree_head(tree_size: int, db: Session = Depends(get_db)):
+    """A previously issued tree head."""
+    head = db.query(LogTreeHead).filter(LogTreeHead.tree_size == tree_size).first()
+    if not head:
+        raise HTTPException(status_code=404, detail="No tree head was issued at that size")
+    return head_dict(head)
+
+@router.get("/proof/inclusion", response_model=LogInclusionProof)
+async def get_log_inclusion_proof(
+    event_hash: str = Query(...),
+    tree_size: Optional[int] = Query(None, description="Defaults to the current log size"),
+    db: Session = Depends(get_db)
+):
+    """Audit path for an event in the tree of the given size."""
+    row = db.query(Event.log_index).filter(Event.event_hash == event_hash).first()
+    if not row or row[0] is None:
+        raise HTTPException(status_code=404, detail="Event is not in the log")
+    tree_size = transparency_log.size if tree_size is None else tree_size
+    try:
+        path = transparency_log.inclusion_proof(row[0], tree_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return LogInclusionProof(
+        event_hash=event_hash,
+        leaf_index=row[0],
+        tree_size=tree_size,
+        leaf_hash=leaf_hash(event_hash).hex(),
+        audit_path=[node.hex() for node in path]
+    )
+
+@router.get("/proof/consistency", response_model=LogConsistencyProof)
+async def get_log_consistency_proof(first: int = Query(..., gt=0), second: int = Query(..., gt=0)):
+    """Proof that the tree of size second is an append-only extension of the tree of size first."""
+    try:
+        proof = transparency_log.consistency_proof(first, second)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return LogConsistencyProof(first=first, second=second, proof=[node.hex() for node in proof])
+
+@router.get("/entries", response_model=LogEntries)
+async def get_log_entries(start: int = Query(0, ge=0), end: int = Query(..., gt=0)):
+    """Leaf hashes in [start, end), at most MAX_LOG_ENTRIES per request."""
+    end = min(end, start + MAX_LOG_ENTRIES, transparency_log.size)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="Range is empty or beyond the log")
+    return LogEntries(start=start, leaf_hashes=[leaf.hex() for leaf in transparency_log.entries(start, end)])
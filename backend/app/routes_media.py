@@ -0,0 +1,94 @@
+"""
+Content-addressed media routes: originals by CID and their derivatives.
+"""
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models import Object
+from app.media import (
+    MediaResponse, original_path, derivative_path, offload_headers,
+    verify_media_signature, resolve_data_path,
+    DERIVATIVES, IMMUTABLE_CACHE_CONTROL
+)
+import mimetypes
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+def _serve(request: Request, path, etag: str, cache_control: str = IMMUTABLE_CACHE_CONTROL) -> Response:
+    """Hand a stored file to the proxy, or stream it with range support."""
+    if not path or not path.is_file():
+        raise HTTPException(status_code=404, detail="Media file not found")
+
+    offload = offload_headers(path)
+    if offload:
+        # The proxy handles ranges and sendfile; we only authorize and label
+        return Response(
+            status_code=200,
+            media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+            headers={
+                **offload,
+                "ETag": f'"{etag}"',
+                "Cache-Control": cache_control,
+            }
+        )
+
+    return MediaResponse(
+        path,
+        etag=etag,
+        method=request.method,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range"),
+        if_none_match=request.headers.get("if-none-match"),
+        cache_control=cache_control,
+    )
+
+def _public_object(db: Session, cid: str) -> Object:
+    obj = db.query(Object).filter(
+        Object.cid_sha256 == cid,
+        Object.visibility == 'public'
+    ).first()
+    if not obj:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return obj
+
+@router.api_route("/signed/{path:path}", methods=["GET", "HEAD"])
+async def get_signed(
+    path: str,
+    request: Request,
+    exp: int = Query(...),
+    sig: str = Query(...)
+):
+    """Serve media from a URL minted by signed_media_url. Authorized by HMAC only, no DB lookup."""
+    if not verify_media_signature(path, exp, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired media signature")
+
+    file_path = resolve_data_path(path)
+    if not file_path or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="Media file not found")
+
+    # The grant expires, so shared caches must not keep it past the signature
+    stat = file_path.stat()
+    return _serve(
+        request,
+        file_path,
+        etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+        cache_control=f"private, max-age={max(0, exp - int(time.time()))}"
+    )
+
+@router.api_route("/{cid}", methods=["GET", "HEAD"])
+async def get_original(cid: str, request: Request, db: Session = Depends(get_db)):
+    """Serve the original bytes of a public object by CID (ETag = CID)."""
+    obj = _public_object(db, cid)
+    return _serve(request, original_path(obj), etag=cid)
+
+@router.api_route("/{cid}/{derivative}", methods=["GET", "HEAD"])
+async def get_derivative(cid: str, derivative: str, request: Request, db: Session = Depends(get_db)):
+    """Serve a small/medium/large derivative of a public object's original."""
+    if derivative not in DERIVATIVES:
+        raise HTTPException(status_code=404, detail="Unknown derivative")
+    obj = _public_object(db, cid)
+    original = original_path(obj)
+    path = derivative_path(original, derivative) if original else None
+    return _serve(request, path, etag=f"{cid}-{derivative}")
@@ -0,0 +1,150 @@
+"""
+OAI-PMH 2.0 endpoint for metadata harvesters (GET or form POST on /oai).
+"""
+from typing import Dict
+from xml.sax.saxutils import escape
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models import Object
+from app.oai import (
+    OAIError, METADATA_FORMATS, OAI_BASE_URL, OAI_REPOSITORY_NAME, OAI_ADMIN_EMAIL,
+    envelope, error_xml, earliest_datestamp, list_sets, list_page, parse_date,
+    encode_token, decode_token, object_id_from, public_objects, header_xml, record_xml
+)
+
+router = APIRouter(prefix="/oai", tags=["oai-pmh"])
+
+# Arguments each verb accepts (besides verb); resumptionToken is exclusive
+VERB_ARGUMENTS = {
+    "Identify": set(),
+    "ListMetadataFormats": {"identifier"},
+    "ListSets": {"resumptionToken"},
+    "GetRecord": {"identifier", "metadataPrefix"},
+    "ListIdentifiers": {"metadataPrefix", "from", "until", "set", "resumptionToken"},
+    "ListRecords": {"metadataPrefix", "from", "until", "set", "resumptionToken"},
+}
+
+def _identify(db: Session, args: Dict[str, str]) -> str:
+    return (
+        "<Identify>"
+        f"<repositoryName>{escape(OAI_REPOSITORY_NAME)}</repositoryName>"
+        f"<baseURL>{escape(OAI_BASE_URL)}</baseURL>"
+        "<protocolVersion>2.0</protocolVersion>"
+        f"<adminEmail>{escape(OAI_ADMIN_EMAIL)}</adminEmail>"
+        f"<earliestDatestamp>{earliest_datestamp(db)}</earliestDatestamp>"
+        "<deletedRecord>no</deletedRecord>"
+        "<granularity>YYYY-MM-DDThh:mm:ssZ</granularity>"
+        "</Identify>"
+    )
+
+def _public_object(db: Session, identifier: str) -> Object:
+    object_id = object_id_from(identifier)
+    obj = public_objects(db).filter(Object.object_id == object_id).first() if object_id else None
+    if obj is None:
+        raise OAIError("idDoesNotExist", f"No public record: {identifier}")
+    return obj
+
+def _metadata_formats(db: Session, args: Dict[str, str]) -> str:
+    if "identifier" in args:
+        _public_object(db, args["identifier"])
+    formats = "".join(
+        "<metadataFormat>"
+        f"<metadataPrefix>{prefix}</metadataPrefix>"
+        f"<schema>{spec['schema']}</schema>"
+        f"<metadataNamespace>{spec['metadataNamespace']}</metadataNamespace>"
+        "</metadataFormat>"
+        for prefix, spec in METADATA_FORMATS.items()
+    )
+    return f"<ListMetadataFormats>{formats}</ListMetadataFormats>"
+
+def _list_sets(db: Session, args: Dict[str, str]) -> str:
+    if "resumptionToken" in args:
+        # The set list always fits in one response
+        raise OAIError("badResumptionToken", "ListSets does not issue resumption tokens")
+    sets = list_sets(db)
+    if not sets:
+        raise OAIError("noSetHierarchy", "No sets are defined")
+    body = "".join(f"<set><setSpec>{escape(s)}</setSpec><setName>{escape(s.title())}</setName></set>" for s in sets)
+    return f"<ListSets>{body}</ListSets>"
+
+def _metadata_prefix(args: Dict[str, str]) -> str:
+    if "metadataPrefix" not in args:
+        raise OAIError("badArgument", "metadataPrefix is required")
+    if args["metadataPrefix"] not in METADATA_FORMATS:
+        raise OAIError("cannotDisseminateFormat", f"Unsupported metadataPrefix: {args['metadataPrefix']}")
+    return args["metadataPrefix"]
+
+def _get_record(db: Session, args: Dict[str, str]) -> str:
+    if "identifier" not in args:
+        raise OAIError("badArgument", "identifier is required")
+    prefix = _metadata_prefix(args)
+    obj = _public_object(db, args["identifier"])
+    stored_updated = obj.updated_at.strftime("%Y-%m-%d %H:%M:%S") if obj.updated_at else None
+    return f"<GetRecord>{record_xml(db, obj, stored_updated, prefix)}</GetRecord>"
+
+def _list(db: Session, args: Dict[str, str], verb: str) -> str:
+    if "resumptionToken" in args:
+        state = decode_token(args["resumptionToken"])
+    else:
+        state = {"p": _metadata_prefix(args)}
+        granularities = set()
+        for name, key, is_until in (("from", "f", False), ("until", "u", True)):
+            if name in args:
+                state[key], granularity = parse_date(args[name], name, is_until)
+                granularities.add(granularity)
+        if len(granularities) > 1:
+            raise OAIError("badArgument", "from and until must have the same granularity")
+        if "set" in args:
+            state["s"] = args["set"]
+    rows, next_state = list_page(db, state)
+    if not rows:
+        raise OAIError("noRecordsMatch", "No records match the request")
+    if verb == "ListIdentifiers":
+        items = "".join(header_xml(obj, stored_updated) for obj, stored_updated in rows)
+    else:
+        items = "".join(record_xml(db, obj, stored_updated, state["p"]) for obj, stored_updated in rows)
+    if next_state:
+        items += f"<resumptionToken>{encode_token(next_state)}</resumptionToken>"
+    elif "resumptionToken" in args:
+        # An empty token marks the end of a list that was resumed
+        items += "<resumptionToken/>"
+    return f"<{verb}>{items}</{verb}>"
+
+VERBS = {
+    "Identify": _identify,
+    "ListMetadataFormats": _metadata_formats,
+    "ListSets": _list_sets,
+    "GetRecord": _get_record,
+    "ListIdentifiers": lambda db, args: _list(db, args, "ListIdentifiers"),
+    "ListRecords": lambda db, args: _list(db, args, "ListRecords"),
+}
+
+@router.api_route("", methods=["GET", "POST"])
+async def oai_pmh(request: Request, db: Session = Depends(get_db)):
+    """OAI-PMH 2.0: Identify, ListMetadataFormats, ListSets, GetRecord, ListIdentifiers, ListRecords."""
+    if request.method == "POST":
+        items = list((await request.form()).multi_items())
+    else:
+        items = list(request.query_params.multi_items())
+    verbs = [str(value) for name, value in items if name == "verb"]
+    args = {name: str(value) for name, value in items if name != "verb"}
+    # badVerb and badArgument responses echo no request attributes
+    echoed = {}
+    try:
+        if len(verbs) != 1 or verbs[0] not in VERBS:
+            raise OAIError("badVerb", "Missing, illegal or repeated verb")
+        verb = verbs[0]
+        if len(args) + 1 != len(items):
+            raise OAIError("badArgument", "Repeated argument")
+        unknown = set(args) - VERB_ARGUMENTS[verb]
+        if unknown:
+            raise OAIError("badArgument", f"Illegal argument(s): {', '.join(sorted(unknown))}")
+        if "resumptionToken" in args and len(args) > 1:
+            raise OAIError("badArgument", "resumptionToken is an exclusive argument")
+        echoed = {"verb": verb, **args}
+        body = VERBS[verb](db, args)
+    except OAIError as error:
+        body = error_xml(error)
+    return Response(content=envelope(echoed, body), media_type="text/xml; charset=utf-8")
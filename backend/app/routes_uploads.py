@@ -0,0 +1,192 @@
+"""
+Resumable upload routes (tus 1.0 core protocol plus termination).
+Create with POST, send chunks with PATCH, poll with HEAD, then finalize into /ingest.
+"""
+import base64
+import binascii
+import os
+from email.utils import formatdate
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.db import get_db
+from app.models import Actor
+from app.schemas import IngestResponse
+from app.routes import ingest_binary
+from app.uploads import (
+    UploadConflict, UploadSession, create_session, get_session, drop_session,
+    MAX_UPLOAD_BYTES
+)
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+TUS_VERSION = "1.0.0"
+
+class FinalizeUploadRequest(BaseModel):
+    private_key: Optional[str] = None  # MVP: same semantics as /ingest
+
+def _parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Decode tus Upload-Metadata: comma-separated 'key base64value' pairs."""
+    metadata = {}
+    if not header:
+        return metadata
+    for pair in header.split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value).decode("utf-8") if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for {key}")
+    return metadata
+
+def _status_headers(session: UploadSession) -> Dict[str, str]:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Upload-Expires": formatdate(session.expires_at, usegmt=True),
+        # Extension for parallel clients: which byte ranges already arrived
+        "Upload-Ranges": ",".join(f"{s}-{e - 1}" for s, e in session.ranges),
+        "Cache-Control": "no-store",
+    }
+
+def _get_or_404(upload_id: str) -> UploadSession:
+    session = get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return session
+
+@router.options("")
+async def upload_capabilities():
+    """tus discovery."""
+    return Response(status_code=204, headers={
+        "Tus-Resumable": TUS_VERSION,
+        "Tus-Version": TUS_VERSION,
+        "Tus-Extension": "creation,expiration,termination",
+        "Tus-Max-Size": str(MAX_UPLOAD_BYTES),
+    })
+
+@router.post("", status_code=201)
+async def create_upload(
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a resumable upload. Upload-Metadata must carry filename and actor_id,
+    and may carry content_type and metadata (JSON string, as for /ingest).
+    """
+    metadata = _parse_upload_metadata(upload_metadata)
+    if not metadata.get("filename") or not metadata.get("actor_id"):
+        raise HTTPException(status_code=400, detail="Upload-Metadata requires filename and actor_id")
+
+    # Fail before any bytes are sent rather than at finalize
+    actor = db.query(Actor).filter(Actor.actor_id == metadata["actor_id"]).first()
+    if not actor:
+        raise HTTPException(status_code=404, detail="Actor not found")
+
+    try:
+        session = await run_in_threadpool(create_session, upload_length, metadata)
+    except UploadConflict as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    headers = _status_headers(session)
+    headers["Location"] = f"/uploads/{session.upload_id}"
+    return Response(status_code=201, headers=headers)
+
+@router.head("/{upload_id}")
+async def upload_status(upload_id: str):
+    """Current offset (and received ranges) so a client can resume."""
+    session = _get_or_404(upload_id)
+    return Response(status_code=200, headers=_status_headers(session))
+
+@router.patch("/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_length: int = Header(...),
+    content_type: str = Header(...)
+):
+    """
+    Write a chunk at Upload-Offset. Sequential clients send the current offset;
+    parallel clients may send any gap listed as missing by Upload-Ranges.
+    Bytes are persisted as they stream in, so a dropped chunk keeps what arrived;
+    bytes already received are skipped, so a chunk can be resent whole.
+    """
+    if content_type != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    session = _get_or_404(upload_id)
+
+    try:
+        hashing = session.begin_write(upload_offset, content_length)
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    offset = upload_offset
+    try:
+        async for block in request.stream():
+            if not block:
+                continue
+            if offset + len(block) > upload_offset + content_length:
+                raise HTTPException(status_code=400, detail="Body longer than Content-Length")
+            await run_in_threadpool(session.write, offset, block, hashing)
+            offset += len(block)
+    finally:
+        await run_in_threadpool(session.end_write, upload_offset, content_length, hashing)
+
+    headers = _status_headers(session)
+    return Response(status_code=204, headers=headers)
+
+@router.delete("/{upload_id}", status_code=204)
+async def terminate_upload(upload_id: str):
+    """Abandon an upload and free its storage."""
+    session = _get_or_404(upload_id)
+    await run_in_threadpool(drop_session, session)
+    return Response(status_code=204, headers={"Tus-Resumable": TUS_VERSION})
+
+@router.post("/{upload_id}/ingest", response_model=IngestResponse)
+async def finalize_upload(
+    upload_id: str,
+    body: FinalizeUploadRequest = FinalizeUploadRequest(),
+    db: Session = Depends(get_db)
+):
+    """Ingest a completed upload through the normal /ingest path (moves the file, no re-read)."""
+    session = _get_or_404(upload_id)
+    if not session.complete:
+        raise HTTPException(status_code=409, detail=f"Upload incomplete: {session.offset}/{session.length} bytes")
+
+    cid = await run_in_threadpool(session.digest)
+    metadata = session.metadata
+
+    moved = []
+
+    def move_into_place(path):
+        os.replace(session.part_path, path)
+        moved.append(path)
+
+    try:
+        # Chunk-tree hashing re-reads the whole file; keep it off the event loop
+        response = await run_in_threadpool(
+            ingest_binary,
+            db=db,
+            cid=cid,
+            filename=os.path.basename(metadata["filename"]),
+            content_type=metadata.get("content_type"),
+            metadata=metadata.get("metadata", "{}"),
+            actor_id=metadata["actor_id"],
+            private_key=body.private_key,
+            write_binary=move_into_place
+        )
+    except Exception:
+        # Put the bytes back so the completed upload can be finalized again
+        if moved and moved[0].exists():
+            os.replace(moved[0], session.part_path)
+        raise
+
+    drop_session(session)
+    return response
@@ -27,6 +27,14 @@ class IngestResponse(BaseModel):
     cid: str
     genesis_event_hash: str
 
+# CID lookup schemas
+class CidLookupRequest(BaseModel):
+    cids: List[str]
+
+class CidLookupResponse(BaseModel):
+    found: Dict[str, Optional[str]]  # cid -> object_id (None for private objects)
+    missing: List[str]
+
 # Event schemas
 class EventCreate(BaseModel):
     event_type: str  # INGESTION, METADATA_EDIT, MIGRATION, CUSTODY_TRANSFER
@@ -36,12 +44,162 @@ class EventCreate(BaseModel):
 class EventResponse(BaseModel):
     event_hash: str
 
+class ChainEvent(BaseModel):
+    event_hash: str
+    chain_height: int  # Position in the object's chain, genesis = 0
+    seq: Optional[int]
+    event_type: str
+    timestamp: datetime
+    actor_id: str
+    payload: Dict[str, Any]
+    prev_event_hash: Optional[str]
+    signature_b64: str
+    anchored: bool
+    batch_id: Optional[str]
+
+class EventPage(BaseModel):
+    object_id: str
+    events: List[ChainEvent]
+    next_cursor: Optional[str]  # Pass back as cursor for the next page; None at the end
+
 # Anchor schemas
-class AnchorResponse(BaseModel):
+class AnchorBatchSummary(BaseModel):
+    namespace: str
     batch_id: str
     merkle_root: str
+    event_count: int
+
+class AnchorResponse(BaseModel):
+    epoch_id: str
+    epoch_root: str  # Root over the batch roots, in namespace order
     anchored_at: datetime
     event_count: int
+    batches: List[AnchorBatchSummary]
+
+class AnchorReceipt(BaseModel):
+    batch_id: str
+    merkle_root: str
+    namespace: Optional[str] = None
+    epoch_id: str
+    epoch_root: str
+    epoch_index: int
+    epoch_proof_path: List[str]  # Batch root -> epoch root
+    epoch_directions: List[int]
+    status: str  # 'queued' until the epoch root is part of a submission, then the submission's status
+    submission_id: Optional[str] = None
+    backend: Optional[str] = None
+    root_of_roots: Optional[str] = None
+    submission_index: Optional[int] = None
+    proof_path: List[str] = []  # Epoch root -> root_of_roots, same format as inclusion proofs
+    directions: List[int] = []
+    tx_id: Optional[str] = None
+    confirmations: Optional[int] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    confirmed_at: Optional[datetime] = None
+
+# Proof schemas
+class InclusionProofResponse(BaseModel):
+    event_hash: str
+    batch_id: str
+    merkle_root: str
+    leaf_index: int
+    leaf_count: int
+    proof_path: List[str]  # Sibling hashes, leaf level first
+    directions: List[int]  # Per step: 1 = sibling is on the left, 0 = on the right
+    anchored_at: datetime
+    # Second hop: merkle_root (the namespace batch root) -> epoch_root
+    namespace: Optional[str] = None
+    epoch_id: str
+    epoch_root: str
+    epoch_index: int
+    epoch_proof_path: List[str]
+    epoch_directions: List[int]
+
+class BatchProofRequest(BaseModel):
+    event_hashes: List[str] = []
+    object_id: Optional[str] = None  # Include every event in this object's chain
+
+class ProofLeaf(BaseModel):
+    event_hash: str
+    leaf_index: int
+
+class ProofNode(BaseModel):
+    level: int  # 0 = leaves
+    index: int
+    hash: str
+
+class BatchMultiproof(BaseModel):
+    batch_id: str
+    merkle_root: str
+    leaf_count: int
+    anchored_at: datetime
+    leaves: List[ProofLeaf]
+    nodes: List[ProofNode]  # Deduplicated; with the leaves, enough to recompute merkle_root
+    namespace: Optional[str] = None
+    epoch_id: str
+    epoch_root: str
+    epoch_index: int
+    epoch_proof_path: List[str]  # merkle_root -> epoch_root
+
+class BatchProofResponse(BaseModel):
+    batches: List[BatchMultiproof]
+    unanchored: List[str]
+
+# Object state (event-sourced projection)
+class ObjectStateResponse(BaseModel):
+    object_id: str
+    at: Optional[datetime]  # None = current state
+    cid: Optional[str]
+    filename: Optional[str]
+    format: Optional[str]
+    custodian: Optional[str]
+    metadata: Dict[str, Any]
+    event_count: int  # Events folded in, genesis included
+    # The last event at or before `at`, which produced this state
+    event_hash: str
+    event_type: str
+    event_timestamp: datetime
+    actor_id: str
+
+# Ancestry proof schemas
+class AncestryStep(BaseModel):
+    event_hash: str
+    chain_height: Optional[int]
+    actor_id: str
+    envelope: str  # Canonical JSON that event_hash and the signature cover
+    signature_b64: str
+
+class AncestryProof(BaseModel):
+    object_id: str
+    descendant: str
+    ancestor: str
+    hops: int
+    steps: List[AncestryStep]  # Descendant first; each next event is a prev or skip link of the one before
+
+# Transparency log schemas
+class SignedTreeHead(BaseModel):
+    tree_size: int
+    root_hash: str
+    timestamp: str  # Exactly as signed
+    signature_b64: str  # Ed25519 over canonical JSON of tree_size, root_hash, timestamp
+
+class LogInclusionProof(BaseModel):
+    event_hash: str
+    leaf_index: int
+    tree_size: int
+    leaf_hash: str  # SHA-256(0x00 || event hash bytes)
+    audit_path: List[str]
+
+class LogConsistencyProof(BaseModel):
+    first: int
+    second: int
+    proof: List[str]
+
+class LogEntries(BaseModel):
+    start: int
+    leaf_hashes: List[str]
 
 # Verify schemas
 class VerifyRequest(BaseModel):
@@ -65,6 +223,9 @@ class VerificationReport(BaseModel):
     anchored: bool
     timeline: List[EventTimelineItem]
     errors: List[str]
+    checkpoint_chain_length: int = 0  # Events trusted from a verification checkpoint
+    timeline_start: int = 0  # Chain height of the first timeline event (later than 0 after a checkpoint)
+    signatures_checked: int = 0
 
 # JSON-LD export (will be returned as raw JSON, not Pydantic model)
 
@@ -97,6 +258,7 @@ class ItemSummary(BaseModel):
     location: Optional[str] = None
     culture: Optional[str] = None
     primary_photo_path: Optional[str] = None
+    primary_photo_url: Optional[str] = None  # Signed, time-limited
     date_created: Optional[str] = None
     
     class Config:
@@ -108,6 +270,7 @@ class ItemDetail(ItemSummary):
     keywords: Optional[List[str]] = None
     references: Optional[List[str]] = None
     related_photos: Optional[List[str]] = None
+    related_photo_urls: Optional[List[str]] = None  # Signed, time-limited
     created_at: datetime
     published_at: Optional[datetime] = None
     
@@ -171,6 +334,7 @@ class ContributionRequestDetail(ContributionRequestResponse):
     sample_significance: Optional[str] = None
     sample_references: Optional[List[str]] = None
     sample_photos: List[str]
+    sample_photo_urls: List[str] = []  # Signed, time-limited
     reviewed_by: Optional[str] = None
     reviewed_at: Optional[datetime] = None
     admin_notes: Optional[str] = None
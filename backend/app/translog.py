@@ -0,0 +1,382 @@
+"""
+Transparency log: one append-only RFC 6962 Merkle tree over every event hash.
+Anchor batches are separate trees; this log lets a monitor check, with
+O(log n) hashes, that a newer tree head extends an older one.
+
+Storage is one file per level in data/translog/. level_k.bin holds the hash of
+every complete, aligned subtree of 2^k leaves, so an append writes the leaf
+plus one node per level it completes. It never recomputes the tree.
+Roots and proofs for any tree size are assembled from these perfect subtrees.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from cryptography.hazmat.primitives import serialization
+from sqlalchemy.orm import Session
+from app.auth import SECRET_KEY
+from app.crypto import canonical_json
+from app.db import DATA_DIR
+from app.models import Event, LogTreeHead
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are serialised within this process only
+    fcntl = None
+
+LOG_DIR = DATA_DIR / "translog"
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+LOCK_PATH = LOG_DIR / "append.lock"
+NODE_SIZE = 32
+
+# Ed25519 seed (base64) for tree heads; derived from the JWT key unless set
+LOG_SIGNING_KEY = os.getenv("TRANSLOG_SIGNING_KEY", "")
+# Most leaf hashes returned by one entries request
+MAX_LOG_ENTRIES = 1000
+
+def leaf_hash(event_hash: str) -> bytes:
+    """RFC 6962 leaf hash: SHA-256(0x00 || entry). The entry is the raw event hash."""
+    return hashlib.sha256(b"\x00" + bytes.fromhex(event_hash)).digest()
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """RFC 6962 interior node: SHA-256(0x01 || left || right)."""
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def _split(size: int) -> int:
+    """Largest power of two strictly below size (size > 1)."""
+    return 1 << ((size - 1).bit_length() - 1)
+
+class TransparencyLog:
+    """Append-only Merkle log backed by per-level files."""
+
+    def __init__(self, directory: Path = LOG_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._repair()
+
+    def _level_path(self, level: int) -> Path:
+        return self.directory / f"level_{level}.bin"
+
+    def _level_count(self, level: int) -> int:
+        path = self._level_path(level)
+        return path.stat().st_size // NODE_SIZE if path.exists() else 0
+
+    @property
+    def size(self) -> int:
+        """Number of leaves appended so far."""
+        return self._level_count(0)
+
+    def _read(self, level: int, index: int) -> bytes:
+        with open(self._level_path(level), "rb") as f:
+            node = os.pread(f.fileno(), NODE_SIZE, index * NODE_SIZE)
+        if len(node) != NODE_SIZE:
+            raise IndexError(f"Log node ({level}, {index}) is not stored")
+        return node
+
+    def _repair(self):
+        """
+        Bring the level files back in line after an interrupted append. Partial
+        nodes are cut off and missing parents are recomputed from the level below.
+        """
+        level = 0
+        while True:
+            path = self._level_path(level)
+            if not path.exists():
+                if level and self._level_count(level - 1) < 2:
+                    return
+                path.touch()
+            with open(path, "r+b") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size % NODE_SIZE:
+                    f.truncate(size - size % NODE_SIZE)
+            if level:
+                expected = self._level_count(level - 1) // 2
+                count = self._level_count(level)
+                if count > expected:
+                    with open(path, "r+b") as f:
+                        f.truncate(expected * NODE_SIZE)
+                elif count < expected:
+                    with open(path, "ab") as f:
+                        for index in range(count, expected):
+                            f.write(node_hash(self._read(level - 1, 2 * index), self._read(level - 1, 2 * index + 1)))
+            if self._level_count(level) < 2:
+                return
+            level += 1
+
+    @contextmanager
+    def _writer(self):
+        """Serialise appends across threads and, where supported, processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(LOCK_PATH, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, event_hashes: Iterable[str]) -> int:
+        """
+        Append entries in order. Returns the index of the first one.
+        Each leaf costs one write per subtree it completes (amortised O(1)).
+        """
+        leaves = [leaf_hash(h) for h in event_hashes]
+        with self._writer():
+            first = self.size
+            files: Dict[int, object] = {}
+            try:
+                def level_file(level: int):
+                    if level not in files:
+                        files[level] = open(self._level_path(level), "ab")
+                    return files[level]
+
+                # Right edge of each level not yet paired, carried across the batch
+                pending: Dict[int, bytes] = {}
+                index = first
+                for leaf in leaves:
+                    level_file(0).write(leaf)
+                    node, position, level = leaf, index, 0
+                    while position % 2:
+                        left = pending.pop(level, None)
+                        if left is None:
+                            level_file(level).flush()
+                            left = self._read(level, position - 1)
+                        node = node_hash(left, node)
+                        position //= 2
+                        level += 1
+                        level_file(level).write(node)
+                    pending[level] = node
+                    index += 1
+                for f in files.values():
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                for f in files.values():
+                    f.close()
+        return first
+
+    def subtree_hash(self, start: int, end: int) -> bytes:
+        """
+        MTH(D[start:end]) in RFC 6962 shape. Complete aligned subtrees are single
+        reads; every range a proof needs decomposes into O(log n) of them.
+        """
+        size = end - start
+        if size <= 0:
+            raise ValueError("Empty range")
+        if size & (size - 1) == 0 and start % size == 0:
+            return self._read(size.bit_length() - 1, start // size)
+        k = _split(size)
+        return node_hash(self.subtree_hash(start, start + k), self.subtree_hash(start + k, end))
+
+    def root(self, tree_size: int) -> bytes:
+        if tree_size == 0:
+            return hashlib.sha256(b"").digest()
+        return self.subtree_hash(0, tree_size)
+
+    def _check_size(self, tree_size: int):
+        if not 0 <= tree_size <= self.size:
+            raise ValueError(f"Tree size {tree_size} is beyond the log ({self.size} entries)")
+
+    def inclusion_proof(self, leaf_index: int, tree_size: int) -> List[bytes]:
+        """Audit path for a leaf in the tree of the given size (RFC 6962 2.1.1)."""
+        self._check_size(tree_size)
+        if not 0 <= leaf_index < tree_size:
+            raise ValueError(f"Leaf {leaf_index} is not in a tree of size {tree_size}")
+        path = []
+        start, end = 0, tree_size
+        while end - start > 1:
+            k = _split(end - start)
+            if leaf_index < start + k:
+                path.append(self.subtree_hash(start + k, end))
+                end = start + k
+            else:
+                path.append(self.subtree_hash(start, start + k))
+                start += k
+        path.reverse()
+        return path
+
+    def consistency_proof(self, first: int, second: int) -> List[bytes]:
+        """Proof that the tree of size second extends the tree of size first (RFC 6962 2.1.2)."""
+        self._check_size(second)
+        if not 0 < first <= second:
+            raise ValueError("Consistency needs 0 < first <= second")
+        proof = []
+
+        def subproof(m: int, start: int, end: int, whole: bool):
+            if m == end - start:
+                if not whole:
+                    proof.append(self.subtree_hash(start, end))
+                return
+            k = _split(end - start)
+            if m <= k:
+                subproof(m, start, start + k, whole)
+                proof.append(self.subtree_hash(start + k, end))
+            else:
+                subproof(m - k, start + k, end, False)
+                proof.append(self.subtree_hash(start, start + k))
+
+        subproof(first, 0, second, True)
+        return proof
+
+    def entries(self, start: int, end: int) -> List[bytes]:
+        """Leaf hashes in [start, end) for monitors replaying the log."""
+        with open(self._level_path(0), "rb") as f:
+            data = os.pread(f.fileno(), (end - start) * NODE_SIZE, start * NODE_SIZE)
+        return [data[i:i + NODE_SIZE] for i in range(0, len(data), NODE_SIZE)]
+
+def verify_inclusion(leaf: bytes, leaf_index: int, tree_size: int, proof: List[bytes], root: bytes) -> bool:
+    """Client-side check of an inclusion proof (RFC 9162 2.1.3.2)."""
+    if leaf_index >= tree_size:
+        return False
+    fn, sn, node = leaf_index, tree_size - 1, leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn % 2 or fn == sn:
+            node = node_hash(sibling, node)
+            if not fn % 2:
+                while fn % 2 == 0 and fn:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            node = node_hash(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node == root
+
+def verify_consistency(first: int, second: int, first_root: bytes, second_root: bytes, proof: List[bytes]) -> bool:
+    """Client-side check of a consistency proof (RFC 9162 2.1.4.2)."""
+    if first == second:
+        return not proof and first_root == second_root
+    if not 0 < first < second or not proof:
+        return False
+    if first & (first - 1) == 0:
+        proof = [first_root] + proof
+    fn, sn = first - 1, second - 1
+    while fn % 2:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = proof[0]
+    for node in proof[1:]:
+        if sn == 0:
+            return False
+        if fn % 2 or fn == sn:
+            fr = node_hash(node, fr)
+            sr = node_hash(node, sr)
+            if not fn % 2:
+                while fn % 2 == 0 and fn:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            sr = node_hash(sr, node)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and fr == first_root and sr == second_root
+
+def _log_private_key() -> Ed25519PrivateKey:
+    seed = (
+        base64.b64decode(LOG_SIGNING_KEY) if LOG_SIGNING_KEY
+        else hmac.new(SECRET_KEY.encode("utf-8"), b"transparency-log-signing", hashlib.sha256).digest()
+    )
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+_signing_key = _log_private_key()
+
+def log_public_key_b64() -> str:
+    return base64.b64encode(_signing_key.public_key().public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )).decode("ascii")
+
+def tree_head_payload(tree_size: int, root_hash: str, timestamp: str) -> dict:
+    """The exact fields a tree head signature covers (signed as canonical JSON)."""
+    return {"tree_size": tree_size, "root_hash": root_hash, "timestamp": timestamp}
+
+def verify_tree_head(head: dict, public_key_b64: str) -> bool:
+    try:
+        public_key = Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_b64))
+        public_key.verify(
+            base64.b64decode(head["signature_b64"]),
+            canonical_json(tree_head_payload(head["tree_size"], head["root_hash"], head["timestamp"]))
+        )
+        return True
+    except Exception:
+        return False
+
+transparency_log = TransparencyLog()
+
+def head_dict(head: LogTreeHead) -> dict:
+    return {
+        "tree_size": head.tree_size,
+        "root_hash": head.root_hash,
+        "timestamp": head.timestamp,
+        "signature_b64": head.signature_b64,
+    }
+
+def signed_tree_head(db: Session) -> LogTreeHead:
+    """The head for the current log size, signing and storing a new one if the log grew."""
+    tree_size = transparency_log.size
+    head = db.query(LogTreeHead).filter(LogTreeHead.tree_size == tree_size).first()
+    if head:
+        return head
+    root_hash = transparency_log.root(tree_size).hex()
+    timestamp = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    signature = _signing_key.sign(canonical_json(tree_head_payload(tree_size, root_hash, timestamp)))
+    head = LogTreeHead(
+        tree_size=tree_size,
+        root_hash=root_hash,
+        timestamp=timestamp,
+        signature_b64=base64.b64encode(signature).decode("ascii")
+    )
+    db.add(head)
+    db.commit()
+    return head
+
+def log_events(db: Session, events: List[Event]):
+    """Append committed events to the log and record their positions."""
+    events = [event for event in events if event.log_index is None]
+    if not events:
+        return
+    first = transparency_log.append(event.event_hash for event in events)
+    for offset, event in enumerate(events):
+        event.log_index = first + offset
+    db.commit()
+
+def sync_log(db: Session, batch_size: int = 5000) -> int:
+    """
+    Log every event without a position (existing events, or appends interrupted
+    between the file write and the commit). Returns how many were positioned.
+    """
+    # Leaves written after the last recorded position belong to an interrupted append
+    last = db.query(Event.log_index).filter(Event.log_index.isnot(None)).order_by(Event.log_index.desc()).first()
+    tail_start = last[0] + 1 if last else 0
+    tail = {
+        leaf: tail_start + offset
+        for offset, leaf in enumerate(transparency_log.entries(tail_start, transparency_log.size))
+    }
+
+    positioned = 0
+    while True:
+        events = db.query(Event).filter(Event.log_index.is_(None)).order_by(
+            Event.seq, Event.timestamp, Event.event_hash
+        ).limit(batch_size).all()
+        if not events:
+            return positioned
+        new = []
+        for event in events:
+            index = tail.pop(leaf_hash(event.event_hash), None)
+            if index is None:
+                new.append(event)
+            else:
+                event.log_index = index
+        db.commit()
+        log_events(db, new)
+        positioned += len(events)
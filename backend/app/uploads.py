@@ -0,0 +1,250 @@
+"""
+Resumable (tus-style) uploads: persisted partial chunks, incremental SHA-256 and session expiry.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+UPLOAD_DIR = BASE_DIR / "data" / "uploads"
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+# Abandoned sessions are purged after this long without a chunk
+UPLOAD_TTL_SECONDS = int(os.getenv("UPLOAD_TTL_SECONDS", str(24 * 3600)))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(64 * 1024 ** 3)))
+
+HASH_READ_SIZE = 4 * 1024 * 1024
+
+class UploadConflict(Exception):
+    """Chunk offset is not acceptable for this session."""
+
+class UploadSession:
+    """
+    One resumable upload. Chunks may arrive out of order (parallel clients);
+    the SHA-256 advances over the contiguous prefix as gaps fill, hashing
+    in-order chunks straight from the request stream.
+
+    Received bytes are never rewritten, since they may already be hashed: a
+    chunk that overlaps them (e.g. resent after a dropped connection) only
+    writes its missing parts. Chunks in flight at the same time may not overlap.
+
+    hashlib state can't be serialised, so after a restart the hash is rebuilt
+    from the bytes already on disk the first time the session is touched.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state
+        self.upload_id = state["upload_id"]
+        self.part_path = UPLOAD_DIR / f"{self.upload_id}.part"
+        self.state_path = UPLOAD_DIR / f"{self.upload_id}.json"
+        self._lock = threading.Lock()       # guards state
+        self._hash_lock = threading.Lock()  # held by whoever feeds the hasher
+        self._hasher = hashlib.sha256()
+        self._hashed_offset = 0
+        self._writing: List[Tuple[int, int]] = []  # (offset, end) of chunks being written, under _lock
+
+    @property
+    def length(self) -> int:
+        return self.state["length"]
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        return self.state["metadata"]
+
+    @property
+    def expires_at(self) -> float:
+        return self.state["expires_at"]
+
+    @property
+    def ranges(self) -> List[List[int]]:
+        """Received half-open byte ranges, sorted and merged."""
+        return self.state["ranges"]
+
+    @property
+    def offset(self) -> int:
+        """Length of the contiguous prefix received so far (tus Upload-Offset)."""
+        ranges = self.ranges
+        return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+    def save(self):
+        """Persist state atomically next to the partial file."""
+        tmp = self.state_path.with_suffix(".json.tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(self.state))
+            os.replace(tmp, self.state_path)
+
+    def _record(self, start: int, end: int):
+        with self._lock:
+            merged = []
+            for s, e in sorted(self.ranges + [[start, end]]):
+                if merged and s <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], e)
+                else:
+                    merged.append([s, e])
+            self.state["ranges"] = merged
+            self.state["expires_at"] = time.time() + UPLOAD_TTL_SECONDS
+
+    def _missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """The parts of [start, end) not received yet (called under the lock)."""
+        parts = []
+        for s, e in self.ranges:
+            if e <= start:
+                continue
+            if s >= end:
+                break
+            if s > start:
+                parts.append((start, s))
+            start = max(start, e)
+        if start < end:
+            parts.append((start, end))
+        return parts
+
+    def begin_write(self, offset: int, size: int) -> bool:
+        """
+        Validate and reserve a chunk, and reserve the hasher if the chunk covers
+        the end of the hashed prefix. Returns True if the caller should feed
+        bytes to the hasher via write(). Pair with end_write().
+        """
+        if offset < 0 or offset + size > self.length:
+            raise UploadConflict(f"Chunk {offset}+{size} exceeds Upload-Length {self.length}")
+        with self._lock:
+            for start, end in self._writing:
+                if start < offset + size and offset < end:
+                    raise UploadConflict(f"Chunk {offset}+{size} overlaps a chunk still being written")
+            self._writing.append((offset, offset + size))
+        return offset <= self._hashed_offset < offset + size and self._hash_lock.acquire(blocking=False)
+
+    def write(self, offset: int, data: bytes, hashing: bool):
+        """Persist the parts of one block at offset not received yet (may run concurrently with other chunks)."""
+        with self._lock:
+            parts = self._missing(offset, offset + len(data))
+        if not parts:
+            return
+        view = memoryview(data)
+        fd = os.open(self.part_path, os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            for start, end in parts:
+                os.pwrite(fd, view[start - offset:end - offset], start)
+        finally:
+            os.close(fd)
+        for start, end in parts:
+            # Only bytes that extend the hashed prefix; the rest is caught up from disk
+            if hashing and start == self._hashed_offset:
+                self._hasher.update(view[start - offset:end - offset])
+                self._hashed_offset = end
+            self._record(start, end)
+
+    def end_write(self, offset: int, size: int, hashing: bool):
+        """Release the chunk and the hasher, catch it up over any now-contiguous bytes and persist state."""
+        with self._lock:
+            self._writing.remove((offset, offset + size))
+        if hashing:
+            self._hash_lock.release()
+        self.advance_hash()
+        self.save()
+
+    def advance_hash(self):
+        """Hash any received bytes that now extend the contiguous prefix."""
+        if not self._hash_lock.acquire(blocking=False):
+            return  # another writer is feeding the hasher and will catch up
+        try:
+            target = self.offset
+            if self._hashed_offset >= target:
+                return
+            with open(self.part_path, "rb") as f:
+                f.seek(self._hashed_offset)
+                while self._hashed_offset < target:
+                    block = f.read(min(HASH_READ_SIZE, target - self._hashed_offset))
+                    if not block:
+                        break
+                    self._hasher.update(block)
+                    self._hashed_offset += len(block)
+        finally:
+            self._hash_lock.release()
+
+    def digest(self) -> str:
+        """SHA-256 of the completed upload."""
+        self.advance_hash()
+        with self._hash_lock:
+            if self._hashed_offset != self.length:
+                raise UploadConflict("Upload is not complete")
+            return self._hasher.copy().hexdigest()
+
+    def discard(self):
+        """Remove the partial file and state."""
+        for path in (self.part_path, self.state_path):
+            path.unlink(missing_ok=True)
+
+# Live sessions in this process; state files are the source of truth
+_sessions: Dict[str, UploadSession] = {}
+_sessions_lock = threading.Lock()
+
+def create_session(length: int, metadata: Dict[str, str]) -> UploadSession:
+    """Start a new upload of the given total length."""
+    if length < 0 or length > MAX_UPLOAD_BYTES:
+        raise UploadConflict(f"Upload-Length must be between 0 and {MAX_UPLOAD_BYTES}")
+    purge_expired()
+
+    session = UploadSession({
+        "upload_id": uuid.uuid4().hex,
+        "length": length,
+        "metadata": metadata,
+        "ranges": [],
+        "created_at": time.time(),
+        "expires_at": time.time() + UPLOAD_TTL_SECONDS,
+    })
+    # Preallocate so parallel chunks can land at any offset
+    with open(session.part_path, "wb") as f:
+        f.truncate(length)
+    session.save()
+    with _sessions_lock:
+        _sessions[session.upload_id] = session
+    return session
+
+def get_session(upload_id: str) -> Optional[UploadSession]:
+    """Load a live session (from memory or disk); None if unknown or expired."""
+    if not upload_id.isalnum():
+        return None
+    with _sessions_lock:
+        session = _sessions.get(upload_id)
+        if session is None:
+            state_path = UPLOAD_DIR / f"{upload_id}.json"
+            if not state_path.exists():
+                return None
+            session = UploadSession(json.loads(state_path.read_text()))
+            _sessions[upload_id] = session
+    if session.expires_at < time.time():
+        drop_session(session)
+        return None
+    return session
+
+def drop_session(session: UploadSession):
+    """Forget a session and delete its files."""
+    with _sessions_lock:
+        _sessions.pop(session.upload_id, None)
+    session.discard()
+
+def purge_expired() -> int:
+    """Delete sessions whose TTL lapsed. Returns how many were removed."""
+    now = time.time()
+    removed = 0
+    for state_path in UPLOAD_DIR.glob("*.json"):
+        try:
+            state = json.loads(state_path.read_text())
+        except (OSError, ValueError):
+            continue
+        if state.get("expires_at", 0) < now:
+            with _sessions_lock:
+                _sessions.pop(state["upload_id"], None)
+            UploadSession(state).discard()
+            removed += 1
+    return removed
@@ -1,7 +1,9 @@
 """
 Utility functions for photo handling and activity logging.
 """
+import io
 import json
+import shutil
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -9,6 +11,7 @@ from typing import List, Optional
 from PIL import Image
 from sqlalchemy.orm import Session
 from app.models import ActivityLog
+from app.imaging import inspect_image, decode_budget
 
 # Photo storage directories
 BASE_DIR = Path(__file__).parent.parent
@@ -17,33 +20,59 @@ REQUESTS_DIR = BASE_DIR / "data" / "requests"
 OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
 REQUESTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Derivative sizes, largest first so each level is derived from the previous one
+THUMBNAIL_SIZES = (("large", 1600), ("medium", 800), ("small", 300))
+
+def _fit_within(size: tuple[int, int], edge: int) -> tuple[int, int]:
+    """Scale (width, height) down to fit an edge x edge box, preserving aspect ratio."""
+    width, height = size
+    if width <= edge and height <= edge:
+        return size
+    ratio = min(edge / width, edge / height)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
 def save_photo(file_content: bytes, directory: Path, filename: str) -> str:
-    """Save photo and generate thumbnails. Returns relative path."""
-    photo_dir = directory / filename.split('.')[0]
-    photo_dir.mkdir(parents=True, exist_ok=True)
+    """
+    Save photo and generate thumbnails. Returns relative path.
+    Raises ImageRejected if the image fails admission or decode capacity is exhausted.
+    """
+    # Check header against format/size budgets before anything touches disk
+    largest = THUMBNAIL_SIZES[0][1] * 2
+    info = inspect_image(file_content, draft_edge=largest)
     
-    # Save original
+    photo_dir = directory / filename.split('.')[0]
     original_path = photo_dir / f"original_{filename}"
-    with open(original_path, 'wb') as f:
-        f.write(file_content)
-    
-    # Generate thumbnails
-    img = Image.open(original_path)
-    
-    # Small: 300x300
-    img_small = img.copy()
-    img_small.thumbnail((300, 300), Image.Resampling.LANCZOS)
-    img_small.save(photo_dir / f"small_{filename}", optimize=True, quality=85)
-    
-    # Medium: 800x800
-    img_medium = img.copy()
-    img_medium.thumbnail((800, 800), Image.Resampling.LANCZOS)
-    img_medium.save(photo_dir / f"medium_{filename}", optimize=True, quality=85)
     
-    # Large: 1600x1600
-    img_large = img.copy()
-    img_large.thumbnail((1600, 1600), Image.Resampling.LANCZOS)
-    img_large.save(photo_dir / f"large_{filename}", optimize=True, quality=85)
+    # Reserve decode capacity first, so a 503 for exhausted capacity leaves nothing on disk
+    with decode_budget.reserve(info["decode_bytes"]):
+        created = not photo_dir.exists()
+        photo_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            # Save original
+            with open(original_path, 'wb') as f:
+                f.write(file_content)
+            
+            # Decode once from the upload buffer instead of re-reading the file.
+            # For JPEGs, draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale
+            # while staying at least twice the largest derivative.
+            img = Image.open(io.BytesIO(file_content))
+            img.draft(None, (largest, largest))
+            img.load()
+            
+            # Pyramid: large -> medium -> small, each level resized from the previous
+            # one. reducing_gap lets resize() box-reduce() by an integer factor
+            # before the LANCZOS pass, so huge scans never go through a full-size filter.
+            level = img
+            for name, edge in THUMBNAIL_SIZES:
+                target = _fit_within(level.size, edge)
+                if target != level.size:
+                    level = level.resize(target, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                level.save(photo_dir / f"{name}_{filename}", optimize=True, quality=85)
+        except Exception:
+            # Don't leave a half-written photo behind
+            if created:
+                shutil.rmtree(photo_dir, ignore_errors=True)
+            raise
     
     return str(original_path.relative_to(BASE_DIR))
 
@@ -0,0 +1,272 @@
+"""
+Provenance chain verification with signed checkpoints.
+A checkpoint records that an object's chain was verified through a given event
+(chain length, global seq, how many leading events had valid anchor proofs),
+signed by the server's verifier key. Verification trusts the checkpointed
+prefix: it reads only the checkpointed event and those after it, and checks
+links, envelope hashes, signatures and inclusion proofs from there.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives import serialization
+from sqlalchemy.orm import Session
+from app.auth import SECRET_KEY
+from app.models import Actor, Event, VerificationCheckpoint
+from app.schemas import EventTimelineItem
+from app.crypto import canonical_json, hash_canonical, verify_canonical
+from app.keys import actor_keys, actor_public_key, public_key
+from app.merkle import verify_merkle_proof
+from app.anchor import get_inclusion_proof
+from app.provenance import event_envelope, envelope_mismatches
+
+# A new checkpoint is written once this many events (or newly anchored events) follow the last one
+CHECKPOINT_INTERVAL = int(os.getenv("CHECKPOINT_INTERVAL_EVENTS", "32"))
+CHECKPOINT_SIGNING_KEY = os.getenv("CHECKPOINT_SIGNING_KEY", "")
+
+def _verifier_private_key() -> Ed25519PrivateKey:
+    seed = (
+        base64.b64decode(CHECKPOINT_SIGNING_KEY) if CHECKPOINT_SIGNING_KEY
+        else hmac.new(SECRET_KEY.encode("utf-8"), b"verification-checkpoint-signing", hashlib.sha256).digest()
+    )
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+_signing_key = _verifier_private_key()
+VERIFIER_KEY_B64 = base64.b64encode(_signing_key.public_key().public_bytes(
+    encoding=serialization.Encoding.Raw,
+    format=serialization.PublicFormat.Raw
+)).decode("ascii")
+
+def checkpoint_payload(checkpoint: VerificationCheckpoint) -> dict:
+    """The exact fields a checkpoint signature covers (signed as canonical JSON)."""
+    return {
+        "object_id": checkpoint.object_id,
+        "event_hash": checkpoint.event_hash,
+        "event_seq": checkpoint.event_seq,
+        "chain_length": checkpoint.chain_length,
+        "anchored_count": checkpoint.anchored_count,
+        "verified_at": checkpoint.verified_at,
+        "verifier_key_b64": checkpoint.verifier_key_b64,
+    }
+
+def checkpoint_dict(checkpoint: VerificationCheckpoint) -> dict:
+    return {**checkpoint_payload(checkpoint), "signature_b64": checkpoint.signature_b64}
+
+def verify_checkpoint(checkpoint: VerificationCheckpoint) -> bool:
+    try:
+        return verify_canonical(
+            canonical_json(checkpoint_payload(checkpoint)),
+            checkpoint.signature_b64,
+            public_key(checkpoint.verifier_key_b64)
+        )
+    except Exception:
+        return False
+
+def stored_checkpoint(db: Session, object_id: str) -> Optional[VerificationCheckpoint]:
+    """
+    The newest checkpoint that was signed by the current verifier key and still
+    matches the chain (same event at the same position).
+    """
+    checkpoints = db.query(VerificationCheckpoint).filter(
+        VerificationCheckpoint.object_id == object_id,
+        VerificationCheckpoint.verifier_key_b64 == VERIFIER_KEY_B64
+    ).order_by(VerificationCheckpoint.chain_length.desc()).limit(8)
+    for checkpoint in checkpoints:
+        head = db.query(Event.event_hash).filter(
+            Event.object_id == object_id, Event.chain_height == checkpoint.chain_length - 1
+        ).scalar()
+        if head == checkpoint.event_hash and verify_checkpoint(checkpoint):
+            return checkpoint
+    return None
+
+def load_chain(
+    db: Session,
+    object_id: str,
+    use_checkpoint: bool = True
+) -> Tuple[Optional[VerificationCheckpoint], List[Event]]:
+    """
+    The checkpoint to start from (None if use_checkpoint is False or there is
+    none) and the events verify_chain has to read, in chain order: the
+    checkpointed event and those after it, or from the end of its anchored
+    prefix if that is earlier. Without a checkpoint, the whole chain.
+    """
+    checkpoint = stored_checkpoint(db, object_id) if use_checkpoint else None
+    start = min(checkpoint.chain_length - 1, checkpoint.anchored_count) if checkpoint else 0
+    events = db.query(Event).filter(
+        Event.object_id == object_id, Event.chain_height >= start
+    ).order_by(Event.chain_height).all()
+    return checkpoint, events
+
+def record_checkpoint(
+    db: Session,
+    object_id: str,
+    head: Event,
+    chain_length: int,
+    anchored_count: int
+) -> VerificationCheckpoint:
+    """Sign and store a checkpoint through head, the chain_length-th event (verified by the caller)."""
+    checkpoint = db.query(VerificationCheckpoint).filter(
+        VerificationCheckpoint.object_id == object_id,
+        VerificationCheckpoint.chain_length == chain_length
+    ).first() or VerificationCheckpoint(object_id=object_id, chain_length=chain_length)
+    checkpoint.event_hash = head.event_hash
+    checkpoint.event_seq = head.seq
+    checkpoint.anchored_count = anchored_count
+    checkpoint.verified_at = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    checkpoint.verifier_key_b64 = VERIFIER_KEY_B64
+    signature = _signing_key.sign(canonical_json(checkpoint_payload(checkpoint)))
+    checkpoint.signature_b64 = base64.b64encode(signature).decode("ascii")
+    db.add(checkpoint)
+    db.commit()
+    return checkpoint
+
+def verify_chain(
+    db: Session,
+    object_id: str,
+    events: List[Event],
+    checkpoint: Optional[VerificationCheckpoint] = None,
+    force_checkpoint: bool = False
+) -> Dict:
+    """
+    Verify an object's events as returned by load_chain: links, envelope
+    hashes, signatures and anchor proofs. With a checkpoint, events start
+    inside its verified prefix and the timeline covers only them. A fully
+    valid chain gets a new checkpoint once CHECKPOINT_INTERVAL events have
+    been verified past the last one, or whenever it grew with force_checkpoint
+    (audits).
+    """
+    errors = []
+    chain_valid = True
+    signatures_valid = True
+    timeline_items = []
+    # Chain position of events[0]
+    offset = events[0].chain_height if checkpoint and events else 0
+    trusted = checkpoint.chain_length if checkpoint else 0
+    trusted_anchored = checkpoint.anchored_count if checkpoint else 0
+    signatures_checked = 0
+    # Most chains have one or two signers; look each up once
+    actors = {}
+
+    for i, event in enumerate(events):
+        height = offset + i
+        # The exact bytes that were hashed and signed (rebuilt only for old unrecoverable events)
+        envelope = event_envelope(event)
+        if event.signed_envelope and hash_canonical(envelope) != event.event_hash:
+            chain_valid = False
+            errors.append(f"Event {event.event_hash} does not match its signed envelope")
+        mismatched = envelope_mismatches(event, envelope)
+        if mismatched:
+            chain_valid = False
+            errors.append(f"Event {event.event_hash} differs from its signed envelope in: {', '.join(mismatched)}")
+
+        # Verify prev_event_hash link; the first event read past genesis was linked under the checkpoint
+        if height == 0:
+            if event.prev_event_hash is not None:
+                chain_valid = False
+                errors.append(f"Genesis event {event.event_hash} should have null prev_event_hash")
+        elif i > 0:
+            prev_event = events[i-1]
+            if event.prev_event_hash != prev_event.event_hash:
+                chain_valid = False
+                errors.append(f"Event {event.event_hash} has incorrect prev_event_hash")
+
+        # Verify signature; the checkpointed prefix was already verified
+        if height < trusted:
+            sig_valid = True
+        else:
+            sig_valid = False
+            signatures_checked += 1
+            if event.actor_id not in actors:
+                actors[event.actor_id] = db.query(Actor).filter(Actor.actor_id == event.actor_id).first()
+            actor = actors[event.actor_id]
+            if actor:
+                # Always use the derived public key (same as what was used for signing)
+                keys = actor_keys(event.actor_id)
+                sig_valid = verify_canonical(envelope, event.signature_b64, keys.public_key)
+
+                if not sig_valid:
+                    # If derived key doesn't work, try stored key (for backward compatibility)
+                    if actor.pubkey_ed25519 != keys.public_key_b64:
+                        try:
+                            stored_key = actor_public_key(actor)
+                        except Exception:
+                            stored_key = None
+                        if stored_key:
+                            sig_valid = verify_canonical(envelope, event.signature_b64, stored_key)
+                        if sig_valid:
+                            # Update actor's public key to match derived one for future consistency
+                            actor.pubkey_ed25519 = keys.public_key_b64
+                            db.commit()
+
+                if not sig_valid:
+                    signatures_valid = False
+                    errors.append(f"Invalid signature for event {event.event_hash}")
+            else:
+                signatures_valid = False
+                errors.append(f"Actor {event.actor_id} not found for event {event.event_hash}")
+
+        # Check if anchored, and that the chained proof leads to the batch root and on to the epoch root.
+        # Proofs of the checkpoint's leading anchored events were already checked.
+        if height < trusted_anchored:
+            anchored = True
+            batch_id = event.anchor_batch_id
+        else:
+            inclusion = get_inclusion_proof(db, event.event_hash)
+            anchored = inclusion is not None
+            batch_id = inclusion["batch_id"] if inclusion else None
+            if inclusion and not verify_merkle_proof(
+                event.event_hash, inclusion["proof_path"], inclusion["merkle_root"], inclusion["leaf_index"]
+            ):
+                anchored = False
+                errors.append(f"Inclusion proof for event {event.event_hash} does not match batch {batch_id} root")
+            elif inclusion and not verify_merkle_proof(
+                inclusion["merkle_root"], inclusion["epoch_proof_path"], inclusion["epoch_root"], inclusion["epoch_index"]
+            ):
+                anchored = False
+                errors.append(f"Batch {batch_id} root is not included in epoch {inclusion['epoch_id']} root")
+
+        try:
+            payload = json.loads(event.payload_json)
+        except (TypeError, ValueError):
+            payload = {}
+        timeline_items.append(EventTimelineItem(
+            event_hash=event.event_hash,
+            event_type=event.event_type,
+            timestamp=event.timestamp,
+            actor_id=event.actor_id,
+            payload=payload,
+            prev_event_hash=event.prev_event_hash,
+            signature_valid=sig_valid,
+            anchored=anchored,
+            batch_id=batch_id
+        ))
+
+    recorded = None
+    if events and chain_valid and signatures_valid and not errors:
+        chain_length = offset + len(events)
+        anchored_count = offset + next(
+            (i for i, item in enumerate(timeline_items) if not item.anchored), len(timeline_items)
+        )
+        grew = chain_length > trusted or anchored_count > trusted_anchored
+        if (
+            (force_checkpoint and grew)
+            or chain_length - trusted >= CHECKPOINT_INTERVAL
+            or anchored_count - trusted_anchored >= CHECKPOINT_INTERVAL
+        ):
+            recorded = record_checkpoint(db, object_id, events[-1], chain_length, anchored_count)
+
+    return {
+        "chain_valid": chain_valid,
+        "signatures_valid": signatures_valid,
+        "timeline": timeline_items,
+        "errors": errors,
+        "checkpoint": checkpoint,
+        "timeline_start": offset,
+        "recorded_checkpoint": recorded,
+        "signatures_checked": signatures_checked,
+    }
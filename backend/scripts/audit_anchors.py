@@ -0,0 +1,43 @@
+"""
+Audit anchored batches: rebuild Merkle roots from the database and compare
+them with data/anchors.json and the stored inclusion proofs.
+"""
+import sys
+import argparse
+import json
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import init_db
+from app.anchor_audit import audit_anchors, AUDIT_WORKERS
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-check anchor batches, anchor log and inclusion proofs")
+    parser.add_argument("--workers", type=int, default=AUDIT_WORKERS, help="worker processes (1 = inline)")
+    parser.add_argument("--skip-proofs", action="store_true", help="only compare roots")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    init_db()
+    report = audit_anchors(workers=args.workers, check_proofs=not args.skip_proofs)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report["problems"]:
+            for problem in entry["problems"]:
+                print(f"[ERROR] {entry.get('batch_id') or 'epoch ' + entry['epoch_id']}: {problem}")
+        print(
+            f"[INFO] {report['batches']} batch(es), {report['events']} event(s) in {report['elapsed_seconds']}s "
+            f"({report['batches_per_second']} batches/s, {report['events_per_second']} events/s, "
+            f"{report['workers']} worker(s))"
+        )
+        print(f"[OK] {report['consistent_batches']} consistent, {report['inconsistent_batches']} inconsistent; "
+              f"{report['epochs']} epoch(s), {report['inconsistent_epochs']} inconsistent")
+
+    sys.exit(1 if report["inconsistent_batches"] or report["inconsistent_epochs"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark anchoring throughput and latency against the local ledger backend.
+Roots arrive at a steady rate, are grouped into root-of-roots submissions and
+confirmed by a ledger in a temporary directory (the archive is not touched).
+
+Usage: python scripts/bench_anchoring.py --roots 2000 --rate 200 --roots-per-submission 64 --in-flight 4
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.anchor_backends import LocalLedgerBackend
+from app.anchor_submitter import anchor_roots
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(args, ledger_path: Path) -> dict:
+    backend = LocalLedgerBackend(
+        path=ledger_path,
+        block_seconds=args.block_seconds,
+        failure_rate=args.failure_rate,
+        required_confirmations=args.confirmations
+    )
+    queue: asyncio.Queue = asyncio.Queue()
+    in_flight = asyncio.Semaphore(args.in_flight)
+    latencies, attempts, tasks = [], [], []
+
+    async def produce():
+        for i in range(args.roots):
+            await queue.put((hashlib.sha256(str(i).encode()).hexdigest(), time.perf_counter()))
+            if args.rate:
+                await asyncio.sleep(1 / args.rate)
+        await queue.put(None)
+
+    async def submit(group):
+        async with in_flight:
+            receipt = await anchor_roots(backend, [root for root, _ in group], retry_delay=0.05)
+        done = time.perf_counter()
+        attempts.append(receipt["attempts"])
+        if receipt["confirmed"]:
+            latencies.extend(done - queued for _, queued in group)
+
+    async def batcher():
+        finished = False
+        while not finished:
+            group = [await queue.get()]
+            # Take whatever else is already waiting, up to the submission size
+            while len(group) < args.roots_per_submission and not queue.empty():
+                group.append(queue.get_nowait())
+            if group[-1] is None:
+                group.pop()
+                finished = True
+            if group:
+                await in_flight.acquire()  # backpressure: wait for a free slot before grouping more
+                in_flight.release()
+                tasks.append(asyncio.create_task(submit(group)))
+
+    started = time.perf_counter()
+    await asyncio.gather(produce(), batcher())
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "submissions": len(tasks),
+        "retries": sum(attempts) - len(attempts),
+        "chain_error": backend.verify_chain(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark root-of-roots anchoring on the local ledger")
+    parser.add_argument("--roots", type=int, default=2000, help="batch roots to anchor")
+    parser.add_argument("--rate", type=float, default=200, help="roots arriving per second, 0 = all at once")
+    parser.add_argument("--roots-per-submission", type=int, default=64)
+    parser.add_argument("--in-flight", type=int, default=4, help="concurrent submissions")
+    parser.add_argument("--block-seconds", type=float, default=0.5, help="simulated block interval")
+    parser.add_argument("--confirmations", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of submissions rejected")
+    args = parser.parse_args()
+
+    print(f"[INFO] {args.roots} roots at {args.rate or 'max'}/s, up to {args.roots_per_submission} per submission, "
+          f"{args.in_flight} in flight, {args.block_seconds}s blocks, {args.confirmations} confirmation(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        result = asyncio.run(run(args, Path(tmp) / "ledger.jsonl"))
+
+    latencies = result["latencies"]
+    if not latencies:
+        print("[ERROR] No submission confirmed")
+        sys.exit(1)
+    print(f"[INFO] {result['submissions']} submissions, {result['retries']} retries")
+    print(f"[INFO] Throughput: {len(latencies) / result['elapsed']:.1f} roots/s confirmed")
+    print(f"[INFO] Latency (queued -> confirmed): p50 {percentile(latencies, 0.5):.2f}s, "
+          f"p95 {percentile(latencies, 0.95):.2f}s, max {max(latencies):.2f}s")
+    if result["chain_error"]:
+        print(f"[ERROR] Ledger chain broken: {result['chain_error']}")
+        sys.exit(1)
+    print(f"[OK] {len(latencies)}/{args.roots} roots confirmed; ledger chain intact")
+
+if __name__ == "__main__":
+    main()
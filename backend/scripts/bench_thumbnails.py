@@ -0,0 +1,91 @@
+"""
+Benchmark the thumbnail pipeline against the previous copy-per-size implementation.
+Usage: python scripts/bench_thumbnails.py [megapixels] [runs]
+
+Each run happens in a fresh process so peak RSS reflects that implementation only.
+"""
+import io
+import multiprocessing
+import resource
+import shutil
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pathlib import Path
+from PIL import Image
+
+from app.utils import save_photo, BASE_DIR
+
+def legacy_save_photo(file_content: bytes, directory: Path, filename: str) -> str:
+    """Previous implementation: reopen from disk, three full-resolution copies."""
+    photo_dir = directory / filename.split('.')[0]
+    photo_dir.mkdir(parents=True, exist_ok=True)
+
+    original_path = photo_dir / f"original_{filename}"
+    with open(original_path, 'wb') as f:
+        f.write(file_content)
+
+    img = Image.open(original_path)
+    for name, edge in (("small", 300), ("medium", 800), ("large", 1600)):
+        thumb = img.copy()
+        thumb.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        thumb.save(photo_dir / f"{name}_{filename}", optimize=True, quality=85)
+
+    return str(original_path.relative_to(BASE_DIR))
+
+def make_test_image(megapixels: int) -> bytes:
+    """Render a synthetic RGB scan of roughly the given size and encode it as JPEG."""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    bands = [
+        Image.linear_gradient("L").resize((width, height)),
+        Image.radial_gradient("L").resize((width, height)),
+        Image.effect_noise((width, height), 48),
+    ]
+    buf = io.BytesIO()
+    Image.merge("RGB", bands).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+def _run(impl: str, source: Path, workdir: Path, queue):
+    content = source.read_bytes()
+    func = save_photo if impl == "pyramid" else legacy_save_photo
+    start = time.perf_counter()
+    func(content, workdir, f"{impl}.jpg")
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in KiB on Linux
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def bench(megapixels: int = 100, runs: int = 3):
+    """Run both implementations and print mean time and peak RSS."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench_thumbnails_", dir=BASE_DIR / "data"))
+    ctx = multiprocessing.get_context("spawn")
+
+    try:
+        print(f"Rendering {megapixels} MP test image...")
+        source = workdir / "source.jpg"
+        source.write_bytes(make_test_image(megapixels))
+        with Image.open(source) as img:
+            print(f"Source: {img.size[0]}x{img.size[1]}, {source.stat().st_size / 1e6:.1f} MB JPEG\n")
+
+        print(f"{'implementation':<16}{'mean time (s)':>16}{'peak RSS (MiB)':>18}")
+        for impl in ("legacy", "pyramid"):
+            times, peaks = [], []
+            for _ in range(runs):
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run, args=(impl, source, workdir, queue))
+                proc.start()
+                elapsed, peak = queue.get()
+                proc.join()
+                times.append(elapsed)
+                peaks.append(peak)
+            print(f"{impl:<16}{sum(times) / runs:>16.2f}{max(peaks):>18.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    megapixels = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    bench(megapixels, runs)
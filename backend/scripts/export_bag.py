@@ -0,0 +1,70 @@
+"""
+Export objects as BagIt bags for deposit into other preservation repositories.
+Rerun the same command to resume an interrupted export.
+
+Usage: python scripts/export_bag.py OUTPUT_DIR [--collection public|all|<user_id>]
+       [--name NAME] [--max-bag-size 10G] [--workers N] [--copy] [--rehash-originals]
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import init_db, SessionLocal
+from app.bagit import BagExporter, BAGIT_HASH_WORKERS
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export objects, provenance and anchor proofs as BagIt bags")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--collection", default="public", help="public (default), all, or a contributor's user id")
+    parser.add_argument("--name", default=None, help="bag name (default: the collection)")
+    parser.add_argument("--max-bag-size", type=parse_size, default=None, help="split into bags of at most this size, e.g. 10G")
+    parser.add_argument("--workers", type=int, default=BAGIT_HASH_WORKERS, help="threads hashing files")
+    parser.add_argument("--copy", action="store_true", help="always copy files instead of hardlinking or reflinking")
+    parser.add_argument("--rehash-originals", action="store_true", help="hash originals instead of trusting stored CIDs")
+    args = parser.parse_args()
+
+    init_db()
+    exporter = BagExporter(
+        args.output_dir, args.name or args.collection, args.collection,
+        max_bag_bytes=args.max_bag_size, workers=args.workers,
+        allow_link=not args.copy, rehash_originals=args.rehash_originals
+    )
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        bags = exporter.run(db)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    stats = exporter.stats
+    elapsed = time.perf_counter() - started
+    if exporter.resumed_from:
+        last_object_id, bag_number = exporter.resumed_from
+        print(f"[INFO] Resumed after {last_object_id} in bag {bag_number}")
+    for object_id, source in exporter.missing_files:
+        print(f"[ERROR] {object_id}: missing {source}")
+    print(f"[INFO] {stats['objects']} object(s), {stats['files']} file(s), {stats['bytes'] / 1024 ** 2:.1f} MB in {elapsed:.2f}s")
+    print(f"[INFO] {stats['hashed']} file(s) hashed; {stats['link']} hardlinked, {stats['reflink']} reflinked, {stats['copy']} copied")
+    for bag in bags:
+        print(f"[OK] {bag}")
+    if stats["missing"]:
+        print(f"[ERROR] {stats['missing']} stored file(s) missing")
+    sys.exit(1 if stats["missing"] else 0)
+
+if __name__ == "__main__":
+    main()
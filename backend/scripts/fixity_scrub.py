@@ -0,0 +1,40 @@
+"""
+Run fixity scrubbing outside the API process (e.g. from cron with FIXITY_SCRUB_ENABLED=0).
+"""
+import sys
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import SessionLocal, init_db
+from app.fixity import FixityScrubber, FIXITY_MB_PER_SECOND, FIXITY_WORKERS, FIXITY_INTERVAL_DAYS
+
+def main():
+    parser = argparse.ArgumentParser(description="Rehash stored originals that are due for a fixity check")
+    parser.add_argument("--mb-per-second", type=float, default=FIXITY_MB_PER_SECOND, help="read budget, 0 = unthrottled")
+    parser.add_argument("--workers", type=int, default=FIXITY_WORKERS)
+    parser.add_argument("--interval-days", type=float, default=FIXITY_INTERVAL_DAYS, help="recheck objects older than this")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many objects")
+    args = parser.parse_args()
+
+    init_db()
+    scrubber = FixityScrubber(args.mb_per_second, args.workers, args.interval_days)
+    db = SessionLocal()
+    pass_started = datetime.now(timezone.utc)
+    try:
+        while args.limit is None or scrubber.stats["checked"] < args.limit:
+            batch = 64 if args.limit is None else min(64, args.limit - scrubber.stats["checked"])
+            if not scrubber.run_batch(db, batch, before=pass_started):
+                break
+            print(f"[INFO] {scrubber.stats['checked']} checked, {scrubber.stats['bytes'] / 1024 ** 2:.1f} MB, "
+                  f"{scrubber.stats['failures']} failure(s)")
+    finally:
+        db.close()
+
+    print(f"[OK] Pass complete: {scrubber.stats['checked']} object(s), {scrubber.stats['failures']} failure(s)")
+
+if __name__ == "__main__":
+    main()
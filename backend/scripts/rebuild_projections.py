@@ -0,0 +1,36 @@
+"""
+Rebuild object_states and state_snapshots by replaying the whole event log.
+Objects are replayed in parallel worker processes; run after changing how
+events are folded (app/projection.py) or STATE_SNAPSHOT_INTERVAL.
+
+Usage: python scripts/rebuild_projections.py [--workers N]
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import init_db
+from app.projection import rebuild_projections, PROJECTION_WORKERS, STATE_SNAPSHOT_INTERVAL
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay all events into object state projections")
+    parser.add_argument("--workers", type=int, default=PROJECTION_WORKERS, help="worker processes (1 = inline)")
+    args = parser.parse_args()
+
+    init_db()
+    print(f"[INFO] Replaying events with {args.workers} worker(s), snapshot every {STATE_SNAPSHOT_INTERVAL} events")
+    started = time.perf_counter()
+    try:
+        totals = rebuild_projections(workers=args.workers)
+    except Exception as e:
+        print(f"[ERROR] Rebuild failed: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"[OK] {totals['objects']} object state(s) and {totals['snapshots']} snapshot(s) rebuilt in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
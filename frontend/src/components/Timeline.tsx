@@ -1,57 +1,202 @@
-import { EventTimelineItem } from '../lib/api'
+import { useEffect, useState } from 'react'
+import { apiClient, ChainEvent, EventFilters, EventTimelineItem } from '../lib/api'
 import './Timeline.css'
 
+type TimelineEvent = EventTimelineItem | ChainEvent
+
 interface TimelineProps {
-  events: EventTimelineItem[]
+  // Events already loaded (e.g. from a verification report), or an object whose chain is streamed in
+  events?: TimelineEvent[]
+  objectId?: string
+  filters?: EventFilters
+}
+
+// Longer chains switch to fixed-height rows and only the rows in view are rendered
+const VIRTUALIZE_AFTER = 100
+const ROW_HEIGHT = 112
+const VIEWPORT_HEIGHT = 640
+const OVERSCAN = 8
+
+function markerClass(event: TimelineEvent) {
+  // Streamed events have not been verified; only verification reports carry signature_valid
+  if (!('signature_valid' in event)) return 'unverified'
+  return event.signature_valid ? 'valid' : 'invalid'
 }
 
-function Timeline({ events }: TimelineProps) {
+interface EntryProps {
+  event: TimelineEvent
+  isLast: boolean
+  compact?: boolean
+  selected?: boolean
+  onSelect?: () => void
+}
+
+function TimelineEntry({ event, isLast, compact, selected, onSelect }: EntryProps) {
+  return (
+    <div className="timeline-item">
+      <div className="timeline-marker">
+        <div className={`marker-dot ${markerClass(event)}`} />
+        {!isLast && <div className="timeline-line" />}
+      </div>
+      <div
+        className={`timeline-content${compact ? ' compact' : ''}${selected ? ' selected' : ''}`}
+        onClick={onSelect}
+      >
+        <div className="event-header">
+          <span className="event-type">{event.event_type}</span>
+          <span className="event-time">
+            {new Date(event.timestamp).toLocaleString()}
+          </span>
+        </div>
+        <div className="event-details">
+          <p>
+            <strong>Actor:</strong> {event.actor_id}
+            {'chain_height' in event && <span className="event-height">#{event.chain_height}</span>}
+          </p>
+          {!compact && event.prev_event_hash && (
+            <p><strong>Previous:</strong> <code>{event.prev_event_hash.substring(0, 16)}...</code></p>
+          )}
+          {event.anchored && event.batch_id && (
+            <p className="anchored-badge">
+              ✓ Anchored in batch: <code>{event.batch_id.substring(0, 8)}...</code>
+            </p>
+          )}
+          {'signature_valid' in event && !event.signature_valid && (
+            <p className="invalid-badge">✗ Signature invalid</p>
+          )}
+        </div>
+        {!compact && (
+          <details className="event-payload">
+            <summary>Payload</summary>
+            <pre>{JSON.stringify(event.payload, null, 2)}</pre>
+          </details>
+        )}
+      </div>
+    </div>
+  )
+}
+
+function Timeline({ events: givenEvents, objectId, filters }: TimelineProps) {
+  const [streamed, setStreamed] = useState<ChainEvent[]>([])
+  const [loading, setLoading] = useState(false)
+  const [error, setError] = useState<string | null>(null)
+  const [scrollTop, setScrollTop] = useState(0)
+  const [selected, setSelected] = useState<TimelineEvent | null>(null)
+
+  useEffect(() => {
+    if (!objectId) return
+    const controller = new AbortController()
+    setStreamed([])
+    setSelected(null)
+    setError(null)
+    setLoading(true)
+
+    // Batches arrive faster than the screen refreshes; append at most once per frame
+    let pending: ChainEvent[] = []
+    let frame = 0
+    const flush = () => {
+      frame = 0
+      const batch = pending
+      pending = []
+      setStreamed((prev) => prev.concat(batch))
+    }
+
+    apiClient
+      .streamObjectEvents(
+        objectId,
+        (batch) => {
+          pending = pending.concat(batch)
+          if (!frame) frame = requestAnimationFrame(flush)
+        },
+        filters,
+        controller.signal
+      )
+      .catch((err: any) => {
+        if (!controller.signal.aborted) setError(err.message || 'Failed to load events')
+      })
+      .finally(() => {
+        if (!controller.signal.aborted) setLoading(false)
+      })
+
+    return () => {
+      controller.abort()
+      if (frame) cancelAnimationFrame(frame)
+    }
+  }, [objectId, filters?.event_type, filters?.actor_id, filters?.since, filters?.until])
+
+  const events: TimelineEvent[] = objectId ? streamed : givenEvents || []
+
   if (events.length === 0) {
-    return <div className="timeline-empty">No events found</div>
+    if (error) return <div className="alert alert-error">{error}</div>
+    return <div className="timeline-empty">{loading ? 'Loading events...' : 'No events found'}</div>
+  }
+
+  const heading = (
+    <h3>
+      Provenance Timeline
+      <span className="timeline-count">
+        {events.length} event(s){loading ? ', loading...' : ''}
+      </span>
+    </h3>
+  )
+
+  if (events.length <= VIRTUALIZE_AFTER && !loading) {
+    return (
+      <div className="timeline">
+        {heading}
+        <div className="timeline-container">
+          {events.map((event, index) => (
+            <TimelineEntry key={event.event_hash} event={event} isLast={index === events.length - 1} />
+          ))}
+        </div>
+      </div>
+    )
   }
 
+  const first = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN)
+  const last = Math.min(events.length, Math.ceil((scrollTop + VIEWPORT_HEIGHT) / ROW_HEIGHT) + OVERSCAN)
+
   return (
     <div className="timeline">
-      <h3>Provenance Timeline</h3>
-      <div className="timeline-container">
-        {events.map((event, index) => (
-          <div key={event.event_hash} className="timeline-item">
-            <div className="timeline-marker">
-              <div className={`marker-dot ${event.signature_valid ? 'valid' : 'invalid'}`} />
-              {index < events.length - 1 && <div className="timeline-line" />}
-            </div>
-            <div className="timeline-content">
-              <div className="event-header">
-                <span className="event-type">{event.event_type}</span>
-                <span className="event-time">
-                  {new Date(event.timestamp).toLocaleString()}
-                </span>
-              </div>
-              <div className="event-details">
-                <p><strong>Actor:</strong> {event.actor_id}</p>
-                {event.prev_event_hash && (
-                  <p><strong>Previous:</strong> <code>{event.prev_event_hash.substring(0, 16)}...</code></p>
-                )}
-                {event.anchored && event.batch_id && (
-                  <p className="anchored-badge">
-                    ✓ Anchored in batch: <code>{event.batch_id.substring(0, 8)}...</code>
-                  </p>
-                )}
-                {!event.signature_valid && (
-                  <p className="invalid-badge">✗ Signature invalid</p>
-                )}
-              </div>
-              <details className="event-payload">
-                <summary>Payload</summary>
-                <pre>{JSON.stringify(event.payload, null, 2)}</pre>
-              </details>
+      {heading}
+      {error && <div className="alert alert-error">{error}</div>}
+      <div
+        className="timeline-viewport"
+        style={{ height: VIEWPORT_HEIGHT }}
+        onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+      >
+        <div className="timeline-container" style={{ height: events.length * ROW_HEIGHT }}>
+          {events.slice(first, last).map((event, offset) => (
+            <div
+              key={event.event_hash}
+              className="timeline-row"
+              style={{ top: (first + offset) * ROW_HEIGHT, height: ROW_HEIGHT }}
+            >
+              <TimelineEntry
+                event={event}
+                isLast={first + offset === events.length - 1}
+                compact
+                selected={selected?.event_hash === event.event_hash}
+                onSelect={() => setSelected(event)}
+              />
             </div>
-          </div>
-        ))}
+          ))}
+        </div>
       </div>
+      {selected && (
+        <div className="timeline-selected">
+          <div className="event-header">
+            <span className="event-type">{selected.event_type}</span>
+            <code>{selected.event_hash.substring(0, 16)}...</code>
+          </div>
+          {selected.prev_event_hash && (
+            <p><strong>Previous:</strong> <code>{selected.prev_event_hash.substring(0, 16)}...</code></p>
+          )}
+          <pre>{JSON.stringify(selected.payload, null, 2)}</pre>
+        </div>
+      )}
     </div>
   )
 }
 
 export default Timeline
-
@@ -2,6 +2,7 @@
  * API client for Provenance backend.
  */
 import axios from 'axios'
+import { sha256File } from './sha256'
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
@@ -39,11 +40,85 @@ export interface EventResponse {
   event_hash: string
 }
 
+export interface AnchorBatchSummary {
+  namespace: string
+  batch_id: string
+  merkle_root: string
+  event_count: number
+}
+
 export interface AnchorResponse {
+  epoch_id: string
+  epoch_root: string
+  anchored_at: string
+  event_count: number
+  batches: AnchorBatchSummary[]
+}
+
+// Second hop of a chained proof: namespace batch root -> epoch root
+export interface EpochProof {
+  namespace: string | null
+  epoch_id: string
+  epoch_root: string
+  epoch_index: number
+  epoch_proof_path: string[]
+}
+
+export interface InclusionProof extends EpochProof {
+  event_hash: string
   batch_id: string
   merkle_root: string
+  leaf_index: number
+  leaf_count: number
+  proof_path: string[]
+  directions: number[] // 1 = sibling on the left
   anchored_at: string
+  epoch_directions: number[]
+}
+
+export interface BatchMultiproof extends EpochProof {
+  batch_id: string
+  merkle_root: string
+  leaf_count: number
+  anchored_at: string
+  leaves: Array<{ event_hash: string; leaf_index: number }>
+  nodes: Array<{ level: number; index: number; hash: string }>
+}
+
+export interface BatchProofResponse {
+  batches: BatchMultiproof[]
+  unanchored: string[]
+}
+
+export interface ObjectState {
+  object_id: string
+  at: string | null
+  cid: string | null
+  filename: string | null
+  format: string | null
+  custodian: string | null
+  metadata: Record<string, any>
   event_count: number
+  // The last event at or before `at`, which produced this state
+  event_hash: string
+  event_type: string
+  event_timestamp: string
+  actor_id: string
+}
+
+export interface AncestryProof {
+  object_id: string
+  descendant: string
+  ancestor: string
+  hops: number
+  // Descendant first; each next event is a prev or skip link signed in the envelope before it
+  steps: Array<{
+    event_hash: string
+    chain_height: number | null
+    actor_id: string
+    envelope: string
+    signature_b64: string
+  }>
 }
 
 export interface EventTimelineItem {
@@ -58,6 +133,33 @@ export interface EventTimelineItem {
   batch_id: string | null
 }
 
+export interface ChainEvent {
+  event_hash: string
+  chain_height: number
+  seq: number | null
+  event_type: string
+  timestamp: string
+  actor_id: string
+  payload: Record<string, any>
+  prev_event_hash: string | null
+  signature_b64: string
+  anchored: boolean
+  batch_id: string | null
+}
+
+export interface EventFilters {
+  event_type?: string // comma-separated
+  actor_id?: string
+  since?: string
+  until?: string
+}
+
+export interface EventPage {
+  object_id: string
+  events: ChainEvent[]
+  next_cursor: string | null
+}
+
 export interface VerificationReport {
   cid_match: boolean
   chain_valid: boolean
@@ -65,6 +167,10 @@ export interface VerificationReport {
   anchored: boolean
   timeline: EventTimelineItem[]
   errors: string[]
+  // Events trusted from a verification checkpoint; the timeline starts at chain height timeline_start
+  checkpoint_chain_length: number
+  timeline_start: number
+  signatures_checked: number
 }
 
 // Gallery / items
@@ -75,6 +181,7 @@ export interface ItemSummary {
   location?: string
   culture?: string
   primary_photo_path?: string
+  primary_photo_url?: string
   date_created?: string
 }
 
@@ -84,6 +191,7 @@ export interface ItemDetail extends ItemSummary {
   keywords?: string[]
   references?: string[]
   related_photos?: string[]
+  related_photo_urls?: string[]
   created_at: string
   published_at?: string
 }
@@ -122,6 +230,7 @@ export interface ContributionRequestDetail extends ContributionRequestSummary {
   sample_significance?: string
   sample_references?: string[]
   sample_photos: string[]
+  sample_photo_urls?: string[]
   reviewed_by?: string
   reviewed_at?: string
   admin_notes?: string
@@ -138,6 +247,67 @@ export interface SubmissionSummary {
   admin_feedback?: string
 }
 
+export interface CidLookupResponse {
+  found: Record<string, string | null> // null for private objects
+  missing: string[]
+}
+
+// Thrown instead of uploading when the server already holds the file's CID
+export class DuplicateObjectError extends Error {
+  constructor(public cid: string, public objectId: string | null) {
+    super(objectId ? `Object with this CID already exists (object ${objectId})` : 'Object with this CID already exists')
+    this.name = 'DuplicateObjectError'
+  }
+}
+
+export interface ResumableUploadOptions {
+  chunkSize?: number
+  parallel?: number
+  onProgress?: (sent: number, total: number) => void
+  onHashProgress?: (hashed: number, total: number) => void
+}
+
+// Files above this size go through the resumable /uploads protocol
+export const RESUMABLE_THRESHOLD = 32 * 1024 * 1024
+
+const encodeUploadMetadata = (fields: Record<string, string>) =>
+  Object.entries(fields)
+    .map(([key, value]) => `${key} ${btoa(unescape(encodeURIComponent(value)))}`)
+    .join(',')
+
+const parseUploadRanges = (header?: string): Array<[number, number]> =>
+  (header || '')
+    .split(',')
+    .filter(Boolean)
+    .map((range) => {
+      const [start, end] = range.split('-').map(Number)
+      return [start, end + 1]
+    })
+
+// Parts of [start, end) missing from the sorted received ranges, in pieces of at most chunkSize
+const missingRanges = (
+  received: Array<[number, number]>,
+  start: number,
+  end: number,
+  chunkSize: number
+): Array<[number, number]> => {
+  const pieces: Array<[number, number]> = []
+  const add = (from: number, to: number) => {
+    for (let p = from; p < to; p += chunkSize) pieces.push([p, Math.min(p + chunkSize, to)])
+  }
+  let cursor = start
+  for (const [s, e] of received) {
+    if (e <= cursor) continue
+    if (s >= end) break
+    if (s > cursor) add(cursor, s)
+    cursor = Math.max(cursor, e)
+  }
+  if (cursor < end) add(cursor, end)
+  return pieces
+}
+
+const rangesSize = (ranges: Array<[number, number]>) => ranges.reduce((n, [s, e]) => n + e - s, 0)
+
 export const apiClient = {
   async generateKeypair() {
     const res = await api.post('/actors/generate')
@@ -149,7 +319,33 @@ export const apiClient = {
     return res.data
   },
 
+  // Whether a CID is stored, and its object ID if the object is public; a HEAD request, so no body either way
+  async findObjectByCid(cid: string) {
+    const res = await api.head(`/objects/by-cid/${cid}`, {
+      validateStatus: (status) => status === 200 || status === 404,
+    })
+    return {
+      stored: res.status === 200,
+      objectId: (res.headers['x-object-id'] as string | undefined) ?? null,
+    }
+  },
+
+  async lookupCids(cids: string[]) {
+    const res = await api.post<CidLookupResponse>('/objects/cids:lookup', { cids })
+    return res.data
+  },
+
+  // Hash locally and ask the server before sending any file bytes
+  async checkNotStored(file: File, onHashProgress?: (hashed: number, total: number) => void) {
+    const cid = await sha256File(file, onHashProgress)
+    const { stored, objectId } = await this.findObjectByCid(cid)
+    if (stored) throw new DuplicateObjectError(cid, objectId)
+    return cid
+  },
+
   async ingest(file: File, metadata: Record<string, any>, actorId: string) {
+    await this.checkNotStored(file)
+
     const formData = new FormData()
     formData.append('file', file)
     formData.append('metadata', JSON.stringify(metadata))
@@ -161,14 +357,139 @@ export const apiClient = {
     return res.data
   },
 
+  async ingestResumable(
+    file: File,
+    metadata: Record<string, any>,
+    actorId: string,
+    options: ResumableUploadOptions = {}
+  ) {
+    await this.checkNotStored(file, options.onHashProgress)
+
+    const created = await api.post('/uploads', null, {
+      headers: {
+        'Upload-Length': String(file.size),
+        'Upload-Metadata': encodeUploadMetadata({
+          filename: file.name,
+          content_type: file.type || 'application/octet-stream',
+          metadata: JSON.stringify(metadata),
+          actor_id: actorId,
+        }),
+      },
+    })
+    return this.resumeIngest(created.headers['location'], file, options)
+  },
+
+  // Upload whatever the server is missing, in parallel, then finalize into /ingest
+  async resumeIngest(location: string, file: File, options: ResumableUploadOptions = {}) {
+    const chunkSize = options.chunkSize ?? 8 * 1024 * 1024
+    const parallel = options.parallel ?? 4
+
+    const receivedRanges = async () => parseUploadRanges((await api.head(location)).headers['upload-ranges'])
+
+    const pending = missingRanges(await receivedRanges(), 0, file.size, chunkSize)
+    let sent = file.size - rangesSize(pending)
+    options.onProgress?.(sent, file.size)
+
+    const sendChunk = async ([start, end]: [number, number], attempt = 0): Promise<void> => {
+      try {
+        await api.patch(location, file.slice(start, end), {
+          headers: {
+            'Upload-Offset': String(start),
+            'Content-Type': 'application/offset+octet-stream',
+          },
+        })
+      } catch (err: any) {
+        if (attempt >= 3) throw err
+        // A dropped chunk keeps what arrived (and a 409 may be its own request still
+        // finishing), so wait, then resend only what the server is still missing
+        await new Promise((resolve) => setTimeout(resolve, 500 * (attempt + 1)))
+        const gaps = missingRanges(await receivedRanges(), start, end, chunkSize)
+        sent += end - start - rangesSize(gaps)
+        options.onProgress?.(sent, file.size)
+        for (const gap of gaps) await sendChunk(gap, attempt + 1)
+        return
+      }
+      sent += end - start
+      options.onProgress?.(sent, file.size)
+    }
+
+    let next = 0
+    const worker = async () => {
+      while (next < pending.length) {
+        await sendChunk(pending[next++])
+      }
+    }
+    await Promise.all(Array.from({ length: Math.min(parallel, pending.length) }, worker))
+
+    const res = await api.post<IngestResponse>(`${location}/ingest`, {})
+    return res.data
+  },
+
   async createEvent(objectId: string, data: EventCreate, privateKey?: string) {
     const url = `/objects/${objectId}/events${privateKey ? `?private_key=${encodeURIComponent(privateKey)}` : ''}`
     const res = await api.post<EventResponse>(url, data)
     return res.data
   },
 
-  async anchor() {
-    const res = await api.post<AnchorResponse>('/anchor')
+  async anchor(namespace?: string) {
+    const res = await api.post<AnchorResponse>('/anchor', null, { params: namespace ? { namespace } : undefined })
+    return res.data
+  },
+
+  async getEventProof(eventHash: string) {
+    const res = await api.get<InclusionProof>(`/events/${eventHash}/proof`)
+    return res.data
+  },
+
+  async getBatchProofs(params: { event_hashes?: string[]; object_id?: string }) {
+    const res = await api.post<BatchProofResponse>('/proofs:batch', params)
+    return res.data
+  },
+
+  async getObjectEvents(objectId: string, params: EventFilters & { cursor?: string; limit?: number } = {}) {
+    const res = await api.get<EventPage>(`/objects/${objectId}/events`, { params })
+    return res.data
+  },
+
+  /**
+   * Stream an object's events as NDJSON, handing them over in batches as they arrive.
+   * Resolves when the stream ends; abort with the signal.
+   */
+  async streamObjectEvents(
+    objectId: string,
+    onBatch: (events: ChainEvent[]) => void,
+    filters: EventFilters = {},
+    signal?: AbortSignal
+  ) {
+    const params = new URLSearchParams({ format: 'ndjson' })
+    Object.entries(filters).forEach(([key, value]) => value && params.set(key, value))
+    const res = await fetch(`${API_BASE}/objects/${objectId}/events?${params}`, { signal })
+    if (!res.ok || !res.body) {
+      throw new Error(`Failed to load events (${res.status})`)
+    }
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      buffered += decoder.decode(value, { stream: !done })
+      const lines = buffered.split('\n')
+      buffered = done ? '' : lines.pop() || ''
+      const events = lines.filter((line) => line.trim()).map((line) => JSON.parse(line) as ChainEvent)
+      if (events.length) onBatch(events)
+      if (done) break
+    }
+  },
+
+  async getObjectState(objectId: string, at?: string) {
+    const res = await api.get<ObjectState>(`/objects/${objectId}/state`, { params: { at } })
+    return res.data
+  },
+
+  async getAncestryProof(objectId: string, ancestor: string, descendant?: string) {
+    const res = await api.get<AncestryProof>(`/objects/${objectId}/ancestry`, {
+      params: { ancestor, descendant },
+    })
     return res.data
   },
 
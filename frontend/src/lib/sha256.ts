@@ -0,0 +1,121 @@
+/**
+ * SHA-256 of a File, matching the backend CID (crypto.compute_cid).
+ * WebCrypto has no incremental digest, so large files are streamed through
+ * a small JS implementation instead of being loaded into memory at once.
+ */
+
+// Below this size the whole file is handed to WebCrypto
+const WEBCRYPTO_MAX_BYTES = 64 * 1024 * 1024
+const READ_CHUNK_BYTES = 4 * 1024 * 1024
+
+const K = new Uint32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+])
+
+class Sha256 {
+  private h = new Uint32Array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+  ])
+  private w = new Uint32Array(64)
+  private buffer = new Uint8Array(64)
+  private buffered = 0
+  private length = 0
+
+  update(data: Uint8Array) {
+    let offset = 0
+    this.length += data.length
+    if (this.buffered) {
+      const take = Math.min(64 - this.buffered, data.length)
+      this.buffer.set(data.subarray(0, take), this.buffered)
+      this.buffered += take
+      offset = take
+      if (this.buffered < 64) return
+      this.block(this.buffer, 0)
+      this.buffered = 0
+    }
+    for (; offset + 64 <= data.length; offset += 64) this.block(data, offset)
+    this.buffer.set(data.subarray(offset), 0)
+    this.buffered = data.length - offset
+  }
+
+  hex(): string {
+    const bits = this.length * 8
+    const tail = new Uint8Array(this.buffered < 56 ? 64 : 128)
+    tail.set(this.buffer.subarray(0, this.buffered))
+    tail[this.buffered] = 0x80
+    const view = new DataView(tail.buffer)
+    view.setUint32(tail.length - 8, Math.floor(bits / 0x100000000))
+    view.setUint32(tail.length - 4, bits >>> 0)
+    for (let offset = 0; offset < tail.length; offset += 64) this.block(tail, offset)
+    return Array.from(this.h, (word) => word.toString(16).padStart(8, '0')).join('')
+  }
+
+  private block(data: Uint8Array, offset: number) {
+    const w = this.w
+    for (let i = 0; i < 16; i++) {
+      const j = offset + i * 4
+      w[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3]
+    }
+    for (let i = 16; i < 64; i++) {
+      const a = w[i - 15]
+      const b = w[i - 2]
+      const s0 = ((a >>> 7) | (a << 25)) ^ ((a >>> 18) | (a << 14)) ^ (a >>> 3)
+      const s1 = ((b >>> 17) | (b << 15)) ^ ((b >>> 19) | (b << 13)) ^ (b >>> 10)
+      w[i] = w[i - 16] + s0 + w[i - 7] + s1
+    }
+
+    const h = this.h
+    let [a, b, c, d, e, f, g, k] = h
+    for (let i = 0; i < 64; i++) {
+      const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7))
+      const t1 = (k + S1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0
+      const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10))
+      const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0
+      k = g
+      g = f
+      f = e
+      e = (d + t1) | 0
+      d = c
+      c = b
+      b = a
+      a = (t1 + t2) | 0
+    }
+    h[0] += a
+    h[1] += b
+    h[2] += c
+    h[3] += d
+    h[4] += e
+    h[5] += f
+    h[6] += g
+    h[7] += k
+  }
+}
+
+const toHex = (digest: ArrayBuffer) =>
+  Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('')
+
+export async function sha256File(
+  file: Blob,
+  onProgress?: (hashed: number, total: number) => void
+): Promise<string> {
+  if (file.size <= WEBCRYPTO_MAX_BYTES && globalThis.crypto?.subtle) {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer())
+    onProgress?.(file.size, file.size)
+    return toHex(digest)
+  }
+
+  const hasher = new Sha256()
+  for (let start = 0; start < file.size; start += READ_CHUNK_BYTES) {
+    const chunk = await file.slice(start, start + READ_CHUNK_BYTES).arrayBuffer()
+    hasher.update(new Uint8Array(chunk))
+    onProgress?.(Math.min(start + READ_CHUNK_BYTES, file.size), file.size)
+  }
+  return hasher.hex()
+}
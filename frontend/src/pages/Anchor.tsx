@@ -1,10 +1,10 @@
 import { useState } from 'react'
-import { apiClient } from '../lib/api'
+import { apiClient, AnchorResponse } from '../lib/api'
 import './Anchor.css'
 
 function Anchor() {
   const [loading, setLoading] = useState(false)
-  const [result, setResult] = useState<any>(null)
+  const [result, setResult] = useState<AnchorResponse | null>(null)
   const [error, setError] = useState<string | null>(null)
 
   const handleAnchor = async () => {
@@ -32,15 +32,15 @@ function Anchor() {
         <div className="anchor-info">
           <h2>What is Anchoring?</h2>
           <p>
-            Anchoring creates a cryptographic checkpoint by computing a Merkle root of all unanchored events
-            and storing it in the anchor file. This provides tamper-evidence and persistence even if the
-            local database is deleted.
+            Anchoring creates a cryptographic checkpoint by computing Merkle roots of all unanchored events
+            and publishing them through the anchoring backend. This provides tamper-evidence and persistence
+            even if the local database is deleted.
           </p>
           <ul>
             <li>Collects all events that haven't been anchored yet</li>
-            <li>Computes a Merkle tree root</li>
-            <li>Stores the root in <code>backend/data/anchors.json</code></li>
-            <li>Generates inclusion proofs for each event</li>
+            <li>Builds one Merkle tree per namespace (collection owner)</li>
+            <li>Combines the namespace roots into a single epoch root</li>
+            <li>Generates inclusion proofs chaining each event to the epoch root</li>
           </ul>
         </div>
 
@@ -60,13 +60,21 @@ function Anchor() {
           <h3>✓ Events Anchored Successfully</h3>
           <div className="result-details">
             <div className="detail-item">
-              <strong>Batch ID:</strong>
-              <code>{result.batch_id}</code>
+              <strong>Epoch ID:</strong>
+              <code>{result.epoch_id}</code>
             </div>
             <div className="detail-item">
-              <strong>Merkle Root:</strong>
-              <code>{result.merkle_root}</code>
+              <strong>Epoch Root:</strong>
+              <code>{result.epoch_root}</code>
             </div>
+            {result.batches.map((batch) => (
+              <div className="detail-item" key={batch.batch_id}>
+                <strong>{batch.namespace}:</strong>
+                <span>
+                  {batch.event_count} event(s), root <code>{batch.merkle_root.substring(0, 16)}...</code>
+                </span>
+              </div>
+            ))}
             <div className="detail-item">
               <strong>Event Count:</strong>
               <span>{result.event_count}</span>
@@ -113,9 +113,9 @@ function Dashboard() {
                 onClick={() => navigate(`/items/${item.object_id}`)}
               >
                 <div className="archive-card-image">
-                  {item.primary_photo_path ? (
+                  {item.primary_photo_url ? (
                     <img
-                      src={`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/${item.primary_photo_path}`}
+                      src={`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}${item.primary_photo_url}`}
                       alt={item.title}
                     />
                   ) : (
@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import { apiClient } from '../lib/api'
+import Timeline from '../components/Timeline'
 import './Events.css'
 
 function Events() {
@@ -9,6 +10,8 @@ function Events() {
   const [payload, setPayload] = useState('{}')
   const [loading, setLoading] = useState(false)
   const [result, setResult] = useState<{ event_hash: string } | null>(null)
+  // Object whose chain is shown after an event is appended
+  const [timelineObjectId, setTimelineObjectId] = useState<string | null>(null)
   const [error, setError] = useState<string | null>(null)
 
   const handleSubmit = async (e: React.FormEvent) => {
@@ -35,6 +38,7 @@ function Events() {
         actor_id: actorId,
       })
       setResult(response)
+      setTimelineObjectId(objectId)
       // Reset payload
       setPayload('{}')
     } catch (err: any) {
@@ -203,6 +207,12 @@ function Events() {
           <p className="info-text">This event has been appended to the provenance chain.</p>
         </div>
       )}
+
+      {result && timelineObjectId && (
+        <div className="card">
+          <Timeline key={result.event_hash} objectId={timelineObjectId} />
+        </div>
+      )}
     </div>
   )
 }
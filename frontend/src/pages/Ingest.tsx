@@ -1,5 +1,5 @@
 import { useState } from 'react'
-import { apiClient } from '../lib/api'
+import { apiClient, RESUMABLE_THRESHOLD } from '../lib/api'
 import './Ingest.css'
 
 function Ingest() {
@@ -25,7 +25,9 @@ function Ingest() {
     setLoading(true)
     setError(null)
     try {
-      const response = await apiClient.ingest(file, metadata, actorId)
+      const response = file.size > RESUMABLE_THRESHOLD
+        ? await apiClient.ingestResumable(file, metadata, actorId)
+        : await apiClient.ingest(file, metadata, actorId)
       setResult(response)
     } catch (err: any) {
       setError(err.response?.data?.detail || err.message || 'Ingestion failed')
@@ -128,6 +128,13 @@ function Verify() {
             </div>
           )}
 
+          {report.timeline_start > 0 && (
+            <div className="checkpoint-note">
+              Events #1–#{report.checkpoint_chain_length} were verified through a signed checkpoint.
+              {' '}Showing events from #{report.timeline_start + 1} on; {report.signatures_checked} signature(s) checked now.
+            </div>
+          )}
+
           <Timeline events={report.timeline} />
         </div>
       )}